@@ -0,0 +1,435 @@
+# 크롤러 오프라인 벤치마크
+# 카카오 / Archisketch / 쇼핑몰에 접속하지 않고, bench_fixtures/ 에 저장해 둔 페이지를 로컬 HTTP 서버로 띄운 뒤
+# 실제 크롤러 코드를 그대로 실행해서 단계별 성능을 측정합니다.
+#   price : FurniturePriceCrawler.get_furniture_price (네이버 쇼핑 / 쿠팡 / G마켓 / 11번가 결과 페이지)
+#   crawl : crawling.iter_category_items (또는 --mode network 이면 iter_category_items_from_network)
+#   db    : FurnitureSink (가구 저장) + BatchPriceWriter (가격 저장) - 로컬 Postgres 필요
+# 단계마다 처리량(items/sec), 아이템당 지연시간 p50/p95, 최대 메모리(RSS), DB 왕복 횟수를 출력합니다.
+#
+# python benchmark.py                                        -> price, crawl 단계
+# python benchmark.py --database-url postgresql://postgres@localhost/bench
+#                                                            -> db 단계까지 (furniture.furnitures 를 비우고 다시 채움)
+# python benchmark.py --stages price --latency 80 --json before.json
+#                                                            -> 요청마다 80ms 지연, 결과를 파일로 저장해 비교
+#
+# DB 단계는 COPY / ON CONFLICT / hashtext 등 Postgres 전용 SQL 을 그대로 실행하므로 SQLite 로는 대신할 수 없습니다.
+# 실수로 운영 DB 를 비우지 않도록 localhost 가 아닌 주소는 --allow-remote-db 없이는 거부합니다.
+
+import argparse
+import copy
+import json
+import os
+import threading
+import time
+import urllib.parse
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+import numpy as np
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import make_url
+
+import crawling
+import library_api
+from crawling_price import FurniturePriceCrawler, assign_random_prices
+from furniture_db import NAME_INDEX_SQL, BatchPriceWriter, FurnitureSink, iter_furniture_chunks
+from marketplaces import MARKETPLACES
+
+# 프로세스 트리(크롬 포함) 메모리 측정용 - 없으면 파이썬 프로세스의 최대 RSS 만 측정
+try:
+    import psutil
+except ImportError:
+    psutil = None
+try:
+    import resource
+except ImportError:
+    resource = None
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'bench_fixtures')
+
+# 쇼핑몰 이름 -> 결과 페이지 fixture (shop_<키>.html)
+SHOP_FIXTURES = {
+    '네이버 쇼핑': 'naver',
+    '쿠팡': 'coupang',
+    'G마켓': 'gmarket',
+    '11번가': '11st',
+}
+
+# 1x1 투명 PNG (가구 썸네일 자리)
+THUMBNAIL_PNG = bytes.fromhex(
+    '89504e470d0a1a0a0000000d4948445200000001000000010806000000'
+    '1f15c4890000000b49444154789c6360000200000500017a5eab3f0000000049454e44ae426082'
+)
+
+
+class FixtureServer:
+    def __init__(self, fixture_dir=FIXTURE_DIR, latency=0.0, page_size=12):
+        """
+        latency: 응답마다 추가할 지연 시간(초) - 실제 네트워크 왕복 흉내
+        page_size: 가구 목록 API 한 페이지의 아이템 수
+        """
+        self.fixture_dir = fixture_dir
+        self.latency = latency
+        self.page_size = page_size
+        self.request_count = 0
+        with open(os.path.join(fixture_dir, 'library_items.json'), encoding='utf-8') as f:
+            self.library_items = json.load(f)['items']
+        self._httpd = None
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self._httpd.server_address[1]}"
+
+    def _handler(self):
+        server = self
+
+        class FixtureHandler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def _send(self, body, content_type):
+                self.send_response(200)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                server.request_count += 1
+                if server.latency:
+                    time.sleep(server.latency)
+
+                url = urllib.parse.urlparse(self.path)
+                params = urllib.parse.parse_qs(url.query)
+                if url.path == '/library':
+                    self._send(server.read_fixture('library.html'), 'text/html; charset=utf-8')
+                elif url.path == '/library/items':
+                    page = int(params.get('page', ['0'])[0])
+                    start = page * server.page_size
+                    payload = {
+                        'items': server.library_items[start:start + server.page_size],
+                        'page': page,
+                        'hasNext': start + server.page_size < len(server.library_items),
+                    }
+                    self._send(json.dumps(payload, ensure_ascii=False).encode('utf-8'), 'application/json')
+                elif url.path.startswith('/thumb/'):
+                    self._send(THUMBNAIL_PNG, 'image/png')
+                elif url.path.startswith('/shop/'):
+                    shop = url.path.split('/')[2]
+                    self._send(server.read_fixture(f'shop_{shop}.html'), 'text/html; charset=utf-8')
+                else:
+                    self.send_error(404)
+
+        return FixtureHandler
+
+    def read_fixture(self, filename):
+        with open(os.path.join(self.fixture_dir, filename), 'rb') as f:
+            return f.read()
+
+    def start(self):
+        self._httpd = ThreadingHTTPServer(('127.0.0.1', 0), self._handler())
+        threading.Thread(target=self._httpd.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        if self._httpd:
+            self._httpd.shutdown()
+            self._httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+
+class RssSampler:
+    """측정 구간 동안 파이썬 프로세스 + 자식 프로세스(크롬) RSS 합계의 최댓값 기록"""
+
+    def __init__(self, interval=0.1):
+        self.interval = interval
+        self.peak = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _current_rss(self):
+        process = psutil.Process()
+        total = process.memory_info().rss
+        for child in process.children(recursive=True):
+            try:
+                total += child.memory_info().rss
+            except psutil.Error:
+                continue
+        return total
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.peak = max(self.peak, self._current_rss())
+            self._stop.wait(self.interval)
+
+    def start(self):
+        if psutil is not None:
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        if self._thread:
+            self._stop.set()
+            self._thread.join()
+        elif resource is not None:
+            # psutil 이 없으면 파이썬 프로세스가 지금까지 쓴 최대 RSS (리눅스 기준 KB 단위)
+            self.peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+        return self.peak
+
+
+class StageTimer:
+    """단계 전체 시간과 아이템 사이 간격(lap)을 재는 타이머"""
+
+    def __init__(self, name, round_trips=None):
+        self.name = name
+        self.round_trips = round_trips
+        self.latencies = []
+        self.elapsed = 0.0
+        self.peak_rss = 0
+        self._round_trips_start = 0
+        self._rss = RssSampler()
+
+    def __enter__(self):
+        if self.round_trips is not None:
+            self._round_trips_start = self.round_trips['count']
+        self._rss.start()
+        self._start = self._last = time.perf_counter()
+        return self
+
+    def lap(self):
+        now = time.perf_counter()
+        self.latencies.append(now - self._last)
+        self._last = now
+
+    def __exit__(self, exc_type, exc, tb):
+        self.elapsed = time.perf_counter() - self._start
+        self.peak_rss = self._rss.stop()
+
+    def summary(self):
+        items = len(self.latencies)
+        latencies = np.array(self.latencies) * 1000 if items else np.zeros(1)
+        return {
+            'stage': self.name,
+            'items': items,
+            'seconds': round(self.elapsed, 3),
+            'items_per_sec': round(items / self.elapsed, 2) if self.elapsed else 0.0,
+            'p50_ms': round(float(np.percentile(latencies, 50)), 1),
+            'p95_ms': round(float(np.percentile(latencies, 95)), 1),
+            'peak_rss_mb': round(self.peak_rss / 1024 / 1024, 1),
+            'db_round_trips': (self.round_trips['count'] - self._round_trips_start
+                               if self.round_trips is not None else None),
+        }
+
+
+def use_local_marketplaces(base_url, page_wait=0):
+    """MARKETPLACES 의 쇼핑몰 어댑터를 로컬 fixture 서버를 보도록 교체 (속도 제한 해제)"""
+    for name, shop in SHOP_FIXTURES.items():
+        adapter = copy.copy(MARKETPLACES[name])
+        adapter.url_template = f"{base_url}/shop/{shop}?query={{query}}"
+        adapter.rate, adapter.burst = 1000, 1000
+        if page_wait is not None:
+            adapter.page_wait = page_wait
+        MARKETPLACES[name] = adapter
+
+
+def create_counting_engine(database_url):
+    """SQL 실행 / COPY / commit 마다 DB 왕복 횟수를 세는 엔진 (raw_connection 커서 포함)"""
+    import psycopg2.extensions
+
+    round_trips = {'count': 0}
+
+    class CountingCursor(psycopg2.extensions.cursor):
+        def execute(self, *args, **kwargs):
+            round_trips['count'] += 1
+            return super().execute(*args, **kwargs)
+
+        def executemany(self, *args, **kwargs):
+            round_trips['count'] += 1
+            return super().executemany(*args, **kwargs)
+
+        def copy_expert(self, *args, **kwargs):
+            round_trips['count'] += 1
+            return super().copy_expert(*args, **kwargs)
+
+    class CountingConnection(psycopg2.extensions.connection):
+        def cursor(self, *args, **kwargs):
+            kwargs.setdefault('cursor_factory', CountingCursor)
+            return super().cursor(*args, **kwargs)
+
+        def commit(self):
+            round_trips['count'] += 1
+            return super().commit()
+
+    engine = create_engine(database_url, connect_args={'connection_factory': CountingConnection})
+    return engine, round_trips
+
+
+def prepare_bench_table(engine):
+    """로컬 DB 에 furniture.furnitures 를 (prisma 스키마와 같은 컬럼 + 이름 유니크 인덱스로) 만들고 비움"""
+    with engine.begin() as conn:
+        conn.execute(text('CREATE EXTENSION IF NOT EXISTS "uuid-ossp"'))
+        conn.execute(text('CREATE SCHEMA IF NOT EXISTS furniture'))
+        conn.execute(text("""
+            CREATE TABLE IF NOT EXISTS furniture.furnitures (
+                furniture_id uuid PRIMARY KEY DEFAULT uuid_generate_v4(),
+                name varchar(200) NOT NULL,
+                description text,
+                length_x numeric(10, 2) NOT NULL,
+                length_y numeric(10, 2) NOT NULL,
+                length_z numeric(10, 2) NOT NULL,
+                image_url text,
+                model_url text,
+                price numeric(12, 2),
+                brand varchar(100),
+                is_active boolean DEFAULT false,
+                created_at timestamp(6) DEFAULT now(),
+                updated_at timestamp(6) DEFAULT now(),
+                price_updated_at timestamp(6),
+                category_id integer NOT NULL,
+                cached_model_url varchar(255),
+                is_redis_cached boolean DEFAULT false
+            )
+        """))
+        conn.execute(text('TRUNCATE furniture.furnitures'))
+        # 빈 로컬 테이블이므로 마이그레이션 없이 바로 생성 (FurnitureSink 가 인덱스를 요구함)
+        conn.execute(text(NAME_INDEX_SQL))
+
+
+def bench_price(server, names, concurrent=False, page_wait=0, lean_browsing=True):
+    use_local_marketplaces(server.base_url, page_wait=page_wait)
+    crawler = FurniturePriceCrawler(concurrent=concurrent, cache_path=None, lean_browsing=lean_browsing)
+    try:
+        # 크롬을 미리 띄워 두고 측정 (첫 아이템에 드라이버 시작 시간이 섞이지 않도록)
+        with crawler.driver_pool.driver():
+            pass
+        with StageTimer('price') as timer:
+            for name in names:
+                crawler.get_furniture_price(name)
+                timer.lap()
+        return timer
+    finally:
+        crawler.close()
+
+
+def bench_crawl(server, category, max_items=None, mode='popup', headless=True):
+    driver = crawling.create_driver(capture_network=(mode == 'network'), headless=headless)
+    try:
+        driver.get(f"{server.base_url}/library")
+        if mode == 'network':
+            items = crawling.iter_category_items_from_network(driver, category, max_items=max_items)
+        else:
+            items = crawling.iter_category_items(driver, category, max_items=max_items)
+        with StageTimer(f'crawl ({mode})') as timer:
+            for _ in items:
+                timer.lap()
+        return timer
+    finally:
+        driver.quit()
+
+
+def bench_db(database_url, library_items, count=2000, batch_size=200, price_batch_size=5000):
+    engine, round_trips = create_counting_engine(database_url)
+    prepare_bench_table(engine)
+
+    # fixture 가구를 이름만 바꿔 count 개로 늘림
+    items = []
+    for i in range(count):
+        item = library_api.to_furniture(library_items[i % len(library_items)], category_id=5)
+        item['name'] = f"{item['name']} #{i}"
+        items.append(item)
+
+    timers = []
+    with StageTimer('db furnitures', round_trips) as timer:
+        with FurnitureSink(engine, batch_size=batch_size) as sink:
+            for item in items:
+                sink.add(item)
+                timer.lap()
+    timers.append(timer)
+
+    # set_random_prices 와 같은 흐름: 가격 없는 가구를 묶음으로 읽으면서 바로 저장
+    rng = np.random.default_rng(0)
+    with StageTimer('db prices', round_trips) as timer:
+        with BatchPriceWriter(engine, batch_size=price_batch_size) as writer:
+            for chunk in iter_furniture_chunks(engine, ['name', 'category_id'], 'price IS NULL',
+                                               chunk_size=price_batch_size):
+                for furniture_id, price in zip(chunk['furniture_id'], assign_random_prices(chunk, seed=rng)):
+                    writer.add(furniture_id, price)
+                    timer.lap()
+    timers.append(timer)
+
+    engine.dispose()
+    return timers
+
+
+def print_summary(summaries):
+    print("\n단계               아이템    초      items/s   p50(ms)   p95(ms)   RSS(MB)   DB 왕복")
+    for s in summaries:
+        round_trips = '-' if s['db_round_trips'] is None else s['db_round_trips']
+        print(f"{s['stage']:<16} {s['items']:>7} {s['seconds']:>7.2f} {s['items_per_sec']:>9.2f} "
+              f"{s['p50_ms']:>9.1f} {s['p95_ms']:>9.1f} {s['peak_rss_mb']:>9.1f} {round_trips:>9}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='크롤러 오프라인 벤치마크 (저장된 페이지 사용)')
+    parser.add_argument('--stages', default='price,crawl', help='실행할 단계 (price, crawl, db 를 쉼표로)')
+    parser.add_argument('--latency', type=float, default=0, help='응답마다 추가할 지연 시간 (ms)')
+    parser.add_argument('--price-items', type=int, default=20, help='가격 검색할 가구 수')
+    parser.add_argument('--concurrent', action='store_true', help='가격 검색 시 쇼핑몰 동시 검색')
+    parser.add_argument('--page-wait', type=float, default=0,
+                        help='쇼핑몰 가격 대기 시간에 더하는 여유 (초, 기본 0 / 실제 설정을 쓰려면 -1)')
+    parser.add_argument('--no-lean', action='store_true', help='가격 검색 크롬에서 이미지/폰트 차단 끄기')
+    parser.add_argument('--mode', choices=['popup', 'network'], default='popup', help='카테고리 수집 방식')
+    parser.add_argument('--category', type=int, default=5, help='수집할 카테고리 번호')
+    parser.add_argument('--max-items', type=int, default=None, help='카테고리에서 수집할 최대 가구 수')
+    parser.add_argument('--show-browser', action='store_true', help='카테고리 수집 크롬 창 표시')
+    parser.add_argument('--database-url', default=os.getenv('BENCH_DATABASE_URL'),
+                        help='db 단계에 사용할 로컬 Postgres 주소 (furniture.furnitures 를 비웁니다)')
+    parser.add_argument('--allow-remote-db', action='store_true', help='localhost 가 아닌 DB 도 허용')
+    parser.add_argument('--db-items', type=int, default=2000, help='db 단계에서 저장할 가구 수')
+    parser.add_argument('--json', help='결과를 저장할 JSON 파일 경로')
+    args = parser.parse_args()
+
+    stages = [stage.strip() for stage in args.stages.split(',') if stage.strip()]
+    summaries = []
+    with FixtureServer(latency=args.latency / 1000) as server:
+        print(f"fixture 서버: {server.base_url}")
+
+        if 'price' in stages:
+            names = [item['name'] for item in server.library_items][:args.price_items]
+            timer = bench_price(server, names, concurrent=args.concurrent,
+                                page_wait=None if args.page_wait < 0 else args.page_wait,
+                                lean_browsing=not args.no_lean)
+            summaries.append(timer.summary())
+
+        if 'crawl' in stages:
+            timer = bench_crawl(server, args.category, max_items=args.max_items, mode=args.mode,
+                                headless=not args.show_browser)
+            summaries.append(timer.summary())
+
+        if 'db' in stages:
+            if not args.database_url:
+                print("db 단계를 건너뜁니다. --database-url 또는 BENCH_DATABASE_URL 을 지정하세요.")
+            elif make_url(args.database_url).host not in (None, 'localhost', '127.0.0.1', '::1') \
+                    and not args.allow_remote_db:
+                print("localhost 가 아닌 DB 는 테이블을 비우므로 거부합니다. (--allow-remote-db 로 허용)")
+            else:
+                for timer in bench_db(args.database_url, server.library_items, count=args.db_items):
+                    summaries.append(timer.summary())
+
+        print(f"fixture 서버 요청 수: {server.request_count}")
+
+    if psutil is None:
+        print("psutil 이 없어 RSS 는 파이썬 프로세스 최대값만 표시합니다 (크롬 제외).")
+    print_summary(summaries)
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(summaries, f, ensure_ascii=False, indent=2)
+        print(f"결과 저장: {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+# 로그인 세션 저장 / 복원 (카카오 로그인, 튜토리얼, 프로젝트 생성 화면 건너뛰기)
+# 가구 메뉴까지 들어가는 데 성공하면 쿠키, localStorage, 도면 에디터 URL 을 파일에 저장하고,
+# 다음 실행에서는 저장된 세션으로 에디터를 바로 엽니다. (세션이 만료됐으면 crawling.py 가 로그인부터 다시 진행)
+# 파일에 로그인 쿠키가 들어 있으므로 공유하거나 커밋하지 마세요.
+#
+# 파일 형식
+# {
+#   "saved_at": 1718000000,
+#   "cookies": [{"name": ..., "value": ..., "domain": ..., ...}],
+#   "local_storage": {"키": "값"},
+#   "editor_url": "https://planner.archisketch.com/..."
+# }
+
+import json
+import os
+import time
+
+from crawl_data import data_path
+
+DEFAULT_SESSION_PATH = data_path('crawl_session.json')
+
+# 셀레니움 add_cookie 가 받는 필드
+COOKIE_FIELDS = ('name', 'value', 'path', 'domain', 'secure', 'httpOnly', 'expiry', 'sameSite')
+
+LOCAL_STORAGE_DUMP_SCRIPT = """
+const items = {};
+for (let i = 0; i < localStorage.length; i++) {
+  const key = localStorage.key(i);
+  items[key] = localStorage.getItem(key);
+}
+return items;
+"""
+LOCAL_STORAGE_LOAD_SCRIPT = """
+localStorage.clear();
+for (const [key, value] of Object.entries(arguments[0])) {
+  localStorage.setItem(key, value);
+}
+"""
+
+
+def capture_session(driver, editor_url=None):
+    """지금 브라우저의 로그인 상태 (현재 페이지 도메인의 쿠키와 localStorage)"""
+    return {
+        'saved_at': int(time.time()),
+        'cookies': driver.get_cookies(),
+        'local_storage': driver.execute_script(LOCAL_STORAGE_DUMP_SCRIPT) or {},
+        'editor_url': editor_url,
+    }
+
+
+def apply_session(driver, origin_url, session):
+    """
+    origin_url 을 연 뒤 저장된 쿠키와 localStorage 를 넣습니다. (쿠키는 같은 도메인 페이지에서만 추가 가능)
+    만료된 쿠키와 다른 도메인(카카오 등) 쿠키는 건너뜁니다.
+    """
+    driver.get(origin_url)
+    now = time.time()
+    for cookie in session.get('cookies', []):
+        cookie = {k: v for k, v in cookie.items() if k in COOKIE_FIELDS}
+        if cookie.get('expiry') and cookie['expiry'] < now:
+            continue
+        try:
+            driver.add_cookie(cookie)
+        except Exception:
+            # 다른 도메인(카카오 등) 쿠키는 추가할 수 없으므로 건너뜀
+            pass
+    if session.get('local_storage'):
+        driver.execute_script(LOCAL_STORAGE_LOAD_SCRIPT, session['local_storage'])
+
+
+def clear_session(driver):
+    """복원한 세션이 만료됐을 때 다시 로그인하기 전에 쿠키와 localStorage 비우기"""
+    driver.delete_all_cookies()
+    driver.execute_script('localStorage.clear();')
+
+
+class SessionStore:
+    def __init__(self, path=DEFAULT_SESSION_PATH):
+        self.path = path
+
+    def load(self):
+        """저장된 세션 (없거나 파일이 깨졌으면 None)"""
+        if not self.path or not os.path.exists(self.path):
+            return None
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                session = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"저장된 로그인 세션을 읽지 못했습니다: {e}")
+            return None
+        if not session.get('cookies'):
+            return None
+        return session
+
+    def save(self, session):
+        # 저장 중에 죽어도 파일이 깨지지 않도록 임시 파일에 쓰고 교체 (본인만 읽을 수 있게)
+        tmp_path = self.path + '.tmp'
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(session, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+
+    def clear(self):
+        if self.path and os.path.exists(self.path):
+            os.remove(self.path)
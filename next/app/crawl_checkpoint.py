@@ -0,0 +1,103 @@
+# 가구 크롤링 진행 상황 저장 (--resume 으로 이어서 크롤링)
+# DB 에 저장이 끝난 아이템만 기록하므로, 중간에 죽어도 저장 안 된 아이템부터 다시 수집합니다.
+# 카테고리마다 이어서 시작할 위치와 최근에 저장한 아이템 키 RECENT_KEYS 개만 기록합니다.
+# (전체 키를 기록하면 저장할 때마다 파일 전체를 다시 써서 아이템 수의 제곱만큼 느려짐)
+# - scroll_top: 팝업 모드에서 마지막으로 저장한 아이템이 보이던 스크롤 위치
+# - offset: 네트워크 응답 모드에서 저장이 끝난 아이템 수 (목록 API 응답 순서 기준)
+# - recent: 이어서 시작한 위치 근처에서 다시 보이는 아이템을 건너뛰기 위한 키
+#
+# 파일 형식
+# {
+#   "categories": {
+#     "5": {"scroll_top": 1840, "offset": 0, "recent": ["아이템 키", ...], "done": false}
+#   }
+# }
+
+import json
+import os
+import threading
+from collections import deque
+
+from crawl_data import data_path
+
+DEFAULT_CHECKPOINT_PATH = data_path('crawl_checkpoint.json')
+# 한 카테고리에서 기억할 최근 아이템 키 수 (이어서 시작할 때 한 화면에 다시 보이는 아이템보다 충분히 많게)
+RECENT_KEYS = 500
+
+
+class CrawlCheckpoint:
+    def __init__(self, path=DEFAULT_CHECKPOINT_PATH, resume=False, recent_keys=RECENT_KEYS):
+        """resume=False 이면 기존 기록을 무시하고 처음부터 시작합니다."""
+        self.path = path
+        self.recent_keys = recent_keys
+        self._lock = threading.Lock()
+        self._categories = {}
+
+        if resume and os.path.exists(path):
+            with open(path, encoding='utf-8') as f:
+                data = json.load(f)
+            for z, state in data.get('categories', {}).items():
+                self._categories[int(z)] = {
+                    'scroll_top': state.get('scroll_top', 0),
+                    'offset': state.get('offset', 0),
+                    # 예전 형식(seen: 전체 키)도 최근 키로 읽음
+                    'recent': deque(state.get('recent', state.get('seen', [])), maxlen=recent_keys),
+                    'done': state.get('done', False),
+                }
+            done = [z for z, state in self._categories.items() if state['done']]
+            print(f"체크포인트에서 이어서 수집합니다. (완료된 카테고리: {done})")
+
+    def _state(self, z):
+        return self._categories.setdefault(
+            z, {'scroll_top': 0, 'offset': 0, 'recent': deque(maxlen=self.recent_keys), 'done': False}
+        )
+
+    def is_done(self, z):
+        with self._lock:
+            return self._state(z)['done']
+
+    def seen_keys(self, z):
+        """z번째 카테고리에서 최근에 저장된 아이템 키 (이어서 시작한 위치 근처의 중복 확인용)"""
+        with self._lock:
+            return set(self._state(z)['recent'])
+
+    def scroll_top(self, z):
+        with self._lock:
+            return self._state(z)['scroll_top']
+
+    def offset(self, z):
+        with self._lock:
+            return self._state(z)['offset']
+
+    def commit(self, items):
+        """DB 저장이 끝난 아이템들(_category, _key, _scroll_top 또는 _offset 포함)을 기록하고 파일에 저장"""
+        with self._lock:
+            for item in items:
+                state = self._state(item['_category'])
+                state['recent'].append(item['_key'])
+                state['scroll_top'] = max(state['scroll_top'], item.get('_scroll_top') or 0)
+                state['offset'] = max(state['offset'], item.get('_offset') or 0)
+            self._save()
+
+    def mark_done(self, z):
+        with self._lock:
+            self._state(z)['done'] = True
+            self._save()
+
+    def _save(self):
+        data = {
+            'categories': {
+                str(z): {
+                    'scroll_top': state['scroll_top'],
+                    'offset': state['offset'],
+                    'recent': list(state['recent']),
+                    'done': state['done'],
+                }
+                for z, state in self._categories.items()
+            }
+        }
+        # 저장 중에 죽어도 파일이 깨지지 않도록 임시 파일에 쓰고 교체
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
@@ -0,0 +1,18 @@
+# 크롤러가 만드는 파일(로그인 세션, 체크포인트, 가격 캐시, 저장하지 못한 가구)의 위치
+# 소스 폴더(next/app)에 두면 도커 빌드(COPY . .)에 같이 들어가므로 사용자 캐시 폴더에 둡니다.
+# - CRAWL_DATA_DIR 환경 변수가 있으면 그 폴더
+# - 없으면 $XDG_CACHE_HOME/wheretoput (기본 ~/.cache/wheretoput)
+# 로그인 쿠키가 들어가므로 폴더는 본인만 접근할 수 있게 만듭니다.
+
+import os
+
+CRAWL_DATA_DIR = os.getenv('CRAWL_DATA_DIR') or os.path.join(
+    os.getenv('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache'),
+    'wheretoput'
+)
+
+
+def data_path(filename):
+    """크롤러 데이터 파일 경로 (폴더가 없으면 만듦)"""
+    os.makedirs(CRAWL_DATA_DIR, mode=0o700, exist_ok=True)
+    return os.path.join(CRAWL_DATA_DIR, filename)
@@ -1,11 +1,17 @@
 # .env.local 파일에 아래 내용 붙여넣기 하셔야합니다.
-# 카카오 크롤링 인증정보 
+# 카카오 크롤링 인증정보
 # YOUR_PASSWORD="카톡 비밀번호"
 # YOUR_KAKAO_ID_OR_PHONE="카톡 id"
 
 
-# 특정 가구 카테고리만 크롤링
-# tables_category_index 로 조작
+# 가구 카테고리를 골라서 크롤링
+# python crawling.py                        -> 기본 카테고리(5 = Bathroom)만
+# python crawling.py --categories 0,3,8     -> 지정한 카테고리들
+# python crawling.py --categories 0-12 --workers 4
+#                                           -> 전체 카테고리를 브라우저 4개로 나눠서 동시에
+# 로그인 세션(쿠키, localStorage, 도면 에디터 URL)은 crawl_session.json 에 저장해 두고 다음 실행에서 재사용합니다.
+# (세션 / 체크포인트 파일 위치: crawl_data.py 의 CRAWL_DATA_DIR, 기본 ~/.cache/wheretoput)
+# (세션이 만료됐으면 자동으로 다시 로그인, --fresh-login 이면 항상 로그인부터)
 # -2  = 가구 , -1 = 선택된 가구(장바구니)
 # 0= chairs , 1= Lighting
 # 2= Storage , 3 = Tables
@@ -18,270 +24,729 @@
 from selenium import webdriver
 from selenium.webdriver.common.keys import Keys
 from selenium.webdriver.common.by import By
-import pandas as pd
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.common.exceptions import TimeoutException
 import time
 from sqlalchemy import create_engine
 import traceback
 import os
+import argparse
+import json
+import queue
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
 
+# 아래 모듈들이 import 할 때 환경 변수(CRAWL_LIBRARY_*, CRAWL_DATA_DIR 등)를 읽으므로 먼저 로드
 load_dotenv(dotenv_path='../.env.local')
 
+import library_api
+from crawl_checkpoint import CrawlCheckpoint
+from browser_session import SessionStore, DEFAULT_SESSION_PATH, capture_session, apply_session, clear_session
+from furniture_db import FurnitureSink, SinkFlushError
+from dimension_parser import looks_like_dimensions, parse_dimensions
+import metrics
+
 KAKAO_ID = os.getenv('YOUR_KAKAO_ID_OR_PHONE')
 KAKAO_PW = os.getenv('YOUR_PASSWORD')
 
-# 환경 변수가 제대로 로드되었는지 확인
-if not KAKAO_ID or not KAKAO_PW:
-    print("오류: .env.local 파일에서 카카오 아이디 또는 비밀번호를 찾을 수 없습니다.")
-    print("파일 경로와 내용을 다시 확인해주세요.")
-    exit()
-
-# --- 1. 웹 드라이버 설정 및 사이트 접속 ---
-print("Archisketch 사이트로 이동합니다.")
-chrome_options = webdriver.ChromeOptions()
-driver = webdriver.Chrome(options=chrome_options)
-driver.get('https://planner.archisketch.com/')
-time.sleep(3) # 페이지 로딩 대기
-
-# --- 2. 카카오 로그인 ---
-try:
+PLANNER_URL = 'https://planner.archisketch.com/'
+
+# 단계별 최대 대기 시간(초) - .env.local 에서 조정 가능
+# 고정 sleep 대신 조건이 만족되는 즉시 다음 단계로 넘어갑니다.
+WAIT_TIMEOUTS = {
+    'page_load': float(os.getenv('CRAWL_PAGE_LOAD_TIMEOUT', 20)),  # 첫 페이지 로딩
+    'login': float(os.getenv('CRAWL_LOGIN_TIMEOUT', 60)),  # 로그인 후 메인 페이지 이동
+    'step': float(os.getenv('CRAWL_STEP_TIMEOUT', 20)),  # 화면 이동 (프로젝트 생성, 에디터 진입 등)
+    'optional': float(os.getenv('CRAWL_OPTIONAL_TIMEOUT', 3)),  # 있을 수도 없을 수도 있는 버튼/팝업
+    'item': float(os.getenv('CRAWL_ITEM_TIMEOUT', 5)),  # 가구 팝업 열기/닫기
+}
+
+# 각 카테고리 ID
+furnitures_category = [0, 1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 11, 12]
+
+######################################################
+# --categories 를 주지 않았을 때 크롤링할 카테고리 번호
+# 0 = chairs , 1 = Lighting
+# 2 = Storage , 3 = Tables
+# 4 = Decor , 5 = Bathroom
+# 6 = Kitchen , 7 = Appliances
+# 8 = Sofas, 9 = Construction
+# 10 = Bedroom , 11 = Outdoor
+# 12 = Home Decor
+tables_category_index = 5
+######################################################
+
+# 로그인 / 화면 이동 버튼 위치
+KAKAO_LOGIN_BUTTON = "#__next > div.sc-76e1595e-0.eUXodR > div > div.sc-890624c3-4.gymmcL > div > div.sc-9b38d526-0.imPflw > button.sc-40db095e-0.hVzojL.sign-in-kakao-btn > img"
+KAKAO_LOGIN_MARKER = '.sign-in-kakao-btn'
+CREATE_PROJECT_BUTTON = '//*[@id="ContentBlock"]/main/div/section[1]/div[3]/button[1]'
+FURNITURE_MENU_BUTTON = '//*[@id="root"]/section/div[1]/nav/button[6]'
+CATEGORY_XPATH = '//*[@id="root"]/section/div[1]/div[1]/div/section/aside/div/section/div[{index}]'
+
+# 가구 아이템 / 팝업 위치
+ITEM_XPATH = '//*[@id="root"]/section/div[1]/div[1]/div/section/aside/section/div/div[3]/div[{row}]/div[{col}]/div/div[1]/div[3]'
+POPUP_IMG_XPATH = '//*[@id="root"]/div[5]/section[1]/img'
+POPUP_INFO_XPATH = '//*[@id="root"]/div[5]/div'
+# 가구 목록 (가상 스크롤) - aside 패널 ↓ 내부의 리스트 컨테이너 ↓ 그 안의 overflow:auto div
+SCROLL_CONTAINER_XPATH = (
+    "//aside[contains(@class,'AsidePanel__Panel')]"
+    "//section[contains(@class,'LibraryItemList2__Container')]"
+    "//div[contains(@style,'overflow') and contains(@style,'auto')]"
+)
+# 현재 화면에 그려진 모든 가구 타일 (ITEM_XPATH 의 행/열 번호를 뺀 형태)
+ITEM_TILES_XPATH = '//*[@id="root"]/section/div[1]/div[1]/div/section/aside/section/div/div[3]/div/div/div/div[1]/div[3]'
+
+
+def wait_for(driver, condition, step, timeout, log=True):
+    """condition 이 만족될 때까지 기다린 뒤 결과 반환. 실제로 기다린 시간을 출력합니다."""
+    start = time.monotonic()
+    try:
+        return WebDriverWait(driver, timeout, poll_frequency=0.1).until(condition)
+    except TimeoutException:
+        if log:
+            print(f"  [대기] {step}: {timeout:.0f}초 초과")
+        raise
+    finally:
+        elapsed = time.monotonic() - start
+        if log and elapsed < timeout:
+            print(f"  [대기] {step}: {elapsed:.2f}초")
+
+
+def click_when_ready(driver, by, locator, step, timeout):
+    """요소가 클릭 가능해지는 즉시 클릭"""
+    element = wait_for(driver, EC.element_to_be_clickable((by, locator)), step, timeout)
+    element.click()
+    return element
+
+
+def parse_categories(value):
+    """'0,3,8' 또는 '0-12' 형태의 카테고리 목록 파싱"""
+    categories = []
+    for part in value.split(','):
+        part = part.strip()
+        if not part:
+            continue
+        if '-' in part:
+            start, end = part.split('-', 1)
+            categories.extend(range(int(start), int(end) + 1))
+        else:
+            categories.append(int(part))
+
+    invalid = [c for c in categories if c not in furnitures_category]
+    if invalid:
+        raise argparse.ArgumentTypeError(f"없는 카테고리 번호입니다: {invalid}")
+    # 순서를 유지하면서 중복 제거
+    return list(dict.fromkeys(categories))
+
+
+@metrics.timed('driver_startup', script='crawl')
+def create_driver(capture_network=False, headless=False):
+    """capture_network=True 이면 네트워크 응답을 읽을 수 있도록 performance 로그를 켭니다."""
+    chrome_options = webdriver.ChromeOptions()
+    if headless:
+        chrome_options.add_argument('--headless')
+    if capture_network:
+        chrome_options.set_capability('goog:loggingPrefs', {'performance': 'ALL'})
+    return webdriver.Chrome(options=chrome_options)
+
+
+# --- 1~2. 사이트 접속 및 카카오 로그인 ---
+@metrics.timed('login')
+def login(driver):
+    """카카오 로그인. 실패하면 예외 발생"""
+    print("Archisketch 사이트로 이동합니다.")
+    driver.get(PLANNER_URL)
+
     print("카카오 로그인을 시도합니다.")
-    # 카카오 로그인 버튼 클릭
-    driver.find_element(By.CSS_SELECTOR, "#__next > div.sc-76e1595e-0.eUXodR > div > div.sc-890624c3-4.gymmcL > div > div.sc-9b38d526-0.imPflw > button.sc-40db095e-0.hVzojL.sign-in-kakao-btn > img").click()
-    time.sleep(1)
+    # 카카오 로그인 버튼 클릭 (페이지 로딩 대기)
+    click_when_ready(driver, By.CSS_SELECTOR, KAKAO_LOGIN_BUTTON, '로그인 페이지 로딩', WAIT_TIMEOUTS['page_load'])
 
     # 아이디 입력
-    element = driver.find_element(By.XPATH, '//*[@id="loginId--1"]')
-    element.send_keys(os.getenv('YOUR_KAKAO_ID_OR_PHONE'))
+    element = wait_for(driver, EC.visibility_of_element_located((By.XPATH, '//*[@id="loginId--1"]')),
+                       '카카오 로그인 폼', WAIT_TIMEOUTS['step'])
+    element.send_keys(KAKAO_ID)
 
     # 비밀번호 입력
     element = driver.find_element(By.XPATH, '//*[@id="password--2"]')
-    element.send_keys(os.getenv('YOUR_PASSWORD'))
-    time.sleep(0.5)
+    element.send_keys(KAKAO_PW)
 
     # Log in 버튼 클릭
-    driver.find_element(By.CSS_SELECTOR, '#mainContent > div > div > form > div.confirm_btn > button.btn_g.highlight.submit').click()
+    click_when_ready(driver, By.CSS_SELECTOR, '#mainContent > div > div > form > div.confirm_btn > button.btn_g.highlight.submit',
+                     '로그인 버튼', WAIT_TIMEOUTS['step'])
+    # 로그인 후 카카오 페이지를 벗어나 Archisketch 로 돌아올 때까지 대기
+    wait_for(driver, lambda d: 'kakao.com' not in d.current_url or
+             d.find_elements(By.XPATH, '//*[@id="mArticle"]/div/div[2]/form/button'),
+             '로그인 후 페이지 이동', WAIT_TIMEOUTS['login'])
     print("로그인 성공. 메인 페이지로 이동합니다.")
-    time.sleep(20) # 로그인 후 페이지 로딩 대기
-except Exception as e:
-    print(f"로그인 과정에서 오류가 발생했습니다: {e}")
-    driver.quit() # 오류 발생 시 드라이버 종료
-    exit() # 스크립트 종료
+
+
+def restore_session(driver, session):
+    """
+    저장된(또는 로그인한 브라우저에서 복사한) 쿠키와 localStorage 로 로그인 과정을 건너뜁니다.
+    에디터 URL 이 있으면 도면 에디터로, 없으면 메인 페이지로 이동
+    """
+    apply_session(driver, PLANNER_URL, session)
+    driver.get(session.get('editor_url') or PLANNER_URL)
+
+
+def _editor_state(driver):
+    """에디터가 열렸으면 'ready', 로그인 화면으로 넘어갔으면 'login', 아직 로딩 중이면 False"""
+    if driver.find_elements(By.XPATH, FURNITURE_MENU_BUTTON):
+        return 'ready'
+    if 'kakao.com' in driver.current_url or driver.find_elements(By.CSS_SELECTOR, KAKAO_LOGIN_MARKER):
+        return 'login'
+    return False
+
+
+@metrics.timed('session_restore')
+def open_saved_editor(driver, session):
+    """저장된 세션으로 도면 에디터의 가구 메뉴까지 바로 이동. 세션이 만료됐으면 False"""
+    if not session.get('editor_url'):
+        return False
+    restore_session(driver, session)
+    try:
+        state = wait_for(driver, _editor_state, '저장된 세션으로 에디터 열기', WAIT_TIMEOUTS['step'])
+    except TimeoutException:
+        state = 'timeout'
+    if state != 'ready':
+        metrics.inc('session_restore', result='expired')
+        return False
+    open_furniture_panel(driver)
+    metrics.inc('session_restore', result='ok')
+    return True
+
+
+def start_session(driver, session_store=None):
+    """
+    저장된 세션이 유효하면 에디터로 바로, 아니면 로그인부터 가구 라이브러리까지 이동하고 세션을 저장합니다.
+    작업자 브라우저에 복사할 세션 dict 반환
+    """
+    session = session_store.load() if session_store else None
+    if session:
+        if open_saved_editor(driver, session):
+            print("저장된 로그인 세션으로 가구 라이브러리를 열었습니다. (로그인 생략)")
+            # 서버가 쿠키를 갱신했을 수 있으므로 다시 저장
+            session = capture_session(driver, session['editor_url'])
+            session_store.save(session)
+            return session
+        print("저장된 로그인 세션이 만료되어 다시 로그인합니다.")
+        clear_session(driver)
+
+    if not KAKAO_ID or not KAKAO_PW:
+        raise RuntimeError(".env.local 파일에서 카카오 아이디 또는 비밀번호를 찾을 수 없습니다.")
+    login(driver)
+    open_furniture_library(driver)
+    # 가구 메뉴까지 연 에디터 주소 - 다음 실행에서는 프로젝트 생성 화면 없이 바로 이 주소로 이동
+    session = capture_session(driver, driver.current_url)
+    if session_store:
+        session_store.save(session)
+        print(f"로그인 세션을 저장했습니다: {session_store.path}")
+    return session
+
 
 # --- 3. 가구 라이브러리 페이지로 이동 ---
-try:
+def open_furniture_library(driver):
+    """로그인된 메인 페이지에서 새 프로젝트 -> 빈 도면 -> 가구 메뉴까지 이동"""
     print("가구 라이브러리 페이지로 이동을 시작합니다.")
     # Continue 버튼 (있을 경우)
     try:
-        driver.find_element(By.XPATH, '//*[@id="mArticle"]/div/div[2]/form/button').click()
-        time.sleep(1)
-    except:
+        click_when_ready(driver, By.XPATH, '//*[@id="mArticle"]/div/div[2]/form/button',
+                         'Continue 버튼', WAIT_TIMEOUTS['optional'])
+    except TimeoutException:
         print("'Continue' 버튼이 없어 건너뜁니다.")
 
     # 튜토리얼 닫기 (있을 경우)
+    tutorial_xpath = '//*[@id="__next"]/main/section[1]/div[2]'
     try:
-        driver.find_element(By.XPATH, '//*[@id="__next"]/main/section[1]/div[2]').click()
-        time.sleep(10) # 튜토리얼 로딩 및 사라지는 시간 대기
-    except:
+        click_when_ready(driver, By.XPATH, tutorial_xpath, '튜토리얼 팝업', WAIT_TIMEOUTS['optional'])
+        # 튜토리얼이 사라질 때까지 대기
+        wait_for(driver, EC.invisibility_of_element_located((By.XPATH, tutorial_xpath)),
+                 '튜토리얼 닫힘', WAIT_TIMEOUTS['step'])
+    except TimeoutException:
         print("튜토리얼 팝업이 없어 건너뜁니다.")
 
     # CREATE A NEW PROJECT 버튼
-    driver.find_element(By.XPATH, '//*[@id="ContentBlock"]/main/div/section[1]/div[3]/button[1]').click()
-    time.sleep(5)
+    click_when_ready(driver, By.XPATH, CREATE_PROJECT_BUTTON, 'CREATE A NEW PROJECT 버튼', WAIT_TIMEOUTS['step'])
 
     # Go to the Floor Plan Editor
-    driver.find_element(By.XPATH, '//*[@id="ContentBlock"]/main/div[2]/div/div[2]/div[1]/div[2]/section/div[2]/div[2]').click()
-    time.sleep(3)
+    click_when_ready(driver, By.XPATH, '//*[@id="ContentBlock"]/main/div[2]/div/div[2]/div[1]/div[2]/section/div[2]/div[2]',
+                     'Floor Plan Editor 버튼', WAIT_TIMEOUTS['step'])
 
     # Empty plan
-    driver.find_element(By.XPATH, '//*[@id="root"]/main[2]/section[2]/section[1]/div[1]/div[2]').click()
-    time.sleep(2)
+    click_when_ready(driver, By.XPATH, '//*[@id="root"]/main[2]/section[2]/section[1]/div[1]/div[2]',
+                     'Empty plan 버튼', WAIT_TIMEOUTS['step'])
 
-    # 가구 메뉴 버튼 클릭
-    driver.find_element(By.XPATH, '//*[@id="root"]/section/div[1]/nav/button[6]').click()
+    open_furniture_panel(driver)
     print("가구 라이브러리 페이지에 도착했습니다.")
-    time.sleep(1)
-except Exception as e:
-    print(f"페이지 이동 중 오류가 발생했습니다: {e}")
-    driver.quit()
-    exit()
+
+
+def open_furniture_panel(driver):
+    """도면 에디터에서 가구 메뉴를 열고 카테고리 목록이 나타날 때까지 대기"""
+    click_when_ready(driver, By.XPATH, FURNITURE_MENU_BUTTON, '가구 메뉴 버튼', WAIT_TIMEOUTS['step'])
+    wait_for(driver, EC.presence_of_element_located((By.XPATH, CATEGORY_XPATH.format(index=1))),
+             '가구 카테고리 목록', WAIT_TIMEOUTS['step'])
+
 
 # --- 4. 가구 데이터 수집 (크롤링) ---
-result = []
-# 각 카테고리 ID 
-furnitures_category = [0, 1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 11, 12]
+@metrics.timed('popup_extract')
+def extract_popup_item(driver, tile, z, stats):
+    """가구 타일을 클릭해 팝업에서 정보를 읽고 팝업을 닫은 뒤 dict 로 반환"""
+    # 가구 아이템 클릭
+    tile.click()
 
-print("가구 데이터 수집을 시작합니다.")
-######################################################
-# 원하는 가구 카테고리 번호를 여기서 지정하시면 됩니다.
-# 0 = chairs , 1 = Lighting
-# 2 = Storage , 3 = Tables
-# 4 = Decor , 5 = Bathroom
-# 6 = Kitchen , 7 = Appliances
-# 8 = Sofas, 9 = Construction
-# 10 = Bedroom , 11 = Outdoor
-# 12 = Home Decor
-tables_category_index = 5
-######################################################
+    # 팝업이 뜰 때까지 대기 후 이미지 src 가져오기
+    popup_start = time.monotonic()
+    img_element = wait_for(driver, EC.visibility_of_element_located((By.XPATH, POPUP_IMG_XPATH)),
+                           '가구 팝업', WAIT_TIMEOUTS['item'], log=False)
+    stats['popup_wait'] += time.monotonic() - popup_start
+    img_src = img_element.get_attribute('src')
 
-# 특정 카테고리만 순회
-for z in [tables_category_index]:
-    try:
-        print(f"카테고리 {z+1}/{len(furnitures_category)} 수집 중...")
-        # z번째 카테고리 클릭
-        driver.find_element(By.XPATH, f'//*[@id="root"]/section/div[1]/div[1]/div/section/aside/div/section/div[{z+1}]').click()
-        time.sleep(1) # 카테고리 내 가구 로딩 대기
-
-
-        # 필요시 스크롤 다운
-        # from selenium.webdriver.support.ui import WebDriverWait
-        # from selenium.webdriver.support import expected_conditions as EC
-        # 스크롤 대상 요소 대기 & 획득
-        # scroll_container = WebDriverWait(driver, 10).until(
-        #     EC.presence_of_element_located((
-        #         By.XPATH,
-        #         # aside 패널 ↓ 내부의 리스트 컨테이너 ↓ 그 안의 overflow:auto div
-        #         "//aside[contains(@class,'AsidePanel__Panel')]"
-        #         "//section[contains(@class,'LibraryItemList2__Container')]"
-        #         "//div[contains(@style,'overflow') and contains(@style,'auto')]"
-        #     ))
-        # )
-
-        # 이 예제에서는 각 카테고리별로 일부만 가져오도록 범위를 작게 설정 (필요시 range 수정)
-        for i in range(1, 11): # 행 (10행까지)
-            for j in range(1, 3): # 열 (2열까지)
+    # 팝업 정보 가져오기
+    popup_info = driver.find_element(By.XPATH, POPUP_INFO_XPATH)
+    info_data = popup_info.text.split('\n')
+
+    # 정보 파싱 - 팝업 텍스트 구조 파악
+    name = info_data[0] if len(info_data) > 0 else ''
+    brand = ''
+    dimensions = ''
+
+    # 치수 정보 찾기 (W:숫자 x D:숫자 x H:숫자 등 - dimension_parser.looks_like_dimensions)
+    for line in info_data[1:]:  # 첫 번째 줄(이름) 제외
+        if looks_like_dimensions(line):
+            dimensions = line
+        elif not dimensions and line.strip():  # 치수가 아닌 첫 번째 텍스트를 브랜드로
+            brand = line
+
+    # 치수는 mm 로 변환, 못 읽은 축은 NOT NULL 제약조건 때문에 0 으로 저장하고 상태만 집계
+    parsed = parse_dimensions(dimensions)
+    stats['dim_status'][parsed['dim_status']] += 1
+    metrics.inc('dim_status', status=parsed['dim_status'])
+    if parsed['dim_status'] != 'ok':
+        print(f"  치수 파싱 {parsed['dim_status']}: {name} ({dimensions!r})")
+
+    item = {
+        'name': name,
+        'description': None,
+        'length_x': parsed['length_x'] or 0,
+        'length_y': parsed['length_y'] or 0,
+        'length_z': parsed['length_z'] or 0,
+        'image_url': img_src,
+        'model_url': None,
+        'price': None,
+        'brand': brand,
+        'is_active': False,
+        'category_id': furnitures_category[z],
+    }
+
+    # 팝업 닫기 (ESC 키) - 다음 아이템 클릭을 가리지 않도록 닫힐 때까지 대기
+    driver.find_element(By.TAG_NAME, 'body').send_keys(Keys.ESCAPE)
+    popup_start = time.monotonic()
+    wait_for(driver, EC.invisibility_of_element_located((By.XPATH, POPUP_IMG_XPATH)),
+             '가구 팝업 닫힘', WAIT_TIMEOUTS['item'], log=False)
+    stats['popup_wait'] += time.monotonic() - popup_start
+    return item
+
+
+def _tile_key(tile):
+    """가상 스크롤 목록은 DOM 노드를 재사용하므로, 노드가 아닌 내용(썸네일 주소 + 텍스트)으로 아이템 구분"""
+    return tile.get_attribute('data-key') or (
+        (tile.get_attribute('innerText') or '').strip() + '|' +
+        ' '.join(img.get_attribute('src') or '' for img in tile.find_elements(By.TAG_NAME, 'img'))
+    )
+
+
+def scroll_list(driver, scroll_container, to=None):
+    """
+    가구 목록을 한 화면(80%)만큼 (to 를 주면 그 위치로) 내림.
+    (더 내려갈 곳이 없는지, 현재 스크롤 위치) 반환
+    """
+    top, new_top = driver.execute_script(
+        "const el = arguments[0];"
+        "const top = el.scrollTop;"
+        "el.scrollTop = arguments[1] === null ? top + el.clientHeight * 0.8 : arguments[1];"
+        "return [top, el.scrollTop];",
+        scroll_container, to
+    )
+    return top == new_top, new_top
+
+
+def open_category(driver, z):
+    """z번째 카테고리를 열고 가구 목록 스크롤 영역 반환"""
+    # z번째 카테고리 클릭
+    click_when_ready(driver, By.XPATH, CATEGORY_XPATH.format(index=z+1),
+                     f'카테고리 {z} 버튼', WAIT_TIMEOUTS['step'])
+    # 카테고리 내 첫 가구가 나타날 때까지 대기
+    wait_for(driver, EC.presence_of_element_located((By.XPATH, ITEM_XPATH.format(row=1, col=1))),
+             f'카테고리 {z} 가구 목록', WAIT_TIMEOUTS['step'])
+
+    # 스크롤 대상 요소 대기 & 획득
+    return wait_for(driver, EC.presence_of_element_located((By.XPATH, SCROLL_CONTAINER_XPATH)),
+                    f'카테고리 {z} 스크롤 영역', WAIT_TIMEOUTS['step'])
+
+
+def iter_category_items(driver, z, max_items=None, max_idle_scrolls=3, checkpoint=None, failures=None,
+                        max_attempts=2):
+    """
+    z번째 카테고리의 가구를 목록을 스크롤하면서 하나씩 yield 합니다.
+    이미 연 아이템은 다시 열지 않고, 스크롤해도 새 아이템이 max_idle_scrolls 번 연속 안 나오면 종료합니다.
+    checkpoint 를 주면 마지막 스크롤 위치부터 시작하고, 그 근처에서 최근에 저장된 아이템은 건너뜁니다.
+    팝업을 읽지 못한 아이템은 다시 보일 때 max_attempts 번까지 시도하고,
+    끝까지 못 읽은 아이템 키는 failures(list)에 추가합니다. (카테고리를 완료로 표시하지 않도록)
+    """
+    print(f"카테고리 {z+1}/{len(furnitures_category)} 수집 중...")
+    scroll_container = open_category(driver, z)
+
+    stats = {'popup_wait': 0.0, 'dim_status': Counter()}
+    seen = checkpoint.seen_keys(z) if checkpoint else set()
+    scroll_top = 0
+    if checkpoint and checkpoint.scroll_top(z):
+        _, scroll_top = scroll_list(driver, scroll_container, to=checkpoint.scroll_top(z))
+        print(f"  카테고리 {z}: 스크롤 위치 {scroll_top} 부터 이어서 수집")
+    idle_scrolls = 0
+    count = 0
+    # 팝업을 읽지 못한 아이템별 시도 횟수 (성공하면 seen 으로 옮겨감)
+    attempts = Counter()
+    while True:
+        new_found = False
+        for tile in driver.find_elements(By.XPATH, ITEM_TILES_XPATH):
+            try:
+                key = _tile_key(tile)
+            except Exception:
+                # 스크롤 중 사라진 노드 - 다시 그려지면 그때 처리
+                continue
+            if key in seen or attempts[key] >= max_attempts:
+                continue
+            new_found = True
+            try:
+                item = extract_popup_item(driver, tile, z, stats)
+            except Exception as e:
+                attempts[key] += 1
+                metrics.inc('item_failed', category=z)
+                print(f"  아이템 팝업 읽기 실패 ({attempts[key]}/{max_attempts}회): {key[:40]!r} - {e}")
                 try:
-                    # 가구 아이템 클릭
-                    item_xpath = f'//*[@id="root"]/section/div[1]/div[1]/div/section/aside/section/div/div[3]/div[{i}]/div[{j}]/div/div[1]/div[3]'
-                    driver.find_element(By.XPATH, item_xpath).click()
-                    time.sleep(0.5)
-                    
-                    # 이미지 src 가져오기
-                    img_element = driver.find_element(By.XPATH, '//*[@id="root"]/div[5]/section[1]/img')
-                    img_src = img_element.get_attribute('src')
-                    
-                    # 팝업 정보 가져오기
-                    popup_info = driver.find_element(By.XPATH, '//*[@id="root"]/div[5]/div')
-                    info_data = popup_info.text.split('\n')
-                    
-                    # 정보 파싱 - 팝업 텍스트 구조 파악
-                    name = info_data[0] if len(info_data) > 0 else ''
-                    brand = ''
-                    dimensions = ''
-                    
-                    # 치수 정보 찾기 (W:숫자 x D:숫자 x H:숫자 패턴)
-                    for line in info_data[1:]:  # 첫 번째 줄(이름) 제외
-                        if 'x' in line and ('W:' in line or 'D:' in line or 'H:' in line):
-                            dimensions = line
-                        elif not dimensions and line.strip():  # 치수가 아닌 첫 번째 텍스트를 브랜드로
-                            brand = line
-                    
-                    w, h, d = None, None, None
-                    if 'x' in dimensions:
-                        # "W:535 x D:612 x H:1660 (mm)" 형태에서 치수 추출
-                        parts = dimensions.replace('(mm)', '').replace('mm', '').split('x')
-                        if len(parts) == 3:
-                            try:
-                                for part in parts:
-                                    part = part.strip()
-                                    if 'W:' in part:
-                                        w = int(part.split(':')[1].strip())
-                                    elif 'D:' in part:
-                                        d = int(part.split(':')[1].strip())  
-                                    elif 'H:' in part:
-                                        h = int(part.split(':')[1].strip())
-                            except (ValueError, IndexError):
-                                w, h, d = None, None, None
-                    
-                    # NOT NULL 제약조건 때문에 0으로 설정 (치수 없는 경우)
-                    if w is None: w = 0
-                    if h is None: h = 0  
-                    if d is None: d = 0
-                    
-                    result.append({
-                        'name': name,
-                        'description': None,
-                        'length_x': w,
-                        'length_y': h,
-                        'length_z': d,
-                        'image_url': img_src,
-                        'model_url': None,
-                        'price': None,
-                        'brand': brand,
-                        'is_active': False,
-                        'category_id': furnitures_category[z],
-                    })
-                    
-                    # 팝업 닫기 (ESC 키)
                     driver.find_element(By.TAG_NAME, 'body').send_keys(Keys.ESCAPE)
-                except Exception as e:
-                    # print(f'  - 가구 아이템 (행:{i}, 열:{j})을 찾을 수 없거나 처리 중 오류 발생.')
-                    continue # 해당 아이템을 찾을 수 없으면 다음으로 넘어감
+                except Exception:
+                    pass
+                continue
+            seen.add(key)
+            # 체크포인트용 값 (DB 에는 저장되지 않음)
+            item.update({'_category': z, '_key': key, '_scroll_top': scroll_top})
+            yield item
+            count += 1
+            if max_items and count >= max_items:
+                break
+
+        if max_items and count >= max_items:
+            break
+
+        # 한 화면만큼 스크롤 후 새 아이템이 그려질 때까지 대기
+        at_bottom, scroll_top = scroll_list(driver, scroll_container)
+        if new_found:
+            idle_scrolls = 0
+        else:
+            idle_scrolls += 1
+        if (at_bottom and not new_found) or idle_scrolls >= max_idle_scrolls:
+            break
+        try:
+            wait_for(driver, lambda d: any(_tile_key(t) not in seen for t in d.find_elements(By.XPATH, ITEM_TILES_XPATH)),
+                     '스크롤 후 새 아이템', WAIT_TIMEOUTS['item'], log=False)
+        except Exception:
+            pass
+
+    failed = [key for key in attempts if key not in seen]
+    if failures is not None:
+        failures.extend(failed)
+    print(f"  카테고리 {z}: {count}개 수집 (스크롤 종료)" + (f", {len(failed)}개 읽기 실패" if failed else ""))
+    print(f"  [대기] 카테고리 {z} 가구 팝업 열기/닫기: 총 {stats['popup_wait']:.2f}초")
+    print(f"  카테고리 {z} 치수 파싱: " + ', '.join(f"{status} {n}개" for status, n in stats['dim_status'].items()))
+
+
+def iter_category_items_from_network(driver, z, max_items=None, max_idle_scrolls=3, checkpoint=None):
+    """
+    팝업을 열지 않고 z번째 카테고리 목록을 끝까지 스크롤하면서,
+    브라우저가 받은 가구 라이브러리 API 응답(JSON)에서 가구 정보를 yield 합니다.
+    create_driver(capture_network=True) 로 띄운 드라이버가 필요합니다.
+    checkpoint 를 주면 응답 순서로 앞쪽 offset 개(저장이 끝난 아이템)는 건너뜁니다.
+    """
+    print(f"카테고리 {z+1}/{len(furnitures_category)} 수집 중... (네트워크 응답 모드)")
+    # 이전 카테고리에서 쌓인 로그 비우기
+    driver.get_log('performance')
+    scroll_container = open_category(driver, z)
+
+    # 응답은 다시 받아야 하므로 처음부터 스크롤하되, 이미 저장된 앞쪽 아이템은 건너뜀
+    saved = checkpoint.seen_keys(z) if checkpoint else set()
+    skip = checkpoint.offset(z) if checkpoint else 0
+    if skip:
+        print(f"  카테고리 {z}: 저장된 앞쪽 {skip}개 건너뛰고 이어서 수집")
+    # 이번 실행에서 응답에 나온 아이템 키와 그 수 (체크포인트 offset 기준)
+    seen = set()
+    position = 0
+    dim_status = Counter()
+    idle_scrolls = 0
+    count = 0
+    # 스크롤 후 대기하면서 읽어 둔 performance 로그 (get_log 는 읽은 로그를 비우므로 모아 두었다가 처리)
+    pending_logs = []
+
+    def library_responses_loaded(d):
+        pending_logs.extend(d.get_log('performance'))
+        request_ids = library_api.library_responses(pending_logs)
+        return bool(request_ids) and set(request_ids) <= library_api.finished_requests(pending_logs)
+
+    while True:
+        new_found = False
+        logs, pending_logs[:] = pending_logs + driver.get_log('performance'), []
+        for request_id in library_api.library_responses(logs):
+            try:
+                with metrics.timer('response_body'):
+                    body = driver.execute_cdp_cmd('Network.getResponseBody', {'requestId': request_id})
+                payload = json.loads(body['body'])
+            except Exception:
+                # 이미 사라진 응답이거나 JSON 이 아니면 건너뜀
+                continue
+            for obj in library_api.find_items(payload):
+                item = library_api.to_furniture(obj, furnitures_category[z])
+                key = f"{item['name']}|{item['brand']}"
+                if not item['name'] or key in seen:
+                    continue
+                seen.add(key)
+                new_found = True
+                position += 1
+                if position <= skip or key in saved:
+                    continue
+                dim_status[item['_dim_status']] += 1
+                metrics.inc('dim_status', status=item['_dim_status'])
+                if item['_dim_status'] != 'ok':
+                    print(f"  치수 변환 {item['_dim_status']} ({item['_dim_unit']}): {item['name']}")
+                item.update({'_category': z, '_key': key, '_offset': position})
+                yield item
+                count += 1
+                if max_items and count >= max_items:
+                    break
+            if max_items and count >= max_items:
+                break
+
+        if max_items and count >= max_items:
+            break
+
+        # 다음 페이지 요청이 나가도록 스크롤
+        at_bottom, _ = scroll_list(driver, scroll_container)
+        if new_found:
+            idle_scrolls = 0
+        else:
+            idle_scrolls += 1
+        if (at_bottom and not new_found) or idle_scrolls >= max_idle_scrolls:
+            break
+        # 스크롤로 발생한 목록 API 응답을 본문까지 다 받을 때까지 대기 (요청이 없으면 item 타임아웃 후 다시 스크롤)
+        try:
+            wait_for(driver, library_responses_loaded, '스크롤 후 목록 응답', WAIT_TIMEOUTS['item'], log=False)
+        except TimeoutException:
+            pass
+
+    print(f"  카테고리 {z}: {count}개 수집 (네트워크 응답)")
+    print(f"  카테고리 {z} 치수 변환: " + ', '.join(f"{status} {n}개" for status, n in dim_status.items()))
+    if count == 0:
+        print("  가구 API 응답을 찾지 못했습니다. CRAWL_LIBRARY_API_PATTERN 을 확인하거나 --mode popup 을 사용하세요.")
+
+
+def crawl_category(driver, z, sink, max_items=None, mode='popup', checkpoint=None):
+    """
+    z번째 카테고리의 가구 정보를 수집하면서 바로 sink 로 보냄 (mode: popup 또는 network)
+    (수집 개수, 읽지 못한 아이템 수) 반환
+    """
+    failures = []
+    if mode == 'network':
+        items = iter_category_items_from_network(driver, z, max_items=max_items, checkpoint=checkpoint)
+    else:
+        items = iter_category_items(driver, z, max_items=max_items, checkpoint=checkpoint, failures=failures)
+
+    count = 0
+    for item in items:
+        sink.add(item)
+        count += 1
+        metrics.inc('items_collected', category=z, mode=mode)
+    return count, len(failures)
+
+
+def crawl_categories(driver, categories, sink, max_items=None, mode='popup', checkpoint=None):
+    """한 브라우저에서 여러 카테고리를 차례로 수집"""
+    for z in categories:
+        if checkpoint and checkpoint.is_done(z):
+            print(f"카테고리 {z} 는 이미 수집을 마쳐 건너뜁니다.")
+            continue
+        try:
+            _, failed = crawl_category(driver, z, sink, max_items=max_items, mode=mode, checkpoint=checkpoint)
+            # 남은 아이템까지 저장한 뒤에 완료 표시 (읽거나 저장하지 못한 가구가 있으면 --resume 때 다시 수집)
+            sink.flush()
+            if failed:
+                print(f"카테고리 {z}: 읽지 못한 가구 {failed}개가 있어 완료로 표시하지 않습니다.")
+            elif z in sink.unsaved_categories():
+                print(f"카테고리 {z}: 저장하지 못한 가구가 있어 완료로 표시하지 않습니다.")
+            elif checkpoint:
+                checkpoint.mark_done(z)
+        except SinkFlushError:
+            # DB 에 계속 저장하지 못하면 다음 카테고리로 넘어가지 않고 중단
+            raise
+        except Exception as e:
+            print(f'카테고리 {z} 처리 중 오류: {e}')
+            continue
+
+
+class CrawlStartError(Exception):
+    """로그인 또는 가구 라이브러리 이동에 실패해서 수집을 시작하지 못함"""
+
+
+def crawl_worker(worker_id, category_queue, session, sink, driver=None, max_items=None, mode='popup', checkpoint=None):
+    """
+    브라우저 하나를 맡아 category_queue 가 빌 때까지 카테고리를 꺼내 수집합니다.
+    driver 를 주지 않으면 새 브라우저를 띄우고 로그인 세션을 복사해서 시작합니다.
+    """
+    try:
+        if driver is None:
+            driver = create_driver(capture_network=(mode == 'network'))
+            if not open_saved_editor(driver, session):
+                restore_session(driver, dict(session, editor_url=None))
+                open_furniture_library(driver)
+
+        while True:
+            try:
+                z = category_queue.get_nowait()
+            except queue.Empty:
+                break
+            print(f"[브라우저 {worker_id}] 카테고리 {z} 담당")
+            crawl_categories(driver, [z], sink, max_items=max_items, mode=mode, checkpoint=checkpoint)
+    except SinkFlushError:
+        # DB 저장이 멈췄으면 다른 브라우저도 계속할 수 없으므로 crawl() 까지 전달
+        raise
     except Exception as e:
-        print(f'카테고리 {z} 처리 중 오류: {e}')
-        continue
+        print(f"[브라우저 {worker_id}] 오류로 중단합니다: {e}")
+    finally:
+        if driver is not None:
+            driver.quit()
 
-# 크롤링이 끝나면 드라이버 종료
-driver.quit()
 
-# --- 5. 수집된 데이터 확인 및 데이터베이스에 저장 ---
-# 수집한 데이터를 DataFrame으로 변환
-df = pd.DataFrame(result)
-print(f'총 {len(df)}개 가구 수집 완료.')
+def crawl(categories, sink, workers=1, max_items=None, mode='popup', checkpoint=None, session_store=None):
+    """
+    로그인은 한 번만 하고, 카테고리를 workers 개 브라우저에 나눠서 동시에 수집
+    session_store: browser_session.SessionStore - 저장된 로그인 세션 재사용 (None 이면 매번 로그인)
+    로그인 / 페이지 이동에 실패하면 CrawlStartError
+    """
+    if checkpoint:
+        categories = [z for z in categories if not checkpoint.is_done(z)]
+        if not categories:
+            print("체크포인트 기준으로 모든 카테고리 수집이 끝났습니다.")
+            return
 
-# 데이터베이스에 연결하기 전, 수집된 데이터가 있는지 확인
-if not df.empty:
+    driver = create_driver(capture_network=(mode == 'network'))
     try:
-        # --- 데이터베이스 연결 설정 ---
-        db_config = {
-            'host': 'wheretoput-db.chwouasus83g.ap-northeast-2.rds.amazonaws.com',
-            'database': 'wheretoput_db',
-            'user': 'wheretoput_admin',
-            'password': 'trustyourdata',
-            'port': '5432'
-        }
-        engine = create_engine(
-            f"postgresql://{db_config['user']}:{db_config['password']}@{db_config['host']}:{db_config['port']}/{db_config['database']}"
-        )
-
-        # 1. 데이터베이스에서 기존 가구 이름들을 모두 가져오기
-        print("데이터베이스에서 기존 가구 목록을 조회합니다...")
+        session = start_session(driver, session_store)
+    except Exception as e:
+        driver.quit() # 오류 발생 시 드라이버 종료
+        raise CrawlStartError(f"로그인/페이지 이동 중 오류가 발생했습니다: {e}") from e
+
+    print("가구 데이터 수집을 시작합니다.")
+    workers = max(1, min(workers, len(categories)))
+    if workers == 1:
         try:
-            existing_furnitures_df = pd.read_sql_query('SELECT name FROM furniture.furnitures', engine)
-            existing_names = set(existing_furnitures_df['name'])
-            print(f"기존 가구 {len(existing_names)}개를 확인했습니다.")
-        except Exception:
-            # 테이블이 없는 최초 실행일 경우, 빈 set으로 시작
-            existing_names = set()
-            print("기존 'furnitures' 테이블이 없어, 모든 수집 데이터를 신규로 처리합니다.")
-
-        # 2. 수집한 데이터(df)에서 기존 이름에 없는 새로운 가구만 필터링
-        new_furnitures_df = df[~df['name'].isin(existing_names)]
-
-        # 3. 새로운 가구가 있을 경우에만 데이터베이스에 삽입
-        if not new_furnitures_df.empty:
-            print(f'신규 가구 {len(new_furnitures_df)}개를 데이터베이스에 추가합니다.')
-            
-            # 추가되는 가구 이름들을 로그로 출력
-            print("추가되는 가구 목록:")
-            for idx, name in enumerate(new_furnitures_df['name'], 1):
-                print(f"  {idx}. {name}")
-            
-            new_furnitures_df.to_sql(
-                'furnitures', 
-                engine, 
-                if_exists='append', 
-                index=False, 
-                schema='furniture'
-            )
-            print('PostgreSQL에 새로운 데이터 삽입 완료!')
-        else:
-            print('추가할 새로운 가구가 없습니다.')
+            crawl_categories(driver, categories, sink, max_items=max_items, mode=mode, checkpoint=checkpoint)
+        finally:
+            # 크롤링이 끝나거나 오류 / Ctrl-C 로 멈춰도 드라이버 종료
+            driver.quit()
+        return
+
+    category_queue = queue.Queue()
+    for z in categories:
+        category_queue.put(z)
+
+    # 로그인한 브라우저는 첫 번째 작업자로 그대로 사용
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(crawl_worker, 1, category_queue, session, sink, driver,
+                                   max_items, mode, checkpoint)]
+        futures += [
+            executor.submit(crawl_worker, worker_id, category_queue, session, sink, None,
+                            max_items, mode, checkpoint)
+            for worker_id in range(2, workers + 1)
+        ]
+        for future in futures:
+            future.result()
+
+
+# --- 5. 데이터베이스 연결 ---
+def create_db_engine():
+    # --- 데이터베이스 연결 설정 ---
+    db_config = {
+        'host': 'wheretoput-db.chwouasus83g.ap-northeast-2.rds.amazonaws.com',
+        'database': 'wheretoput_db',
+        'user': 'wheretoput_admin',
+        'password': 'trustyourdata',
+        'port': '5432'
+    }
+    return create_engine(
+        f"postgresql://{db_config['user']}:{db_config['password']}@{db_config['host']}:{db_config['port']}/{db_config['database']}"
+    )
 
+
+def main():
+    parser = argparse.ArgumentParser(description="Archisketch 가구 라이브러리 크롤러")
+    parser.add_argument('--categories', type=parse_categories, default=[tables_category_index],
+                        help="크롤링할 카테고리 번호. 예) 5, 0,3,8, 0-12 (기본: %(default)s)")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="동시에 띄울 브라우저 수 (기본: 1)")
+    parser.add_argument('--max-items', type=int, default=None,
+                        help="카테고리당 최대 수집 개수 (기본: 목록 끝까지 스크롤)")
+    parser.add_argument('--mode', choices=['popup', 'network'], default='popup',
+                        help="popup: 가구 팝업을 하나씩 열어서 수집, "
+                             "network: 목록 API 응답(JSON)에서 바로 수집 (기본: popup)")
+    parser.add_argument('--batch-size', type=int, default=50,
+                        help="몇 개씩 모아서 DB 에 저장할지 (기본: 50)")
+    parser.add_argument('--update-existing', action='store_true',
+                        help="이미 있는 가구(같은 이름)는 새로 수집한 브랜드/이미지/치수로 갱신 (기본: 건너뜀)")
+    parser.add_argument('--resume', action='store_true',
+                        help="지난번 중단된 지점(체크포인트)부터 이어서 수집")
+    parser.add_argument('--session-file', default=DEFAULT_SESSION_PATH,
+                        help="로그인 세션 저장 파일 (기본: %(default)s)")
+    parser.add_argument('--fresh-login', action='store_true',
+                        help="저장된 로그인 세션을 쓰지 않고 카카오 로그인부터 진행 (새 세션은 다시 저장)")
+    args = parser.parse_args()
+
+    session_store = SessionStore(args.session_file)
+    if args.fresh_login:
+        session_store.clear()
+
+    # 저장된 세션이 없으면 로그인해야 하므로 환경 변수가 제대로 로드되었는지 확인
+    if (not KAKAO_ID or not KAKAO_PW) and session_store.load() is None:
+        print("오류: .env.local 파일에서 카카오 아이디 또는 비밀번호를 찾을 수 없습니다.")
+        print("파일 경로와 내용을 다시 확인해주세요.")
+        exit()
+
+    print(f"카테고리 {args.categories} 를 브라우저 {args.workers}개로 수집합니다.")
+    # 수집하는 대로 batch_size 개씩 DB 에 저장하고, 저장된 지점을 체크포인트에 기록
+    checkpoint = CrawlCheckpoint(resume=args.resume)
+    failed = False
+    try:
+        with FurnitureSink(create_db_engine(), batch_size=args.batch_size, checkpoint=checkpoint,
+                           on_conflict='update' if args.update_existing else 'nothing') as sink:
+            crawl(args.categories, sink, args.workers, args.max_items, args.mode, checkpoint, session_store)
+    except CrawlStartError as e:
+        failed = True
+        print(f"수집을 시작하지 못했습니다. {e}")
     except Exception as e:
+        failed = True
         print("데이터베이스 작업 중 오류가 발생했습니다.")
         print(traceback.format_exc()) # 자세한 오류 내용 출력
-else:
-    print("수집된 가구가 없어 데이터베이스 작업을 건너뜁니다.")
+    else:
+        print(f'총 {sink.collected_count}개 가구 수집, 신규 {sink.inserted_count}개 저장, '
+              f'{sink.updated_count}개 갱신 (중복 {sink.skipped_count}개 건너뜀).')
+    # 단계별 소요 시간 (로그인, 드라이버 시작, 팝업 수집, DB 저장 등)
+    metrics.METRICS.print_summary()
+    metrics.dump_metrics()
+
+    if failed:
+        print("오류로 작업을 마치지 못했습니다.")
+        exit(1)
+    print("모든 작업을 마쳤습니다.")
+
 
-print("모든 작업을 마쳤습니다.")
\ No newline at end of file
+if __name__ == "__main__":
+    main()
@@ -1,15 +1,26 @@
 from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException
 import pandas as pd
-import time
-from sqlalchemy import create_engine, text
+import numpy as np
+from sqlalchemy import create_engine
 import traceback
-import urllib.parse
+import functools
+import time
 import re
-import random
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, wait
+from driver_pool import WebDriverPool
+from price_cache import PriceCache, DEFAULT_CACHE_PATH
+from furniture_db import BatchPriceWriter, count_furnitures, iter_furniture_chunks
+from price_refresh import RefreshAttemptLog, RefreshScheduler
+from marketplaces import MARKETPLACES, BotDetected, create_http_session
+from site_health import CLOSED, SiteHealth
+from price_engine import CACHEABLE_OUTCOMES, PriceCrawlEngine, RateLimitError
+from query_normalizer import normalize_query
+import metrics
+from lean_browser import (LeanBrowsingStats, apply_lean_options, set_request_blocking,
+                          set_cache_disabled, reset_page_log, page_load_report)
 # 현재 실제 쇼핑몰 크롤링은 안됩니다! 
 # 랜덤 가격 생성시 첫 세자리는 반올림됩니다.
 # 카테고리별 랜덤가격 범위:
@@ -28,9 +39,78 @@ import random
 # 11= Outdoor(야외): 100,000원 ~ 400,000원
 # 12= Home Decor(홈데코): 30,000원 ~ 200,000원
 
+# 카테고리별 랜덤가격 범위 (천원 단위)
+CATEGORY_PRICE_RANGES = {
+    0: (50, 300),
+    1: (30, 200),
+    2: (100, 400),
+    3: (150, 500),
+    4: (20, 150),
+    5: (50, 300),
+    6: (100, 600),
+    7: (200, 1000),
+    8: (200, 800),
+    9: (50, 500),
+    10: (300, 1000),
+    11: (100, 400),
+    12: (30, 200),
+}
+# 이름 키워드별 랜덤가격 범위 (천원 단위) - 위에서부터 먼저 일치하는 것 사용, 카테고리보다 우선
+KEYWORD_PRICE_RANGES = [
+    (re.compile(r'소파|sofa', re.IGNORECASE), (200, 800)),
+    (re.compile(r'침대|bed', re.IGNORECASE), (300, 1000)),
+    (re.compile(r'식탁|table|테이블', re.IGNORECASE), (150, 500)),
+    (re.compile(r'의자|chair', re.IGNORECASE), (50, 300)),
+    (re.compile(r'책상|desk', re.IGNORECASE), (100, 400)),
+    (re.compile(r'조명|light|lamp', re.IGNORECASE), (30, 200)),
+]
+# 키워드도 카테고리도 해당하지 않을 때
+DEFAULT_PRICE_RANGE = (50, 300)
+
+
+def assign_random_prices(furnitures_df, seed=None):
+    """
+    furnitures_df(name, category_id 컬럼) 전체에 한 번에 랜덤 가격을 뽑아 Series 로 반환 (천원 단위로 반올림)
+    이름 키워드 -> category_id -> 기본 범위 순으로 가격 범위를 정합니다.
+    seed 를 주면 같은 입력에 항상 같은 가격이 나옵니다. (numpy Generator 를 주면 이어서 뽑음 - 여러 묶음에 나눠 쓸 때)
+    """
+    low = np.full(len(furnitures_df), DEFAULT_PRICE_RANGE[0], dtype=np.int64)
+    high = np.full(len(furnitures_df), DEFAULT_PRICE_RANGE[1], dtype=np.int64)
+
+    # 카테고리 범위 적용
+    if 'category_id' in furnitures_df:
+        category_ids = furnitures_df['category_id'].to_numpy()
+        for category_id, (category_low, category_high) in CATEGORY_PRICE_RANGES.items():
+            matched = category_ids == category_id
+            low[matched] = category_low
+            high[matched] = category_high
+
+    # 키워드 범위 적용 (먼저 나온 키워드가 우선이므로 뒤에서부터 덮어씀)
+    names = furnitures_df['name'].fillna('')
+    for pattern, (keyword_low, keyword_high) in reversed(KEYWORD_PRICE_RANGES):
+        matched = names.str.contains(pattern).to_numpy()
+        low[matched] = keyword_low
+        high[matched] = keyword_high
+
+    rng = np.random.default_rng(seed)
+    prices = rng.integers(low, high + 1) * 1000
+    return pd.Series(prices, index=furnitures_df.index, name='price')
+
 
 class FurniturePriceCrawler:
-    def __init__(self):
+    def __init__(self, pool_size=1, max_pages_per_driver=50, concurrent=False, item_deadline=60,
+                 cache_path=DEFAULT_CACHE_PATH, cache_ttl=7 * 24 * 3600, sites=None, max_in_flight=None,
+                 lean_browsing=True, rate_share=1.0):
+        """
+        sites: 검색할 쇼핑몰 이름 목록 (None 이면 marketplaces.py 에 등록된 전체)
+        concurrent=True 이면 쇼핑몰들을 동시에 검색하고, 가구도 max_in_flight 개씩 동시에 검색합니다.
+        요청 속도는 쇼핑몰별 토큰 버킷(marketplaces.py 의 rate, burst)으로 제한합니다.
+        item_deadline: 동시 검색 시 가구 하나당 최대 대기 시간(초)
+        cache_path: 가격 검색 결과 캐시 파일 (None 이면 캐시 사용 안 함)
+        cache_ttl: 캐시 유효 기간(초)
+        lean_browsing: 크롬에서 이미지/폰트/광고를 받지 않고, 쇼핑몰별 절약량을 집계합니다
+        rate_share: 이 프로세스가 쓸 요청 속도 비율 - 작업자 N 개로 나눠 돌리면 1/N (쇼핑몰 전체 요청 수 유지)
+        """
         self.db_config = {
             'host': 'wheretoput-db.chwouasus83g.ap-northeast-2.rds.amazonaws.com',
             'database': 'wheretoput_db',
@@ -41,234 +121,188 @@ class FurniturePriceCrawler:
         self.engine = create_engine(
             f"postgresql://{self.db_config['user']}:{self.db_config['password']}@{self.db_config['host']}:{self.db_config['port']}/{self.db_config['database']}"
         )
-        
-    def optimize_search_query(self, furniture_name):
-        """검색어 최적화 - 불필요한 단어 제거 및 핵심 키워드 추출"""
-        # 제거할 단어들 (괄호 내용, 색상, 상태 등)
-        remove_patterns = [
-            r'\([^)]*\)',  # 괄호와 괄호 내용
-            r'그레이|화이트|블랙|브라운|베이지',  # 색상
-            r'펼친상태|접힌상태|완성품',  # 상태
-            r'cm|mm|\d+x\d+',  # 크기 정보
+        # 가격 검색에 사용할 쇼핑몰 (marketplaces.py 에 등록된 순서, 네이버 쇼핑 우선)
+        adapters = [MARKETPLACES[site] for site in sites] if sites else list(MARKETPLACES.values())
+        self.adapters = adapters
+        self.marketplaces = [
+            (adapter.name, functools.partial(self.lookup_marketplace, adapter))
+            for adapter in adapters
         ]
+        # 쇼핑몰별 요청 속도 제한 (초당 요청 수, 연속 요청 허용량) - 과도한 요청 방지
+        # 버킷은 1 토큰씩 쓰므로 burst 는 1 보다 작아지지 않게
+        self.rate_limits = {
+            adapter.name: (adapter.rate * rate_share, max(1, adapter.burst * rate_share))
+            for adapter in adapters
+        }
+        # JS 가 필요 없는 쇼핑몰은 크롬 없이 HTTP 로 먼저 검색 (연결 재사용)
+        self.http_session = create_http_session(pool_size=len(adapters))
+        self.fetch_stats = {'html': 0, 'browser': 0}
+        # 쇼핑몰별 실패율 / 로드 시간 - 막힌 쇼핑몰은 잠시 건너뛰고, 타임아웃은 측정값으로 조정
+        self.site_health = {adapter.name: SiteHealth(adapter.name) for adapter in adapters}
+        self.lean_browsing = lean_browsing
+        self.page_stats = LeanBrowsingStats() if lean_browsing else None
+
+        self.price_cache = PriceCache(cache_path, ttl=cache_ttl) if cache_path else None
+
+        self.concurrent = concurrent
+        if max_in_flight is None:
+            max_in_flight = 2 if concurrent else 1
+        if concurrent:
+            pool_size = max(pool_size, len(self.marketplaces))
+        self.price_engine = PriceCrawlEngine(
+            self.marketplaces,
+            self.rate_limits,
+            price_cache=self.price_cache,
+            max_in_flight=max_in_flight,
+            parallel_sites=concurrent,
+            item_deadline=item_deadline,
+            site_health=self.site_health
+        )
+
+        # 크롬은 풀에서 빌려 쓰고, max_pages_per_driver 페이지마다 새로 띄웁니다
+        self.driver_pool = WebDriverPool(
+            self.setup_driver,
+            max_size=pool_size,
+            max_pages=max_pages_per_driver
+        )
+
+    def close(self):
+        """띄워 둔 크롬 드라이버 및 검색 스레드 모두 종료"""
+        self.price_engine.close()
+        self.driver_pool.close()
+        if self.http_session is not None:
+            self.http_session.close()
+        if self.price_cache:
+            self.price_cache.close()
         
-        optimized_query = furniture_name
-        for pattern in remove_patterns:
-            optimized_query = re.sub(pattern, '', optimized_query)
-        
-        # 연속된 공백 제거 및 앞뒤 공백 제거
-        optimized_query = re.sub(r'\s+', ' ', optimized_query).strip()
-        
-        # 핵심 키워드만 추출 (첫 1-2 단어)
-        words = optimized_query.split()
-        if len(words) > 2:
-            optimized_query = ' '.join(words[:2])
-        
-        return optimized_query
+    def optimize_search_query(self, furniture_name):
+        """검색어 최적화 - 불필요한 단어 제거 및 핵심 키워드 추출 (query_normalizer.normalize_query)"""
+        return normalize_query(furniture_name)
         
+    @metrics.timed('driver_startup', script='price')
     def setup_driver(self):
         chrome_options = webdriver.ChromeOptions()
         chrome_options.add_argument('--headless')  # 백그라운드 실행
         chrome_options.add_argument('--no-sandbox')
         chrome_options.add_argument('--disable-dev-shm-usage')
         chrome_options.add_argument('--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36')
-        return webdriver.Chrome(options=chrome_options)
+        if not self.lean_browsing:
+            return webdriver.Chrome(options=chrome_options)
+
+        # 이미지, 폰트, 광고 차단 + eager 로드 + 작은 창
+        driver = webdriver.Chrome(options=apply_lean_options(chrome_options))
+        set_request_blocking(driver)
+        return driver
+
+    def search_marketplace_price(self, adapter, furniture_name):
+        """쇼핑몰 어댑터로 가격 검색 - JS 가 필요 없는 쇼핑몰은 HTML 로 먼저 찾고, 못 찾으면 크롬 사용"""
+        return self.lookup_marketplace(adapter, furniture_name)[0]
+
+    def lookup_marketplace(self, adapter, furniture_name):
+        """
+        가격 엔진용 검색 함수 - (가격 또는 None, 결과) 반환
+        결과: 'ok'(가격 찾음), 'miss'(가격 없음), 'error'(오류/시간 초과), 'blocked'(봇 차단 페이지),
+              'rate_limited'(추가 요청 토큰을 받지 못해 보내지 않음 - 쇼핑몰 상태에는 기록하지 않음)
+        """
+        health = self.site_health.get(adapter.name)
+        with metrics.timer('search_price', site=adapter.name):
+            try:
+                price = self._search_marketplace(adapter, furniture_name, health)
+            except BotDetected as e:
+                print(f"{adapter.name} 봇 차단 페이지 ({furniture_name}): {e}")
+                outcome, price = 'blocked', None
+            except RateLimitError as e:
+                print(f"{adapter.name} 요청 보류 ({furniture_name}): {e}")
+                outcome, price = 'rate_limited', None
+            except Exception as e:
+                print(f"{adapter.name} 가격 검색 오류 ({furniture_name}): {e}")
+                outcome, price = 'error', None
+            else:
+                outcome = 'ok' if price else 'miss'
+        if health and outcome != 'rate_limited':
+            health.record(outcome)
+        metrics.inc('search_outcome', site=adapter.name, outcome=outcome)
+        return price, outcome
+
+    def _search_marketplace(self, adapter, furniture_name, health):
+        html_tried = False
+        if not adapter.needs_js and self.http_session is not None:
+            html_tried = True
+            try:
+                price = adapter.search_html(self.http_session, furniture_name)
+                self.fetch_stats['html'] += 1
+                if price:
+                    return price
+            except BotDetected:
+                # 차단됐으면 브라우저로 다시 시도해도 같은 결과
+                raise
+            except Exception as e:
+                print(f"{adapter.name} HTML 검색 실패, 브라우저로 다시 시도 ({furniture_name}): {e}")
+        if html_tried:
+            # 엔진이 준 토큰은 HTML 요청에 썼으므로 브라우저 요청용 토큰을 한 번 더 받음
+            self.price_engine.acquire_from_thread(adapter.name)
+
+        # 페이지 로드 시간 초과 / 차단 페이지는 쇼핑몰 문제이므로 드라이버는 정상 반납하고 블록 밖에서 다시 던짐
+        # (블록 안에서 예외가 나가면 풀이 크롬을 종료함 - WebDriver 자체 오류일 때만 그렇게 처리)
+        page_error = None
+        with self.driver_pool.driver() as driver:
+            try:
+                price = self._search_with_driver(driver, adapter, furniture_name, health)
+            except (TimeoutException, BotDetected) as e:
+                page_error = e
+        if page_error is not None:
+            raise page_error
+        return price
+
+    def _search_with_driver(self, driver, adapter, furniture_name, health):
+        self.fetch_stats['browser'] += 1
+        if not self.page_stats:
+            return adapter.search_browser(driver, furniture_name, health)
+
+        # 쇼핑몰마다 한 번은 캐시 없이 차단 없이 받아서 절약량 기준값으로 사용 (이어지는 검색도 캐시 없이 받아 비교)
+        # 기준값 요청도 토큰 / 요청 수 예산을 쓰고, 서킷이 닫혀 있을 때만 보냄
+        baseline = self.page_stats.needs_baseline(adapter.name) and (health is None or health.state == CLOSED)
+        try:
+            if baseline:
+                self.price_engine.acquire_from_thread(adapter.name)
+                self.fetch_stats['browser'] += 1
+                self.page_stats.measure_baseline(
+                    driver, adapter.name, adapter.search_url(furniture_name),
+                    wait_ready=lambda d: adapter.wait_for_price(d, adapter.selector_timeout + adapter.page_wait)
+                )
+            reset_page_log(driver)
+            price = adapter.search_browser(driver, furniture_name, health)
+            self.page_stats.record(adapter.name, page_load_report(driver), paired=baseline)
+        finally:
+            if baseline:
+                set_cache_disabled(driver, False)
+        return price
 
     def search_naver_shopping_price(self, furniture_name):
         """네이버 쇼핑에서 가구 가격 검색"""
-        try:
-            driver = self.setup_driver()
-            
-            # 네이버 쇼핑 검색 URL
-            search_query = urllib.parse.quote(furniture_name)
-            url = f"https://shopping.naver.com/search/all?query={search_query}"
-            
-            driver.get(url)
-            time.sleep(3)
-            
-            # 여러 가격 셀렉터 시도
-            price_selectors = [
-                ".price_num__S2p_v",
-                ".price",
-                ".price_area .price",
-                "[class*='price']",
-                ".product_price",
-                ".basicList_price__k_wSV"
-            ]
-            
-            for selector in price_selectors:
-                try:
-                    price_elements = WebDriverWait(driver, 5).until(
-                        EC.presence_of_all_elements_located((By.CSS_SELECTOR, selector))
-                    )
-                    if price_elements:
-                        price_text = price_elements[0].text
-                        # 숫자만 추출 (최소 3자리 숫자)
-                        price_match = re.search(r'(\d{3,})', price_text.replace(',', ''))
-                        if price_match:
-                            return int(price_match.group(1))
-                except TimeoutException:
-                    continue
-                
-            driver.quit()
-            return None
-            
-        except Exception as e:
-            print(f"네이버 쇼핑 가격 검색 오류 ({furniture_name}): {e}")
-            try:
-                driver.quit()
-            except:
-                pass
-            return None
+        return self.search_marketplace_price(MARKETPLACES['네이버 쇼핑'], furniture_name)
 
     def search_coupang_price(self, furniture_name):
         """쿠팡에서 가구 가격 검색"""
-        try:
-            driver = self.setup_driver()
-            
-            # 쿠팡 검색 URL
-            search_query = urllib.parse.quote(furniture_name)
-            url = f"https://www.coupang.com/np/search?q={search_query}"
-            
-            driver.get(url)
-            time.sleep(3)
-            
-            # 여러 가격 셀렉터 시도
-            price_selectors = [
-                ".price-value",
-                ".sale-price",
-                ".discount-price",
-                "[class*='price']",
-                ".prod-price .price-value"
-            ]
-            
-            for selector in price_selectors:
-                try:
-                    price_element = WebDriverWait(driver, 5).until(
-                        EC.presence_of_element_located((By.CSS_SELECTOR, selector))
-                    )
-                    price_text = price_element.text
-                    # 숫자만 추출 (최소 3자리 숫자)
-                    price_match = re.search(r'(\d{3,})', price_text.replace(',', ''))
-                    if price_match:
-                        return int(price_match.group(1))
-                except TimeoutException:
-                    continue
-                
-            driver.quit()
-            return None
-            
-        except Exception as e:
-            print(f"쿠팡 가격 검색 오류 ({furniture_name}): {e}")
-            try:
-                driver.quit()
-            except:
-                pass
-            return None
+        return self.search_marketplace_price(MARKETPLACES['쿠팡'], furniture_name)
 
     def search_gmarket_price(self, furniture_name):
         """G마켓에서 가구 가격 검색"""
-        try:
-            driver = self.setup_driver()
-            
-            # G마켓 검색 URL
-            search_query = urllib.parse.quote(furniture_name)
-            url = f"http://browse.gmarket.co.kr/search?keyword={search_query}"
-            
-            driver.get(url)
-            time.sleep(2)
-            
-            # 첫 번째 상품의 가격 찾기
-            try:
-                price_element = WebDriverWait(driver, 10).until(
-                    EC.presence_of_element_located((By.CSS_SELECTOR, ".s-price strong"))
-                )
-                price_text = price_element.text
-                # 숫자만 추출
-                price = re.sub(r'[^\d]', '', price_text)
-                if price:
-                    return int(price)
-            except TimeoutException:
-                pass
-                
-            driver.quit()
-            return None
-            
-        except Exception as e:
-            print(f"G마켓 가격 검색 오류 ({furniture_name}): {e}")
-            try:
-                driver.quit()
-            except:
-                pass
-            return None
+        return self.search_marketplace_price(MARKETPLACES['G마켓'], furniture_name)
 
     def search_11st_price(self, furniture_name):
         """11번가에서 가구 가격 검색"""
-        try:
-            driver = self.setup_driver()
-            
-            # 11번가 검색 URL
-            search_query = urllib.parse.quote(furniture_name)
-            url = f"https://search.11st.co.kr/Search.tmall?method=getTotalSearchSeller&isGnb=Y&kwd={search_query}"
-            
-            driver.get(url)
-            time.sleep(2)
-            
-            # 첫 번째 상품의 가격 찾기
-            try:
-                price_element = WebDriverWait(driver, 10).until(
-                    EC.presence_of_element_located((By.CSS_SELECTOR, ".sale_price"))
-                )
-                price_text = price_element.text
-                # 숫자만 추출
-                price = re.sub(r'[^\d]', '', price_text)
-                if price:
-                    return int(price)
-            except TimeoutException:
-                pass
-                
-            driver.quit()
-            return None
-            
-        except Exception as e:
-            print(f"11번가 가격 검색 오류 ({furniture_name}): {e}")
-            try:
-                driver.quit()
-            except:
-                pass
-            return None
+        return self.search_marketplace_price(MARKETPLACES['11번가'], furniture_name)
+
+    def _report_prices(self, furniture_name, optimized_name, results):
+        """쇼핑몰별 검색 결과를 출력하고 최저가 반환 (없으면 None)"""
+        print(f"'{furniture_name}' -> '{optimized_name}' 가격 검색 결과")
 
-    def get_furniture_price(self, furniture_name):
-        """여러 쇼핑몰에서 가격 검색하여 평균가 또는 최저가 반환"""
-        # 검색어 최적화
-        optimized_name = self.optimize_search_query(furniture_name)
-        print(f"'{furniture_name}' -> '{optimized_name}' 가격 검색 중...")
-        
         prices = []
-        
-        # 네이버 쇼핑에서 검색 (우선 순위 높음)
-        naver_price = self.search_naver_shopping_price(optimized_name)
-        if naver_price:
-            prices.append(naver_price)
-            print(f"  - 네이버 쇼핑: {naver_price:,}원")
-        
-        # 딜레이 추가 (과도한 요청 방지)
-        time.sleep(random.uniform(2, 4))
-        
-        # 쿠팡에서 검색
-        coupang_price = self.search_coupang_price(optimized_name)
-        if coupang_price:
-            prices.append(coupang_price)
-            print(f"  - 쿠팡: {coupang_price:,}원")
-        
-        # 딜레이 추가
-        time.sleep(random.uniform(2, 4))
-        
-        # G마켓에서 검색
-        gmarket_price = self.search_gmarket_price(optimized_name)
-        if gmarket_price:
-            prices.append(gmarket_price)
-            print(f"  - G마켓: {gmarket_price:,}원")
+        for site, price, _ in results:
+            if price:
+                prices.append(price)
+                print(f"  - {site}: {price:,}원")
         
         if prices:
             # 최저가 반환 (또는 평균가를 원할 경우 sum(prices) // len(prices))
@@ -279,151 +313,285 @@ class FurniturePriceCrawler:
             print(f"  -> 가격 정보를 찾을 수 없습니다.")
             return None
 
-    def set_random_prices(self):
-        """가격이 null인 가구들에게 랜덤 가격 설정"""
+    def get_furniture_price(self, furniture_name):
+        """여러 쇼핑몰에서 가격 검색하여 평균가 또는 최저가 반환 (가구 하나만 검색할 때)"""
+        # 검색어 최적화
+        optimized_name = self.optimize_search_query(furniture_name)
+        results = asyncio.run(self.price_engine.lookup(optimized_name))
+        return self._report_prices(furniture_name, optimized_name, results)
+
+    def set_random_prices(self, batch_size=5000, flush_interval=10.0, seed=None, chunk_size=5000):
+        """
+        가격이 null인 가구들에게 랜덤 가격 설정 (batch_size 개씩 모아서 저장)
+        seed 를 주면 같은 가구 목록에 항상 같은 가격이 설정됩니다.
+        가구 목록은 chunk_size 개씩 읽어서 바로 가격을 정하고 저장하므로, 가구 수와 관계없이 메모리 사용량이 일정합니다.
+        """
         try:
-            # 가격이 null인 가구들 조회
-            query = """
-            SELECT furniture_id, name 
-            FROM furniture.furnitures 
-            WHERE price IS NULL 
-            ORDER BY furniture_id
-            """
-            
-            furnitures_df = pd.read_sql_query(query, self.engine)
-            
-            if furnitures_df.empty:
+            total = count_furnitures(self.engine, 'price IS NULL')
+            if not total:
                 print("가격 설정이 필요한 가구가 없습니다.")
                 return
             
-            print(f"총 {len(furnitures_df)}개 가구에 랜덤 가격을 설정합니다.")
+            print(f"총 {total}개 가구에 랜덤 가격을 설정합니다.")
             
-            updated_count = 0
-            
-            for index, row in furnitures_df.iterrows():
-                furniture_id = row['furniture_id']
-                furniture_name = row['name']
-                
-                # 가구 종류에 따른 랜덤 가격 범위 설정 (천원 단위로 반올림)
-                if any(keyword in furniture_name.lower() for keyword in ['소파', 'sofa']):
-                    random_price = random.randint(200, 800) * 1000  # 20만원~80만원
-                elif any(keyword in furniture_name.lower() for keyword in ['침대', 'bed']):
-                    random_price = random.randint(300, 1000) * 1000  # 30만원~100만원
-                elif any(keyword in furniture_name.lower() for keyword in ['식탁', 'table', '테이블']):
-                    random_price = random.randint(150, 500) * 1000  # 15만원~50만원
-                elif any(keyword in furniture_name.lower() for keyword in ['의자', 'chair']):
-                    random_price = random.randint(50, 300) * 1000  # 5만원~30만원
-                elif any(keyword in furniture_name.lower() for keyword in ['책상', 'desk']):
-                    random_price = random.randint(100, 400) * 1000  # 10만원~40만원
-                elif any(keyword in furniture_name.lower() for keyword in ['조명', 'light', 'lamp']):
-                    random_price = random.randint(30, 200) * 1000  # 3만원~20만원
-                else:
-                    # 기본 가격 범위
-                    random_price = random.randint(50, 300) * 1000  # 5만원~30만원
-                
-                # 데이터베이스 업데이트
-                update_query = f"""
-                UPDATE furniture.furnitures 
-                SET price = {random_price} 
-                WHERE furniture_id = '{furniture_id}'
-                """
-                
-                try:
-                    with self.engine.connect() as connection:
-                        connection.execute(text(update_query))
-                        connection.commit()
-                    updated_count += 1
-                    print(f"  ✓ ID {furniture_id}: {furniture_name} -> {random_price:,}원 설정 완료")
-                except Exception as e:
-                    print(f"  ✗ ID {furniture_id} 업데이트 실패: {e}")
-                
-                # 진행률 표시
-                progress = ((index + 1) / len(furnitures_df)) * 100
-                print(f"진행률: {progress:.1f}% ({index + 1}/{len(furnitures_df)})")
-            
-            print(f"\n랜덤 가격 설정 완료: {updated_count}/{len(furnitures_df)}개 성공")
+            # 묶음마다 같은 난수를 반복하지 않도록 하나의 Generator 에서 이어서 뽑음
+            rng = np.random.default_rng(seed)
+            shown = 0
+            with BatchPriceWriter(self.engine, batch_size=batch_size, flush_interval=flush_interval) as writer:
+                chunks = iter_furniture_chunks(
+                    self.engine, ['name', 'category_id'], 'price IS NULL', chunk_size=chunk_size
+                )
+                for chunk in chunks:
+                    # 가구 종류/카테고리에 따른 랜덤 가격을 묶음 전체에 한 번에 계산
+                    chunk['price'] = assign_random_prices(chunk, seed=rng)
+                    for _, row in chunk.head(10 - shown).iterrows():
+                        print(f"  ✓ ID {row['furniture_id']}: {row['name']} -> {row['price']:,}원 설정")
+                    shown = min(10, shown + len(chunk))
+                    writer.add_many(chunk['furniture_id'], chunk['price'])
+            if total > 10:
+                print(f"  ... 외 {total - 10}개")
+            
+            updated_count = writer.written_count
+            print(f"\n랜덤 가격 설정 완료: {updated_count}/{total}개 성공")
             
         except Exception as e:
             print(f"랜덤 가격 설정 중 오류 발생: {e}")
             print(traceback.format_exc())
 
-    def update_furniture_prices(self):
-        """데이터베이스에서 가격이 null인 가구들의 가격 업데이트"""
+    def update_furniture_prices(self, shard_index=0, shard_count=1, progress_board=None,
+                                batch_size=50, flush_interval=30.0, chunk_size=500):
+        """
+        데이터베이스에서 가격이 null인 가구들의 가격 업데이트
+        shard_count > 1 이면 furniture_id 해시값으로 나눈 shard_index 번째 몫만 처리합니다.
+        progress_board: 여러 프로세스가 진행 상황을 기록하는 공유 dict (선택)
+        찾은 가격은 batch_size 개 또는 flush_interval 초마다 한 번에 저장합니다.
+        가구 목록은 chunk_size 개씩 읽으면서 바로 검색하므로, 전체 목록을 다 읽기 전에 첫 가격이 저장됩니다.
+        """
+        label = f"[작업자 {shard_index + 1}/{shard_count}] " if shard_count > 1 else ""
         try:
-            # 가격이 null인 가구들 조회
-            query = """
-            SELECT furniture_id, name 
-            FROM furniture.furnitures 
-            WHERE price IS NULL 
-            ORDER BY furniture_id
-            """
-            
-            furnitures_df = pd.read_sql_query(query, self.engine)
-            
-            if furnitures_df.empty:
-                print("가격 업데이트가 필요한 가구가 없습니다.")
+            # 가격이 null인 가구들 (샤드 조건: 작업자끼리 겹치지 않는 구간)
+            # hashtext 는 int4 라서 abs(-2147483648) 이 범위를 넘어 쿼리 전체가 실패하므로 부호 비트를 지워서 씁니다.
+            where = ("price IS NULL AND "
+                     "mod(hashtext(furniture_id::text)::bigint & 2147483647, :shard_count) = :shard_index")
+            params = {'shard_count': shard_count, 'shard_index': shard_index}
+            total = count_furnitures(self.engine, where, params)
+            
+            if not total:
+                print(f"{label}가격 업데이트가 필요한 가구가 없습니다.")
+                if progress_board is not None:
+                    progress_board[shard_index] = {'total': 0, 'done': 0, 'updated': 0}
                 return
             
-            print(f"총 {len(furnitures_df)}개 가구의 가격을 업데이트합니다.")
+            print(f"{label}총 {total}개 가구의 가격을 업데이트합니다.")
+
+            def iter_rows():
+                # 엔진이 검색할 가구가 필요할 때마다 다음 묶음을 읽음
+                for chunk in iter_furniture_chunks(self.engine, ['name'], where, params, chunk_size=chunk_size):
+                    yield from zip(chunk['furniture_id'], chunk['name'])
+
+            self._crawl_prices(iter_rows(), total, label, batch_size, flush_interval,
+                               progress_board=progress_board, shard_index=shard_index)
+            metrics.dump_metrics(f'.{shard_index}' if shard_count > 1 else '')
             
-            updated_count = 0
+        except Exception as e:
+            print(f"{label}가격 업데이트 중 오류 발생: {e}")
+            print(traceback.format_exc())
+
+    def refresh_prices(self, max_items=500, time_budget=None, max_requests=None,
+                       batch_size=50, flush_interval=30.0, **scheduler_options):
+        """
+        오래됐거나 많이 쓰이는 가구부터 가격을 다시 검색 (price_refresh.RefreshScheduler 점수 순서)
+        max_items: 이번 실행에서 검색할 최대 가구 수 (점수 상위 N 개)
+        time_budget: 이 시간(초)이 지나면 새 가구 검색을 멈춤 (검색 중인 가구는 마저 끝냄)
+        max_requests: 쇼핑몰 요청(HTML + 브라우저) 수가 이만큼 되면 멈춤
+        검색한 가구는 price_refresh_attempts 에 기록해서, 못 찾은 가구는 한동안 다시 고르지 않습니다.
+        scheduler_options: max_age_days, min_age_days, popularity_weight, chunk_size
+        """
+        try:
+            planned = RefreshScheduler(self.engine, **scheduler_options).plan(max_items)
+            if not planned:
+                print("가격 갱신이 필요한 가구가 없습니다.")
+                return
+
+            budget = []
+            if time_budget:
+                budget.append(f"{time_budget / 60:.0f}분")
+            if max_requests:
+                budget.append(f"요청 {max_requests}회")
+            budget_text = f" (예산: {', '.join(budget)})" if budget else ""
+            print(f"점수 높은 순서로 최대 {len(planned)}개 가구의 가격을 갱신합니다.{budget_text}")
+
+            deadline = time.monotonic() + time_budget if time_budget else None
+
+            def iter_rows():
+                for furniture_id, name, score in planned:
+                    requests_made = self.fetch_stats['html'] + self.fetch_stats['browser']
+                    if deadline and time.monotonic() >= deadline:
+                        print("시간 예산을 모두 써서 갱신을 멈춥니다.")
+                        return
+                    if max_requests and requests_made >= max_requests:
+                        print("요청 예산을 모두 써서 갱신을 멈춥니다.")
+                        return
+                    yield furniture_id, name
+
+            with RefreshAttemptLog(self.engine, batch_size=batch_size, flush_interval=flush_interval) as attempts:
+                def record_attempt(furniture_id, price, results):
+                    # 오류 / 차단 / 건너뜀이 섞인 검색은 "가격 없음" 이 확실하지 않으므로 기록하지 않음 (다음에 다시 시도)
+                    if price or all(outcome in CACHEABLE_OUTCOMES for _, _, outcome in results):
+                        attempts.add(furniture_id, bool(price))
+
+                self._crawl_prices(iter_rows(), len(planned), '', batch_size, flush_interval,
+                                   on_searched=record_attempt)
+            print(f"갱신 시도 기록: {attempts.recorded_count}개 (실패 {attempts.failed_count}개)")
+            metrics.dump_metrics()
+
+        except Exception as e:
+            print(f"가격 갱신 중 오류 발생: {e}")
+            print(traceback.format_exc())
+
+    def _crawl_prices(self, rows, total, label, batch_size, flush_interval, progress_board=None, shard_index=0,
+                      on_searched=None):
+        """
+        rows: (furniture_id, 이름) 들 - 가격 엔진이 필요할 때마다 하나씩 꺼내 검색하고, 찾은 가격을 모아서 저장
+        on_searched(furniture_id, 최저가 또는 None, 쇼핑몰별 결과): 가구 하나의 검색이 끝날 때마다 호출 (선택)
+        끝나면 캐시 / 검색 방식 / 셀렉터 / 쇼핑몰 상태 / 단계별 시간 요약 출력
+        """
+        with BatchPriceWriter(self.engine, batch_size=batch_size, flush_interval=flush_interval) as writer:
+            counts = {'done': 0, 'updated': 0}
+            progress = metrics.ProgressTracker(total, name='price_progress', metrics=metrics.METRICS)
+            # 검색 중인 가구의 원래 이름 (결과를 받으면 지우므로 동시에 검색하는 가구 수 이상 커지지 않음)
+            names = {}
+
+            def iter_queries():
+                for furniture_id, name in rows:
+                    names[furniture_id] = name
+                    yield furniture_id, normalize_query(name)
+
+            def on_result(furniture_id, optimized_name, results):
+                furniture_name = names.pop(furniture_id)
+                price = self._report_prices(furniture_name, optimized_name, results)
             
-            for index, row in furnitures_df.iterrows():
-                furniture_id = row['furniture_id']
-                furniture_name = row['name']
-                
-                # 가격 검색
-                price = self.get_furniture_price(furniture_name)
-                
                 if price:
-                    # 데이터베이스 업데이트
-                    update_query = f"""
-                    UPDATE furniture.furnitures 
-                    SET price = {price} 
-                    WHERE id = {furniture_id}
-                    """
-                    
-                    try:
-                        with self.engine.connect() as connection:
-                            connection.execute(text(update_query))
-                            connection.commit()
-                        updated_count += 1
-                        print(f"  ✓ ID {furniture_id}: {furniture_name} -> {price:,}원 업데이트 완료")
-                    except Exception as e:
-                        print(f"  ✗ ID {furniture_id} 업데이트 실패: {e}")
+                    # 버퍼에 모았다가 batch_size 개 또는 flush_interval 초마다 저장
+                    writer.add(furniture_id, price)
+                    counts['updated'] += 1
+                    print(f"  ✓ ID {furniture_id}: {furniture_name} -> {price:,}원")
                 else:
                     print(f"  - ID {furniture_id}: {furniture_name} -> 가격 정보 없음")
-                
-                # 진행률 표시
-                progress = ((index + 1) / len(furnitures_df)) * 100
-                print(f"진행률: {progress:.1f}% ({index + 1}/{len(furnitures_df)})")
-                
-                # 과도한 요청 방지를 위한 딜레이
-                time.sleep(random.uniform(5, 8))
-            
-            print(f"\n가격 업데이트 완료: {updated_count}/{len(furnitures_df)}개 성공")
-            
-        except Exception as e:
-            print(f"가격 업데이트 중 오류 발생: {e}")
-            print(traceback.format_exc())
+                if on_searched is not None:
+                    on_searched(furniture_id, price, results)
+            
+                # 진행률 / 남은 시간 표시
+                counts['done'] += 1
+                print(f"{label}{progress.format(progress.update(counts['done']))}")
+                if progress_board is not None:
+                    progress_board[shard_index] = {
+                        'total': total,
+                        'done': counts['done'],
+                        'updated': counts['updated']
+                    }
+            
+            # 요청 간격은 쇼핑몰별 토큰 버킷이 맞추므로 가구마다 따로 쉬지 않습니다
+            asyncio.run(self.price_engine.run(iter_queries(), on_result))
+        
+        updated_count = writer.written_count
+        print(f"\n{label}가격 업데이트 완료: {updated_count}/{total}개 성공 (검색 {counts['done']}개)")
+        if self.price_cache:
+            stats = self.price_cache.stats()
+            print(f"{label}가격 캐시: 적중 {stats['hits']}회, 미스 {stats['misses']}회 "
+                  f"(적중률 {stats['hit_rate']:.1f}%)")
+        print(f"{label}검색 방식: HTML {self.fetch_stats['html']}회, 브라우저 {self.fetch_stats['browser']}회")
+        if self.page_stats:
+            self.page_stats.print_summary(label)
+        for adapter in self.adapters:
+            hits = ', '.join(f"{selector} {count}회" for selector, count in adapter.resolver.stats() if count)
+            print(f"{label}{adapter.name} 가격 셀렉터 적중: {hits or '없음'}")
+        for site, health in self.site_health.items():
+            summary = health.summary()
+            print(f"{label}{site} 상태: {summary['state']}, 최근 실패율 {summary['failure_rate'] * 100:.0f}%, "
+                  f"차단 {summary['opened']}회, 건너뜀 {summary['skipped']}회")
+        # 단계별 소요 시간 (드라이버 시작, 페이지 로드, 셀렉터 대기, 요청 간격 대기, DB 저장 등)
+        metrics.METRICS.print_summary(label)
+
+
+def _run_price_shard(shard_index, shard_count, progress_board, concurrent):
+    """작업자 프로세스 진입점 - 프로세스마다 DB 연결과 크롬 풀을 따로 만듭니다"""
+    # 작업자끼리 쇼핑몰 요청 속도를 나눠 씀 (프로세스마다 버킷이 따로 있으므로)
+    crawler = FurniturePriceCrawler(concurrent=concurrent, rate_share=1 / shard_count)
+    try:
+        crawler.update_furniture_prices(shard_index, shard_count, progress_board)
+    finally:
+        crawler.close()
+
+
+def run_sharded_price_update(workers=4, concurrent=False, report_interval=30):
+    """
+    가격이 null인 가구를 furniture_id 해시로 workers 개 구간으로 나누고,
+    구간마다 별도 프로세스에서 가격을 업데이트합니다.
+    """
+    ctx = multiprocessing.get_context('spawn')
+    with ctx.Manager() as manager:
+        progress_board = manager.dict()
+        with ProcessPoolExecutor(max_workers=workers, mp_context=ctx) as executor:
+            futures = [
+                executor.submit(_run_price_shard, shard_index, workers, progress_board, concurrent)
+                for shard_index in range(workers)
+            ]
+            not_done = futures
+            while not_done:
+                _, not_done = wait(not_done, timeout=report_interval)
+                # 전체 진행 상황 출력
+                board = dict(progress_board)
+                total = sum(item['total'] for item in board.values())
+                done = sum(item['done'] for item in board.values())
+                updated = sum(item['updated'] for item in board.values())
+                if total:
+                    print(f"[전체] 진행률: {done / total * 100:.1f}% ({done}/{total}), "
+                          f"업데이트 {updated}개, 작업 중인 프로세스 {len(not_done)}개")
+
+            for shard_index, future in enumerate(futures):
+                try:
+                    future.result()
+                except Exception as e:
+                    print(f"작업자 {shard_index + 1} 비정상 종료: {e}")
 
 def main():
     """메인 함수"""
-    crawler = FurniturePriceCrawler()
-    
     # 사용 방법 선택
     print("가격 설정 방법을 선택하세요:")
     print("1. 실제 쇼핑몰에서 크롤링 (시간 오래 걸림)")
     print("2. 랜덤 가격으로 설정 (빠름)")
+    print("3. 실제 쇼핑몰에서 동시 크롤링 (쇼핑몰들을 동시에 검색)")
+    print("4. 여러 프로세스로 나눠서 크롤링 (가구 목록을 나눠 병렬 처리)")
+    print("5. 오래된 가격 갱신 (많이 배치된 가구, 오래된 가격부터 정해진 시간 / 개수만큼)")
+    
+    choice = input("선택하세요 (1, 2, 3, 4 또는 5): ").strip()
     
-    choice = input("선택하세요 (1 또는 2): ").strip()
+    if choice == "4":
+        workers = input("작업자 프로세스 수 (기본 4): ").strip()
+        run_sharded_price_update(workers=int(workers) if workers.isdigit() else 4, concurrent=True)
+        return
     
-    if choice == "1":
-        crawler.update_furniture_prices()
-    elif choice == "2":
-        crawler.set_random_prices()
-    else:
-        print("잘못된 선택입니다. 1 또는 2를 입력해주세요.")
+    if choice == "5":
+        max_items = input("갱신할 최대 가구 수 (기본 500): ").strip()
+        minutes = input("최대 실행 시간 (분, 기본 60): ").strip()
+    
+    crawler = FurniturePriceCrawler(concurrent=(choice in ("3", "5")))
+    try:
+        if choice in ("1", "3"):
+            crawler.update_furniture_prices()
+        elif choice == "2":
+            crawler.set_random_prices()
+        elif choice == "5":
+            crawler.refresh_prices(
+                max_items=int(max_items) if max_items.isdigit() else 500,
+                time_budget=(int(minutes) if minutes.isdigit() else 60) * 60
+            )
+        else:
+            print("잘못된 선택입니다. 1, 2, 3, 4 또는 5를 입력해주세요.")
+    finally:
+        # 풀에 남아 있는 크롬 프로세스 정리
+        crawler.close()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,171 @@
+# 가구 팝업 치수 텍스트 파싱 ("W:535 x D:612 x H:1660 (mm)" 등)
+# - 단위: mm, cm, m, inch(in, ") -> 모두 mm 로 변환 (소수점 둘째 자리까지, DB 컬럼이 Decimal(10, 2))
+# - W/D/H 라벨(가로/세로/높이, Width/Depth/Height 포함)이 없으면 "535 x 612 x 1660" 을 W x D x H 순서로 읽음
+# - 축 뒤에 단위가 없으면 문자열 끝의 단위 "(mm)", 그것도 없으면 mm
+# - 결과 컬럼: length_x=W, length_y=H(높이, 시뮬레이터의 length[1]), length_z=D
+#   dim_status: ok(세 축 모두) / partial(일부 축만) / invalid(치수를 못 읽음) / empty(텍스트 없음)
+# 출력 고정: python dimension_parser.py 로 DIMENSION_CORPUS 결과를 확인합니다.
+
+import re
+
+import numpy as np
+import pandas as pd
+
+NUMBER = r'(\d+(?:\.\d+)?)'
+UNIT = r'(mm|cm|inch|in|m|"|″)'
+# 단위 뒤에 영문이 이어지면 단위가 아님 (예: 535 max)
+UNIT_END = r'(?![A-Za-z])'
+
+AXIS_LABELS = {
+    'width': r'Width|W|가로|너비|폭',
+    'depth': r'Depth|D|세로|깊이',
+    'height': r'Height|H|높이',
+}
+# 영문 단어 안의 W/D/H 는 라벨로 보지 않음 (예: NEW 100)
+# 단, 공백 없이 붙은 구분자 x 뒤는 라벨로 봄 (예: W:535xD:612xH:1660)
+AXIS_PATTERNS = {
+    axis: rf'(?i)(?<![A-WYZa-wyz])(?:{labels})\s*[:：]?\s*{NUMBER}\s*(?:{UNIT}{UNIT_END})?'
+    for axis, labels in AXIS_LABELS.items()
+}
+# 라벨 없이 숫자만 있는 경우 (W x D x H 순서, 세 번째 값은 없어도 됨)
+SEPARATOR = r'\s*[x×*]\s*'
+POSITIONAL_PATTERN = (
+    rf'(?i){NUMBER}\s*(?:{UNIT}{UNIT_END})?{SEPARATOR}{NUMBER}\s*(?:{UNIT}{UNIT_END})?'
+    rf'(?:{SEPARATOR}{NUMBER}\s*(?:{UNIT}{UNIT_END})?)?'
+)
+# 문자열 끝의 공통 단위 ("(mm)", "mm", "cm)" 등)
+GLOBAL_UNIT_PATTERN = rf'(?i){UNIT}{UNIT_END}\s*\)?\s*$'
+# 천 단위 쉼표 (1,660 -> 1660)
+THOUSANDS_PATTERN = r'(?<=\d),(?=\d{3}(?!\d))'
+
+UNIT_TO_MM = {'mm': 1, 'cm': 10, 'm': 1000, 'in': 25.4, 'inch': 25.4, '"': 25.4, '″': 25.4}
+DEFAULT_UNIT = 'mm'
+AXES = ('width', 'depth', 'height')
+# DB 컬럼 매핑 (W -> x, H -> y, D -> z)
+AXIS_COLUMNS = {'width': 'length_x', 'height': 'length_y', 'depth': 'length_z'}
+
+_axis_regexes = {axis: re.compile(pattern) for axis, pattern in AXIS_PATTERNS.items()}
+_positional_regex = re.compile(POSITIONAL_PATTERN)
+_global_unit_regex = re.compile(GLOBAL_UNIT_PATTERN)
+_thousands_regex = re.compile(THOUSANDS_PATTERN)
+
+# (치수 텍스트, 기대 결과 (length_x, length_y, length_z, dim_status))
+DIMENSION_CORPUS = [
+    ('W:535 x D:612 x H:1660 (mm)', (535.0, 1660.0, 612.0, 'ok')),
+    ('W:53.5 x D:61.2 x H:166 (cm)', (535.0, 1660.0, 612.0, 'ok')),
+    ('W 21" x D 24in x H 65.5 inch', (533.4, 1663.7, 609.6, 'ok')),
+    ('H:1660 x W:535 x D:612 mm', (535.0, 1660.0, 612.0, 'ok')),
+    ('W:1,200 x D:600 x H:750', (1200.0, 750.0, 600.0, 'ok')),
+    ('W:535xD:612xH:1660', (535.0, 1660.0, 612.0, 'ok')),
+    ('가로 120cm 세로 60cm 높이 75cm', (1200.0, 750.0, 600.0, 'ok')),
+    ('W:535 x H:1660 (mm)', (535.0, 1660.0, None, 'partial')),
+    ('535 x 612 x 1660 mm', (535.0, 1660.0, 612.0, 'ok')),
+    ('1.2m x 60cm', (1200.0, None, 600.0, 'partial')),
+    ('W:? x D:? x H:?', (None, None, None, 'invalid')),
+    ('NEW ARRIVAL', (None, None, None, 'invalid')),
+    ('', (None, None, None, 'empty')),
+    (None, (None, None, None, 'empty')),
+]
+
+
+def looks_like_dimensions(text):
+    """팝업의 한 줄이 치수 정보인지 (W/D/H 라벨 또는 숫자 x 숫자)"""
+    return bool(
+        text and (any(regex.search(text) for regex in _axis_regexes.values())
+                  or _positional_regex.search(text))
+    )
+
+
+def _to_mm(number, unit, global_unit):
+    if number is None:
+        return None
+    unit = (unit or global_unit or DEFAULT_UNIT).lower()
+    return round(float(number) * UNIT_TO_MM[unit], 2)
+
+
+def _status(values, text):
+    found = sum(value is not None for value in values)
+    if not text.strip():
+        return 'empty'
+    if found == 3:
+        return 'ok'
+    return 'partial' if found else 'invalid'
+
+
+def parse_dimensions(text):
+    """
+    치수 텍스트 하나를 파싱해 {'length_x', 'length_y', 'length_z', 'dim_status'} 반환
+    읽지 못한 축은 None (0 으로 채울지는 호출하는 쪽에서 결정)
+    """
+    text = _thousands_regex.sub('', text or '')
+    global_match = _global_unit_regex.search(text)
+    global_unit = global_match.group(1) if global_match else None
+
+    parsed = {}
+    matches = {axis: regex.search(text) for axis, regex in _axis_regexes.items()}
+    if any(matches.values()):
+        for axis, match in matches.items():
+            parsed[axis] = _to_mm(*(match.groups() if match else (None, None)), global_unit)
+    else:
+        match = _positional_regex.search(text)
+        groups = match.groups() if match else (None,) * 6
+        for i, axis in enumerate(AXES):
+            parsed[axis] = _to_mm(groups[2 * i], groups[2 * i + 1], global_unit)
+
+    result = {AXIS_COLUMNS[axis]: parsed[axis] for axis in AXES}
+    result['dim_status'] = _status(list(parsed.values()), text)
+    return result
+
+
+def parse_dimensions_batch(texts):
+    """
+    치수 텍스트 목록(또는 Series)을 한 번에 파싱해 DataFrame 반환
+    컬럼: length_x, length_y, length_z (mm, 못 읽으면 NaN), dim_status
+    """
+    texts = pd.Series(texts, dtype=object)
+    cleaned = texts.fillna('').astype(str).str.replace(THOUSANDS_PATTERN, '', regex=True)
+    global_unit = cleaned.str.extract(GLOBAL_UNIT_PATTERN)[0]
+
+    labeled = {axis: cleaned.str.extract(pattern) for axis, pattern in AXIS_PATTERNS.items()}
+    has_label = pd.concat([found[0].notna() for found in labeled.values()], axis=1).any(axis=1)
+    positional = cleaned.str.extract(POSITIONAL_PATTERN)
+
+    result = pd.DataFrame(index=texts.index)
+    for i, axis in enumerate(AXES):
+        number = labeled[axis][0].where(has_label, positional[2 * i])
+        unit = labeled[axis][1].where(has_label, positional[2 * i + 1])
+        unit = unit.fillna(global_unit).fillna(DEFAULT_UNIT).str.lower()
+        result[AXIS_COLUMNS[axis]] = (number.astype(float) * unit.map(UNIT_TO_MM)).round(2)
+
+    result = result[['length_x', 'length_y', 'length_z']]
+    found = result.notna().sum(axis=1)
+    result['dim_status'] = np.select(
+        [cleaned.str.strip() == '', found == 3, found > 0],
+        ['empty', 'ok', 'partial'],
+        default='invalid'
+    )
+    return result
+
+
+def check_corpus():
+    """DIMENSION_CORPUS 에 대해 parse_dimensions / parse_dimensions_batch 결과가 기대값과 다른 항목 목록 반환"""
+    mismatches = []
+    batch = parse_dimensions_batch([text for text, _ in DIMENSION_CORPUS])
+    for (text, expected), (_, row) in zip(DIMENSION_CORPUS, batch.iterrows()):
+        single = parse_dimensions(text)
+        single = tuple(single[column] for column in ('length_x', 'length_y', 'length_z', 'dim_status'))
+        batched = tuple(None if pd.isna(row[column]) else row[column]
+                        for column in ('length_x', 'length_y', 'length_z'))
+        batched += (row['dim_status'],)
+        if single != expected or batched != expected:
+            mismatches.append((text, expected, single, batched))
+    return mismatches
+
+
+if __name__ == "__main__":
+    mismatches = check_corpus()
+    for text, expected, single, batched in mismatches:
+        print(f"'{text}': 기대값 {expected}, 결과 {single}, 일괄 결과 {batched}")
+    print(f"치수 파싱 확인: {len(DIMENSION_CORPUS) - len(mismatches)}/{len(DIMENSION_CORPUS)}개 일치")
+    if mismatches:
+        raise SystemExit(1)
@@ -0,0 +1,127 @@
+# 셀레니움 웹드라이버 풀
+# 가격 검색마다 크롬을 새로 띄우지 않고, 띄워 둔 드라이버를 재사용합니다.
+# - max_size 개까지만 크롬을 띄웁니다 (초과 요청은 반납될 때까지 대기)
+# - 드라이버 하나가 max_pages 페이지를 열면 종료 후 새로 띄웁니다 (메모리 누수 방지)
+# - 빌려줄 때마다 응답하는지 확인하고, 죽은 드라이버는 버립니다
+# - close() 또는 프로그램 종료 시 띄운 크롬을 모두 종료합니다
+
+import atexit
+import queue
+import threading
+from contextlib import contextmanager
+
+
+class WebDriverPool:
+    def __init__(self, driver_factory, max_size=1, max_pages=50, acquire_timeout=120):
+        """driver_factory: 새 웹드라이버를 만들어 반환하는 함수"""
+        self.driver_factory = driver_factory
+        self.max_size = max_size
+        self.max_pages = max_pages
+        self.acquire_timeout = acquire_timeout
+
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(max_size)
+        self._lock = threading.Lock()
+        self._page_counts = {}  # id(driver) -> 사용한 페이지 수
+        self._drivers = {}  # id(driver) -> driver (종료 보장을 위해 전부 추적)
+        self._closed = False
+
+        self.created_count = 0
+        self.recycled_count = 0
+
+        atexit.register(self.close)
+
+    def _create_driver(self):
+        driver = self.driver_factory()
+        with self._lock:
+            self._drivers[id(driver)] = driver
+            self._page_counts[id(driver)] = 0
+            self.created_count += 1
+        return driver
+
+    def _destroy_driver(self, driver):
+        with self._lock:
+            self._drivers.pop(id(driver), None)
+            self._page_counts.pop(id(driver), None)
+        try:
+            driver.quit()
+        except Exception:
+            pass
+
+    def _is_healthy(self, driver):
+        """드라이버가 아직 응답하는지 확인"""
+        try:
+            driver.execute_script('return 1')
+            return True
+        except Exception:
+            return False
+
+    def acquire(self):
+        """드라이버 하나를 빌려옵니다. 사용 후 반드시 release 해야 합니다."""
+        if self._closed:
+            raise RuntimeError("이미 종료된 드라이버 풀입니다.")
+        if not self._slots.acquire(timeout=self.acquire_timeout):
+            raise TimeoutError(f"{self.acquire_timeout}초 안에 사용 가능한 드라이버가 없습니다.")
+
+        try:
+            while True:
+                try:
+                    driver = self._idle.get_nowait()
+                except queue.Empty:
+                    return self._create_driver()
+
+                if self._is_healthy(driver):
+                    return driver
+                print("  - 응답 없는 드라이버를 폐기합니다.")
+                self._destroy_driver(driver)
+        except Exception:
+            self._slots.release()
+            raise
+
+    def release(self, driver, broken=False):
+        """빌려간 드라이버를 반납합니다. broken=True 이면 재사용하지 않고 종료합니다."""
+        try:
+            with self._lock:
+                pages = self._page_counts.get(id(driver), 0) + 1
+                self._page_counts[id(driver)] = pages
+
+            if broken or self._closed:
+                self._destroy_driver(driver)
+            elif pages >= self.max_pages:
+                self.recycled_count += 1
+                self._destroy_driver(driver)
+            else:
+                self._idle.put(driver)
+        finally:
+            self._slots.release()
+
+    @contextmanager
+    def driver(self):
+        """with pool.driver() as driver: 형태로 사용. 예외가 나면 해당 드라이버는 폐기됩니다."""
+        driver = self.acquire()
+        try:
+            yield driver
+        except BaseException:
+            self.release(driver, broken=True)
+            raise
+        else:
+            self.release(driver)
+
+    def close(self):
+        """띄워 둔 크롬을 모두 종료"""
+        self._closed = True
+        with self._lock:
+            drivers = list(self._drivers.values())
+        for driver in drivers:
+            self._destroy_driver(driver)
+        while True:
+            try:
+                self._idle.get_nowait()
+            except queue.Empty:
+                break
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -0,0 +1,485 @@
+# furniture.furnitures 테이블 일괄 읽기 / 쓰기 도구
+# 가구마다 커넥션을 열고 커밋하는 대신, 모아서 한 번에 저장합니다.
+# - iter_furniture_chunks: 테이블 전체를 메모리에 올리지 않고 furniture_id 순서로 조금씩 읽기 (crawling_price.py)
+# - BatchPriceWriter: 가격 UPDATE (crawling_price.py)
+# - FurnitureSink: 크롤링한 가구 INSERT (crawling.py) - 계속 실패하는 가구는 crawl_rejects.jsonl 로 빼 둠
+# - copy_rows: 가구 / 가격 저장 모두 임시 테이블에 COPY FROM STDIN 으로 넣은 뒤 한 문장으로 반영 (행/초 출력)
+#   (upsert_furnitures, BatchPriceWriter 의 큰 배치)
+
+import io
+import json
+import threading
+import time
+import pandas as pd
+from sqlalchemy import text
+import metrics
+from crawl_data import data_path
+
+# crawling.py 가 저장하는 가구 컬럼
+FURNITURE_COLUMNS = [
+    'name', 'description', 'length_x', 'length_y', 'length_z', 'image_url',
+    'model_url', 'price', 'brand', 'is_active', 'category_id',
+]
+# 중복 판단 기준 - 앞뒤 공백/연속 공백/대소문자를 무시한 이름
+NAME_KEY_SQL = "lower(regexp_replace(btrim(name), '\\s+', ' ', 'g'))"
+NAME_INDEX_NAME = 'furnitures_name_key_uniq'
+# 여러 번 저장에 실패해 빼 둔 가구 (FurnitureSink)
+DEFAULT_REJECTS_PATH = data_path('crawl_rejects.jsonl')
+
+
+# 이름 유니크 인덱스 - 운영 DB 에는 prisma/sql/001_furnitures_name_key_uniq.sql 로 만들고,
+# 이 문장은 벤치마크처럼 비어 있는 로컬 테이블에서만 사용
+NAME_INDEX_SQL = f"CREATE UNIQUE INDEX IF NOT EXISTS {NAME_INDEX_NAME} ON furniture.furnitures ({NAME_KEY_SQL})"
+NAME_INDEX_MIGRATION = 'prisma/sql/001_furnitures_name_key_uniq.sql'
+
+
+class MissingNameIndexError(RuntimeError):
+    """이름 유니크 인덱스가 없거나 INVALID 상태"""
+
+
+def require_name_unique_index(engine):
+    """
+    정규화한 이름 유니크 인덱스가 사용 가능한 상태인지 확인하고, 없으면 MissingNameIndexError
+    (인덱스 없이 저장하면 중복 가구가 그대로 쌓이므로 크롤링을 시작하지 않음)
+    """
+    with engine.connect() as connection:
+        valid = connection.execute(text("""
+            SELECT i.indisvalid
+            FROM pg_index AS i
+            JOIN pg_class AS c ON c.oid = i.indexrelid
+            JOIN pg_namespace AS n ON n.oid = c.relnamespace
+            WHERE n.nspname = 'furniture' AND c.relname = :index_name
+        """), {'index_name': NAME_INDEX_NAME}).scalar()
+    if valid is None:
+        raise MissingNameIndexError(
+            f"이름 유니크 인덱스({NAME_INDEX_NAME})가 없습니다. {NAME_INDEX_MIGRATION} 을 먼저 실행하세요."
+        )
+    if not valid:
+        raise MissingNameIndexError(
+            f"이름 유니크 인덱스({NAME_INDEX_NAME})가 INVALID 상태입니다. "
+            f"DROP INDEX CONCURRENTLY 후 {NAME_INDEX_MIGRATION} 을 다시 실행하세요."
+        )
+
+
+def _copy_value(value):
+    """COPY text 형식 값으로 변환 (NULL 은 \\N)"""
+    if value is None or (isinstance(value, float) and value != value):
+        return '\\N'
+    if isinstance(value, bool):
+        return 't' if value else 'f'
+    return (str(value).replace('\\', '\\\\').replace('\t', '\\t')
+            .replace('\n', '\\n').replace('\r', '\\r'))
+
+
+def _copy_buffer(rows, columns):
+    """rows(dict 또는 columns 순서의 tuple 목록)를 COPY text 형식 버퍼로 변환"""
+    buffer = io.StringIO()
+    for row in rows:
+        values = (row.get(column) for column in columns) if isinstance(row, dict) else row
+        buffer.write('\t'.join(_copy_value(value) for value in values))
+        buffer.write('\n')
+    buffer.seek(0)
+    return buffer
+
+
+def copy_rows(cursor, table, columns, rows, label=None):
+    """
+    rows 를 COPY FROM STDIN 으로 table 에 한 번에 넣습니다. (커밋은 호출한 쪽에서)
+    넣은 행 수 반환, label 을 주면 초당 처리 행 수를 출력합니다.
+    """
+    start = time.monotonic()
+    cursor.copy_expert(
+        f"COPY {table} ({', '.join(columns)}) FROM STDIN",
+        _copy_buffer(rows, columns)
+    )
+    elapsed = time.monotonic() - start
+    if label:
+        rate = len(rows) / elapsed if elapsed > 0 else float('inf')
+        print(f"  [COPY] {label}: {len(rows)}행, {elapsed:.2f}초 ({rate:,.0f}행/초)")
+    return len(rows)
+
+
+def upsert_furnitures(engine, rows, on_conflict='nothing'):
+    """
+    가구 rows 를 COPY 로 임시 테이블에 넣은 뒤 INSERT ... ON CONFLICT 한 번으로 저장합니다.
+    중복 판단은 DB 의 이름 유니크 인덱스가 하므로 기존 가구 목록을 읽어올 필요가 없습니다.
+    on_conflict: 'nothing' 이면 기존 가구는 그대로, 'update' 면 새로 수집한 값으로 갱신
+    (삽입 개수, 갱신 개수) 반환
+    """
+    if on_conflict == 'update':
+        conflict_sql = f"""
+        ON CONFLICT (({NAME_KEY_SQL})) DO UPDATE SET
+            brand = COALESCE(NULLIF(EXCLUDED.brand, ''), f.brand),
+            image_url = COALESCE(EXCLUDED.image_url, f.image_url),
+            length_x = CASE WHEN EXCLUDED.length_x > 0 THEN EXCLUDED.length_x ELSE f.length_x END,
+            length_y = CASE WHEN EXCLUDED.length_y > 0 THEN EXCLUDED.length_y ELSE f.length_y END,
+            length_z = CASE WHEN EXCLUDED.length_z > 0 THEN EXCLUDED.length_z ELSE f.length_z END,
+            updated_at = now()
+        """
+    else:
+        conflict_sql = "ON CONFLICT DO NOTHING"
+
+    columns = ', '.join(FURNITURE_COLUMNS)
+    connection = engine.raw_connection()
+    try:
+        cursor = connection.cursor()
+        cursor.execute(
+            "CREATE TEMP TABLE furnitures_staging "
+            "(LIKE furniture.furnitures INCLUDING DEFAULTS) ON COMMIT DROP"
+        )
+        copy_rows(cursor, 'furnitures_staging', FURNITURE_COLUMNS, rows, label='가구 임시 테이블')
+        # 같은 배치 안의 중복은 하나만 남기고 삽입
+        cursor.execute(f"""
+        INSERT INTO furniture.furnitures AS f ({columns})
+        SELECT DISTINCT ON ({NAME_KEY_SQL}) {columns}
+        FROM furnitures_staging
+        ORDER BY {NAME_KEY_SQL}
+        {conflict_sql}
+        RETURNING (xmax = 0) AS inserted
+        """)
+        results = cursor.fetchall()
+        connection.commit()
+    except Exception:
+        connection.rollback()
+        raise
+    finally:
+        connection.close()
+
+    inserted = sum(1 for (is_inserted,) in results if is_inserted)
+    return inserted, len(results) - inserted
+
+
+def count_furnitures(engine, where='TRUE', params=None):
+    """where 조건에 맞는 가구 수 (진행률 표시용)"""
+    with engine.connect() as connection:
+        return connection.execute(
+            text(f"SELECT count(*) FROM furniture.furnitures WHERE {where}"), params or {}
+        ).scalar()
+
+
+def iter_furniture_chunks(engine, columns, where='TRUE', params=None, chunk_size=1000):
+    """
+    where 조건에 맞는 가구를 furniture_id 순서로 chunk_size 개씩 DataFrame 으로 yield
+    OFFSET 대신 마지막으로 읽은 furniture_id 다음부터 읽으므로(keyset) 뒤쪽 페이지도 인덱스로 바로 찾고,
+    읽는 도중에 가격이 채워져 조건에서 빠지는 행이 있어도 건너뛰거나 두 번 읽는 행이 없습니다.
+    columns 에 furniture_id 가 없으면 추가합니다.
+    """
+    columns = list(columns)
+    if 'furniture_id' not in columns:
+        columns.insert(0, 'furniture_id')
+    params = dict(params or {}, chunk_size=chunk_size)
+    last_id = None
+    while True:
+        keyset = ""
+        if last_id is not None:
+            keyset = "AND furniture_id > CAST(:last_id AS uuid)"
+            params['last_id'] = last_id
+        query = f"""
+        SELECT {', '.join(columns)}
+        FROM furniture.furnitures
+        WHERE ({where}) {keyset}
+        ORDER BY furniture_id
+        LIMIT :chunk_size
+        """
+        with metrics.timer('db_read', table='furnitures'):
+            with engine.connect() as connection:
+                chunk = pd.read_sql_query(text(query), connection, params=params)
+        if chunk.empty:
+            return
+        metrics.inc('db_rows_read', len(chunk), table='furnitures')
+        yield chunk
+        if len(chunk) < chunk_size:
+            return
+        last_id = str(chunk['furniture_id'].iloc[-1])
+
+
+class BatchPriceWriter:
+    """
+    (furniture_id, price) 를 버퍼에 모아 두었다가
+    batch_size 개가 모이거나 flush_interval 초가 지나면 UPDATE 한 번으로 저장합니다.
+    copy_threshold 개 이상 모인 배치는 임시 테이블에 COPY 한 뒤 UPDATE 합니다.
+    저장할 때 updated_at 과 price_updated_at(price_refresh 가 가격이 오래됐는지 판단하는 기준)도 갱신합니다.
+
+    with BatchPriceWriter(engine) as writer:
+        writer.add(furniture_id, price)
+    """
+
+    def __init__(self, engine, batch_size=500, flush_interval=10.0, copy_threshold=1000):
+        self.engine = engine
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.copy_threshold = copy_threshold
+
+        self._buffer = []
+        self._last_flush = time.monotonic()
+
+        self.written_count = 0
+        self.failed_count = 0
+        self.flush_count = 0
+
+    def add(self, furniture_id, price):
+        self._buffer.append((str(furniture_id), int(price)))
+        if len(self._buffer) >= self.batch_size or time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def add_many(self, furniture_ids, prices):
+        """여러 개를 한 번에 추가하고 batch_size 단위로 저장"""
+        for furniture_id, price in zip(furniture_ids, prices):
+            self._buffer.append((str(furniture_id), int(price)))
+            if len(self._buffer) >= self.batch_size:
+                self.flush()
+
+    def flush(self):
+        """버퍼에 쌓인 가격을 UPDATE 한 문장으로 저장"""
+        self._last_flush = time.monotonic()
+        if not self._buffer:
+            return 0
+
+        batch, self._buffer = self._buffer, []
+        try:
+            # PostgreSQL 바인드 파라미터 한도(65535) 때문에 큰 배치는 COPY 사용
+            if len(batch) >= self.copy_threshold:
+                with metrics.timer('db_flush', table='prices', method='copy'):
+                    rowcount = self._update_with_copy(batch)
+            else:
+                with metrics.timer('db_flush', table='prices', method='values'):
+                    rowcount = self._update_with_values(batch)
+            metrics.inc('db_rows_written', rowcount, table='prices')
+            self.written_count += rowcount
+            self.flush_count += 1
+            print(f"  → {rowcount}개 가격 저장 완료")
+            return rowcount
+        except Exception as e:
+            self.failed_count += len(batch)
+            metrics.inc('db_rows_failed', len(batch), table='prices')
+            print(f"  ✗ {len(batch)}개 가격 저장 실패: {e}")
+            return 0
+
+    def _update_with_values(self, batch):
+        """UPDATE ... FROM (VALUES ...)"""
+        values = []
+        params = {}
+        for i, (furniture_id, price) in enumerate(batch):
+            values.append(f"(CAST(:id{i} AS uuid), CAST(:price{i} AS numeric))")
+            params[f'id{i}'] = furniture_id
+            params[f'price{i}'] = price
+
+        update_query = f"""
+        UPDATE furniture.furnitures AS f
+        SET price = v.price, updated_at = now(), price_updated_at = now()
+        FROM (VALUES {', '.join(values)}) AS v(furniture_id, price)
+        WHERE f.furniture_id = v.furniture_id
+        """
+        with self.engine.begin() as connection:
+            result = connection.execute(text(update_query), params)
+        return result.rowcount
+
+    def _update_with_copy(self, batch):
+        """임시 테이블에 COPY 후 UPDATE ... FROM 임시 테이블"""
+        connection = self.engine.raw_connection()
+        try:
+            cursor = connection.cursor()
+            cursor.execute(
+                "CREATE TEMP TABLE price_staging (furniture_id uuid, price numeric) ON COMMIT DROP"
+            )
+            copy_rows(cursor, 'price_staging', ['furniture_id', 'price'], batch, label='가격 임시 테이블')
+            cursor.execute("""
+            UPDATE furniture.furnitures AS f
+            SET price = s.price, updated_at = now(), price_updated_at = now()
+            FROM price_staging AS s
+            WHERE f.furniture_id = s.furniture_id
+            """)
+            rowcount = cursor.rowcount
+            connection.commit()
+            return rowcount
+        except Exception:
+            connection.rollback()
+            raise
+        finally:
+            connection.close()
+
+    def close(self):
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class SinkFlushError(Exception):
+    """저장하지 못한 가구가 남아 있음"""
+
+
+# 가구 값 때문에 난 오류의 SQLSTATE 클래스 (22: 잘못된 데이터, 23: 제약 조건 위반)
+ROW_ERROR_SQLSTATE_CLASSES = ('22', '23')
+
+
+def is_row_error(error):
+    """가구 값 때문에 난 오류인지 (연결 끊김, DB 장애 같은 오류는 False)"""
+    if isinstance(error, (ValueError, TypeError)):
+        # COPY 버퍼를 만들다가 난 인코딩 / 형 변환 오류
+        return True
+    pgcode = getattr(error, 'pgcode', None) or getattr(getattr(error, 'orig', None), 'pgcode', None)
+    return bool(pgcode) and pgcode[:2] in ROW_ERROR_SQLSTATE_CLASSES
+
+
+class FurnitureSink:
+    """
+    크롤링한 가구를 메모리에 모아 두지 않고 batch_size 개씩 바로 DB 에 저장합니다.
+    이름이 이미 DB 에 있는 가구는 건너뜁니다 (on_conflict='update' 면 갱신).
+    중복 판단은 이름 유니크 인덱스 + ON CONFLICT 로 하므로, 인덱스가 없으면 만들 때 MissingNameIndexError.
+    checkpoint 를 주면 저장이 끝난 아이템을 체크포인트에 기록합니다.
+    여러 브라우저(스레드)가 함께 써도 됩니다.
+
+    가구 값 때문에 배치 저장이 실패하면(is_row_error) 반씩 나눠 다시 저장해서 문제 있는 가구만 골라내고,
+    골라낸 가구는 다음 flush 때 다시 시도합니다. max_retries 번 실패한 가구는 rejects_path 파일(JSON lines)로 빼 둡니다.
+    연결 끊김 등 DB 오류는 나누지 않고 배치 전체를 그대로 보류합니다. (가구의 시도 횟수도 늘리지 않음)
+    아무것도 저장하지 못한 flush 가 max_failed_flushes 번 연속되면 (DB 장애 등) SinkFlushError 로 중단합니다.
+    """
+
+    def __init__(self, engine, batch_size=50, checkpoint=None, on_conflict='nothing',
+                 max_retries=3, max_failed_flushes=3, rejects_path=DEFAULT_REJECTS_PATH):
+        self.engine = engine
+        self.batch_size = batch_size
+        self.checkpoint = checkpoint
+        self.on_conflict = on_conflict
+        self.max_retries = max_retries
+        self.max_failed_flushes = max_failed_flushes
+        self.rejects_path = rejects_path
+        require_name_unique_index(engine)
+
+        self._buffer = []
+        self._lock = threading.Lock()
+        self._failed_flushes = 0
+        # 저장하지 못하고 빼 둔 가구의 카테고리 (완료 표시를 하면 안 되는 카테고리)
+        self._rejected_categories = set()
+
+        self.collected_count = 0
+        self.inserted_count = 0
+        self.updated_count = 0
+        self.skipped_count = 0
+        self.rejected_count = 0
+
+    def add(self, item):
+        with self._lock:
+            self._buffer.append(item)
+            self.collected_count += 1
+            if len(self._buffer) >= self.batch_size:
+                self._flush()
+
+    def flush(self):
+        """버퍼를 저장하고, 저장하지 못한 가구가 남지 않았으면 True"""
+        with self._lock:
+            return self._flush()
+
+    def unsaved_categories(self):
+        """아직 저장하지 못한(다시 시도 대기 중이거나 빼 둔) 가구가 있는 카테고리"""
+        with self._lock:
+            return self._rejected_categories | {item.get('_category') for item in self._buffer}
+
+    def _flush(self):
+        if not self._buffer:
+            return True
+        batch, self._buffer = self._buffer, []
+
+        saved, failed, held, error = self._save_isolating(batch)
+        if held:
+            # 가구 잘못이 아니므로 시도 횟수를 세지 않고 다음 flush 때 그대로 다시 저장
+            self._buffer = held + self._buffer
+            metrics.inc('db_flush_error', table='furnitures')
+            print(f"  ✗ DB 오류로 가구 {len(held)}개 저장 보류: {error}")
+        if failed:
+            for item in failed:
+                item['_attempts'] = item.get('_attempts', 0) + 1
+            retry = [item for item in failed if item['_attempts'] < self.max_retries]
+            rejected = [item for item in failed if item['_attempts'] >= self.max_retries]
+            self._buffer = retry + self._buffer
+            print(f"  ✗ 가구 {len(failed)}개 저장 실패 (다시 시도 {len(retry)}개, 제외 {len(rejected)}개): {error}")
+            if rejected:
+                self._reject(rejected, error)
+
+        if saved:
+            self._failed_flushes = 0
+        else:
+            self._failed_flushes += 1
+            if self._failed_flushes >= self.max_failed_flushes:
+                raise SinkFlushError(f"가구 저장이 {self._failed_flushes}회 연속 실패했습니다: {error}")
+        return not self._buffer
+
+    def _save_isolating(self, batch):
+        """
+        batch 를 저장하고 (저장된 가구, 실패한 가구, 보류한 가구, 마지막 오류) 반환
+        가구 값 때문에 실패하면 반씩 나눠 다시 저장해서, 잘못된 가구 하나 때문에 나머지가 막히지 않게 합니다.
+        연결 끊김 등 DB 오류가 나면 더 나누지 않고 아직 저장하지 않은 가구를 모두 보류로 돌려줍니다.
+        """
+        try:
+            self._save(batch)
+            return batch, [], [], None
+        except Exception as e:
+            if not is_row_error(e):
+                return [], [], batch, e
+            if len(batch) == 1:
+                return [], batch, [], e
+            middle = len(batch) // 2
+            saved_a, failed_a, held_a, error_a = self._save_isolating(batch[:middle])
+            if held_a:
+                return saved_a, failed_a, held_a + batch[middle:], error_a
+            saved_b, failed_b, held_b, error_b = self._save_isolating(batch[middle:])
+            return saved_a + saved_b, failed_a + failed_b, held_b, error_b or error_a
+
+    def _save(self, batch):
+        # _category, _key 등 밑줄로 시작하는 값은 체크포인트 / 통계용 (DB 에는 저장하지 않음)
+        rows = [{k: v for k, v in item.items() if not k.startswith('_')} for item in batch]
+        with metrics.timer('db_flush', table='furnitures', method='upsert'):
+            inserted, updated = upsert_furnitures(self.engine, rows, self.on_conflict)
+
+        skipped = len(batch) - inserted - updated
+        metrics.inc('db_rows_written', inserted + updated, table='furnitures')
+        self.inserted_count += inserted
+        self.updated_count += updated
+        self.skipped_count += skipped
+        print(f"  → 신규 가구 {inserted}개 저장, {updated}개 갱신 (중복 {skipped}개 건너뜀)")
+
+        if self.checkpoint:
+            self.checkpoint.commit([item for item in batch if '_key' in item])
+
+    def _reject(self, items, error):
+        """계속 실패한 가구를 파일에 빼 둠 (나중에 확인 후 다시 넣을 수 있도록)"""
+        self.rejected_count += len(items)
+        self._rejected_categories.update(item.get('_category') for item in items)
+        metrics.inc('db_rows_failed', len(items), table='furnitures')
+        if not self.rejects_path:
+            return
+        with open(self.rejects_path, 'a', encoding='utf-8') as f:
+            for item in items:
+                f.write(json.dumps({'error': str(error), 'item': item}, ensure_ascii=False, default=str) + '\n')
+        print(f"  저장하지 못한 가구 {len(items)}개를 {self.rejects_path} 에 기록했습니다.")
+
+    def close(self):
+        """남은 가구를 저장하고, 저장하지 못한 가구가 있으면 SinkFlushError"""
+        # 다시 시도 대기 중인 가구는 max_retries 번까지 더 시도
+        for _ in range(self.max_retries):
+            if self.flush():
+                break
+        with self._lock:
+            pending = len(self._buffer)
+        if pending or self.rejected_count:
+            raise SinkFlushError(
+                f"가구 {pending + self.rejected_count}개를 저장하지 못했습니다 "
+                f"(대기 {pending}개, 제외 {self.rejected_count}개 - {self.rejects_path})"
+            )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+            return
+        # 이미 다른 오류로 끝나는 중이면 저장만 시도하고 원래 오류를 그대로 전달
+        try:
+            self.close()
+        except Exception as e:
+            print(f"가구 저장 마무리 실패: {e}")
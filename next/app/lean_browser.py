@@ -0,0 +1,149 @@
+# 가격 검색용 가벼운 크롬 설정
+# 검색 결과 페이지에서 가격 텍스트 하나만 읽으므로 이미지, 동영상, 폰트, 광고/추적 스크립트는 받지 않습니다.
+# - 페이지 로드 전략 eager: DOM 이 준비되면 바로 반환 (이미지 등 하위 리소스를 기다리지 않음)
+# - 요청 차단은 CDP Network.setBlockedURLs 로 해서, 실행 중에 켜고 끌 수 있습니다 (절약량 비교용)
+# - performance 로그로 페이지별 전송 바이트 / 차단한 요청 수를 집계합니다
+# - 절약량은 같은 페이지를 캐시 없이 차단 없이 한 번, 차단해서 한 번 받아 비교합니다
+#   (캐시가 찬 가벼운 페이지와 비교하면 캐시 효과까지 절약량으로 잡힘)
+
+import json
+import threading
+
+# 차단할 URL 패턴 (* 와일드카드)
+LEAN_BLOCKED_URLS = [
+    # 이미지
+    '*.jpg*', '*.jpeg*', '*.png*', '*.gif*', '*.webp*', '*.avif*', '*.svg*', '*.ico*',
+    # 동영상 / 오디오
+    '*.mp4*', '*.webm*', '*.m3u8*', '*.mp3*',
+    # 폰트
+    '*.woff*', '*.ttf*', '*.otf*', '*.eot*',
+    # 광고 / 추적
+    '*google-analytics.com*', '*googletagmanager.com*', '*doubleclick.net*', '*googlesyndication.com*',
+    '*facebook.net*', '*criteo.com*', '*criteo.net*', '*wcs.naver.net*', '*lcs.naver.com*',
+    '*adcr.naver.com*', '*ads.coupang.com*', '*mobon.net*', '*dable.io*',
+]
+
+# 너무 작으면 모바일 레이아웃으로 바뀌어 셀렉터가 달라지므로 데스크톱 최소 크기로
+LEAN_WINDOW_SIZE = (1024, 768)
+
+NAVIGATION_TIMING_SCRIPT = """
+const nav = performance.getEntriesByType('navigation')[0];
+return nav ? Math.round(nav.domContentLoadedEventEnd - nav.startTime) : 0;
+"""
+
+
+def apply_lean_options(chrome_options):
+    """ChromeOptions 에 가벼운 페이지 로드 설정 추가"""
+    chrome_options.page_load_strategy = 'eager'
+    chrome_options.add_argument(f'--window-size={LEAN_WINDOW_SIZE[0]},{LEAN_WINDOW_SIZE[1]}')
+    chrome_options.add_argument('--mute-audio')
+    chrome_options.add_argument('--disable-extensions')
+    # 페이지별 전송량 집계용
+    chrome_options.set_capability('goog:loggingPrefs', {'performance': 'ALL'})
+    return chrome_options
+
+
+def set_request_blocking(driver, enabled=True):
+    """이미지/폰트/광고 요청 차단 켜기/끄기"""
+    driver.execute_cdp_cmd('Network.enable', {})
+    driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': LEAN_BLOCKED_URLS if enabled else []})
+
+
+def set_cache_disabled(driver, disabled=True):
+    """브라우저 캐시 끄기/켜기 (절약량 비교용 페이지를 둘 다 처음 받는 상태로)"""
+    driver.execute_cdp_cmd('Network.setCacheDisabled', {'cacheDisabled': disabled})
+
+
+def reset_page_log(driver):
+    """이전 페이지의 performance 로그 비우기 (페이지 이동 전에 호출)"""
+    driver.get_log('performance')
+
+
+def page_load_report(driver):
+    """reset_page_log 이후 현재 페이지에서 받은 바이트, 요청 수, 차단한 요청 수, DOM 로드 시간(ms)"""
+    report = {'bytes': 0, 'requests': 0, 'blocked': 0, 'load_ms': 0}
+    for entry in driver.get_log('performance'):
+        try:
+            message = json.loads(entry['message'])['message']
+        except (KeyError, ValueError, TypeError):
+            continue
+        method = message.get('method')
+        if method == 'Network.loadingFinished':
+            report['bytes'] += int(message['params'].get('encodedDataLength', 0))
+            report['requests'] += 1
+        elif method == 'Network.loadingFailed' and message['params'].get('blockedReason'):
+            report['blocked'] += 1
+    report['load_ms'] = driver.execute_script(NAVIGATION_TIMING_SCRIPT) or 0
+    return report
+
+
+class LeanBrowsingStats:
+    """
+    쇼핑몰별 페이지 로드 통계
+    절약량은 캐시 없이 차단 없이 받은 페이지(기준)와, 바로 이어서 캐시 없이 차단해서 받은 같은 페이지(짝)의 차이
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.lean = {}
+        self.baseline = {}
+        self.paired = {}
+
+    def needs_baseline(self, site):
+        with self._lock:
+            return site not in self.baseline
+
+    def record(self, site, report, baseline=False, paired=False):
+        """paired=True: measure_baseline 바로 다음에 캐시 없이 받은 페이지 (평균에도 포함)"""
+        targets = [self.baseline] if baseline else [self.lean] + ([self.paired] if paired else [])
+        with self._lock:
+            for target in targets:
+                total = target.setdefault(site, {'pages': 0, 'bytes': 0, 'blocked': 0, 'load_ms': 0})
+                total['pages'] += 1
+                total['bytes'] += report['bytes']
+                total['blocked'] += report['blocked']
+                total['load_ms'] += report['load_ms']
+
+    def measure_baseline(self, driver, site, url, wait_ready=None):
+        """
+        캐시를 끄고 요청 차단도 잠시 끈 채로 페이지를 받아 기준값 기록
+        캐시는 끈 채로 돌려주므로, 호출한 쪽이 같은 페이지를 차단해서 받고 record(paired=True) 후
+        set_cache_disabled(driver, False) 로 다시 켜야 합니다.
+        wait_ready(driver): 페이지를 연 뒤 가격이 보일 때까지 대기 (짝이 되는 검색과 같은 시점에 측정)
+        """
+        set_cache_disabled(driver, True)
+        set_request_blocking(driver, enabled=False)
+        try:
+            reset_page_log(driver)
+            driver.get(url)
+            if wait_ready:
+                wait_ready(driver)
+            self.record(site, page_load_report(driver), baseline=True)
+        finally:
+            set_request_blocking(driver, enabled=True)
+
+    def summary(self):
+        """쇼핑몰별 페이지당 평균값 {site: {pages, kb, load_ms, saved_kb, saved_ms, blocked}}"""
+        result = {}
+        with self._lock:
+            for site, total in self.lean.items():
+                pages = total['pages']
+                kb = total['bytes'] / pages / 1024
+                load_ms = total['load_ms'] / pages
+                item = {'pages': pages, 'kb': kb, 'load_ms': load_ms,
+                        'blocked': total['blocked'] / pages, 'saved_kb': None, 'saved_ms': None}
+                base = self.baseline.get(site)
+                pair = self.paired.get(site)
+                if base and pair:
+                    item['saved_kb'] = (base['bytes'] / base['pages'] - pair['bytes'] / pair['pages']) / 1024
+                    item['saved_ms'] = base['load_ms'] / base['pages'] - pair['load_ms'] / pair['pages']
+                result[site] = item
+        return result
+
+    def print_summary(self, label=''):
+        for site, item in self.summary().items():
+            line = (f"{label}{site} 페이지 로드: 평균 {item['kb']:.0f}KB, {item['load_ms']:.0f}ms, "
+                    f"요청 {item['blocked']:.0f}개 차단 ({item['pages']}페이지)")
+            if item['saved_kb'] is not None:
+                line += f" -> 페이지당 {item['saved_kb']:.0f}KB, {item['saved_ms']:.0f}ms 절약"
+            print(line)
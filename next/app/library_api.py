@@ -0,0 +1,186 @@
+# Archisketch 가구 라이브러리 API 응답(JSON)에서 가구 정보 추출
+# 팝업을 하나씩 열지 않고, 목록을 불러올 때 브라우저가 받은 JSON 을 그대로 파싱합니다.
+# (Chrome DevTools performance 로그로 응답을 잡아서 사용)
+# 치수 단위: JSON 에 unit 필드가 있으면 그 단위, 없으면 CRAWL_LIBRARY_SIZE_UNIT (기본 auto)
+#   auto 는 가장 긴 변이 10 미만이면 m, 그 외에는 mm 로 봅니다. (cm 는 mm 와 크기로 구분할 수 없으므로
+#   가장 긴 변이 10~100 이면 mm 로 저장하되 dim_status 를 ambiguous 로 표시)
+
+import json
+import os
+import re
+
+from dimension_parser import UNIT_TO_MM
+
+# 가구 목록 API 로 판단할 URL 패턴 - 사이트가 바뀌면 .env.local 에서 조정
+LIBRARY_API_PATTERN = re.compile(os.getenv('CRAWL_LIBRARY_API_PATTERN', r'/(library|libraries|products?|items?|assets?)\b'), re.IGNORECASE)
+
+# JSON 필드 이름 후보 (먼저 나온 것 우선)
+NAME_KEYS = ('name', 'title', 'productName', 'displayName')
+BRAND_KEYS = ('brand', 'brandName', 'manufacturer', 'vendor')
+IMAGE_KEYS = ('thumbnail', 'thumbnailUrl', 'thumbnailURL', 'imageUrl', 'imageURL', 'image', 'previewUrl')
+WIDTH_KEYS = ('width', 'sizeX')
+DEPTH_KEYS = ('depth', 'sizeZ')
+HEIGHT_KEYS = ('height', 'sizeY')
+# size 같은 하위 dict 안에서만 쓰는 짧은 이름 (가구 dict 바로 아래의 x, y, z 는 위치값일 수 있음)
+SHORT_AXIS_KEYS = {'width': ('w', 'x'), 'depth': ('d', 'z'), 'height': ('h', 'y')}
+SIZE_KEYS = ('size', 'dimension', 'dimensions', 'bbox', 'boundingBox')
+UNIT_KEYS = ('unit', 'units', 'sizeUnit', 'lengthUnit')
+
+# JSON 에 단위가 없을 때 사용할 단위 (auto, mm, cm, m, in)
+LIBRARY_SIZE_UNIT = os.getenv('CRAWL_LIBRARY_SIZE_UNIT', 'auto').strip().lower()
+if LIBRARY_SIZE_UNIT != 'auto' and LIBRARY_SIZE_UNIT not in UNIT_TO_MM:
+    raise ValueError(
+        f"CRAWL_LIBRARY_SIZE_UNIT={LIBRARY_SIZE_UNIT!r} 는 지원하지 않는 단위입니다. "
+        f"(auto, {', '.join(UNIT_TO_MM)} 중 하나)"
+    )
+# auto 판단 기준: 가장 긴 변이 이 값 미만이면 m, AMBIGUOUS_MAX 미만이면 cm 일 수도 있음
+METRE_MAX = 10
+AMBIGUOUS_MAX = 100
+
+
+def library_responses(performance_logs):
+    """performance 로그에서 가구 목록 API 의 JSON 응답 requestId 목록 반환"""
+    request_ids = []
+    for entry in performance_logs:
+        try:
+            message = json.loads(entry['message'])['message']
+        except (KeyError, ValueError, TypeError):
+            continue
+        if message.get('method') != 'Network.responseReceived':
+            continue
+        response = message['params']['response']
+        if 'json' not in response.get('mimeType', ''):
+            continue
+        if LIBRARY_API_PATTERN.search(response.get('url', '')):
+            request_ids.append(message['params']['requestId'])
+    return request_ids
+
+
+def finished_requests(performance_logs):
+    """performance 로그에서 응답 본문까지 다 받은(또는 실패한) requestId 집합"""
+    request_ids = set()
+    for entry in performance_logs:
+        try:
+            message = json.loads(entry['message'])['message']
+        except (KeyError, ValueError, TypeError):
+            continue
+        if message.get('method') in ('Network.loadingFinished', 'Network.loadingFailed'):
+            request_ids.add(message['params']['requestId'])
+    return request_ids
+
+
+def _first(obj, keys):
+    for key in keys:
+        value = obj.get(key)
+        if value not in (None, ''):
+            return value
+    return None
+
+
+def _text(value):
+    """문자열 또는 {'name': ...} 형태 값을 문자열로"""
+    if isinstance(value, dict):
+        value = _first(value, NAME_KEYS + ('url', 'src'))
+    return str(value).strip() if value is not None else ''
+
+
+def _number(value):
+    """양수면 float, 아니면 None"""
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return None
+    return value if value > 0 else None
+
+
+def _unit(obj, size):
+    """JSON 에 적힌 치수 단위 (모르는 단위거나 없으면 None)"""
+    for source in (size, obj):
+        if isinstance(source, dict):
+            unit = _first(source, UNIT_KEYS)
+            if isinstance(unit, str) and unit.strip().lower() in UNIT_TO_MM:
+                return unit.strip().lower()
+    return None
+
+
+def convert_dimensions(values, unit=None, default_unit=None):
+    """
+    (W, H, D) 값을 mm(소수점 둘째 자리)로 변환해 (length_x, length_y, length_z, dim_status, 사용한 단위) 반환
+    dim_status: ok / partial / empty(치수 없음) / ambiguous(단위 추정 - cm 일 수도 있음)
+    """
+    default_unit = default_unit or LIBRARY_SIZE_UNIT
+    found = [value for value in values if value is not None]
+    status = 'ok' if len(found) == 3 else ('partial' if found else 'empty')
+    if unit is None:
+        unit = default_unit
+        if unit == 'auto':
+            longest = max(found, default=0)
+            if longest and longest < METRE_MAX:
+                unit = 'm'
+            else:
+                unit = 'mm'
+                if longest and longest < AMBIGUOUS_MAX:
+                    status = 'ambiguous'
+    factor = UNIT_TO_MM[unit]
+    converted = [round(value * factor, 2) if value is not None else None for value in values]
+    return (*converted, status, unit)
+
+
+def _looks_like_item(obj):
+    """가구 한 개로 보이는 dict 인지 (이름 + 썸네일 또는 치수)"""
+    return (
+        isinstance(obj, dict)
+        and _first(obj, NAME_KEYS) is not None
+        and (_first(obj, IMAGE_KEYS) is not None or _first(obj, SIZE_KEYS) is not None
+             or _first(obj, WIDTH_KEYS) is not None)
+    )
+
+
+def find_items(payload):
+    """JSON 안 어디에 있든 가구처럼 보이는 dict 를 모두 찾아 반환"""
+    items = []
+    stack = [payload]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, list):
+            stack.extend(reversed(node))
+        elif isinstance(node, dict):
+            if _looks_like_item(node):
+                items.append(node)
+            else:
+                stack.extend(reversed(list(node.values())))
+    return items
+
+
+def to_furniture(obj, category_id):
+    """
+    API 의 가구 dict 를 crawling.py 의 result 스키마로 변환 (치수는 mm, W→length_x, H→length_y, D→length_z)
+    _dim_status / _dim_unit 에 치수 변환 결과를 함께 넣습니다. (DB 에는 저장하지 않음)
+    """
+    size = _first(obj, SIZE_KEYS)
+    if isinstance(size, dict):
+        w = _number(_first(size, WIDTH_KEYS + SHORT_AXIS_KEYS['width']))
+        h = _number(_first(size, HEIGHT_KEYS + SHORT_AXIS_KEYS['height']))
+        d = _number(_first(size, DEPTH_KEYS + SHORT_AXIS_KEYS['depth']))
+    else:
+        w = _number(_first(obj, WIDTH_KEYS))
+        h = _number(_first(obj, HEIGHT_KEYS))
+        d = _number(_first(obj, DEPTH_KEYS))
+    length_x, length_y, length_z, dim_status, unit = convert_dimensions((w, h, d), _unit(obj, size))
+
+    return {
+        'name': _text(_first(obj, NAME_KEYS)),
+        'description': None,
+        # NOT NULL 제약조건 때문에 0으로 설정 (치수 없는 경우)
+        'length_x': length_x or 0,
+        'length_y': length_y or 0,
+        'length_z': length_z or 0,
+        'image_url': _text(_first(obj, IMAGE_KEYS)) or None,
+        'model_url': None,
+        'price': None,
+        'brand': _text(_first(obj, BRAND_KEYS)),
+        'is_active': False,
+        'category_id': category_id,
+        '_dim_status': dim_status,
+        '_dim_unit': unit,
+    }
@@ -0,0 +1,291 @@
+# 쇼핑몰 가격 검색 어댑터
+# 쇼핑몰마다 다른 것(검색 URL, 가격 셀렉터, 가격 추출 정규식, 요청 속도 제한, JS 렌더링 필요 여부)만
+# MarketplaceAdapter 로 선언하고, 검색 과정은 공통으로 처리합니다.
+# - needs_js=False 인 쇼핑몰은 requests 로 HTML 만 받아서 파싱 (크롬 없이 수 ms)
+# - HTML 에서 가격을 못 찾거나 needs_js=True 면 셀레니움 드라이버로 검색
+# - 가격 셀렉터 후보는 execute_script 한 번으로 모두 확인하고, 쇼핑몰별로 자주 맞은 셀렉터부터 시도
+# - 가격을 못 찾았을 때 봇 차단 페이지(캡차, 접근 거부 등)면 BotDetected 발생 -> site_health 가 검색을 멈춤
+# 새 쇼핑몰은 register_marketplace(MarketplaceAdapter(...)) 로 추가합니다.
+
+import re
+import threading
+import time
+import urllib.parse
+
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.common.exceptions import TimeoutException
+
+import metrics
+
+# requests / bs4 가 없으면 HTML 빠른 경로 없이 셀레니움만 사용
+try:
+    import requests
+    from requests.adapters import HTTPAdapter
+    from bs4 import BeautifulSoup
+except ImportError:
+    requests = None
+    BeautifulSoup = None
+
+# 페이지 로드 최대 대기 시간 (초) - site_health 가 측정값이 쌓이면 줄여 줍니다
+PAGE_LOAD_TIMEOUT = 30
+
+# 봇 차단 / 접근 제한 페이지에 나오는 문구 (소문자로 비교)
+BLOCK_MARKERS = (
+    'captcha',
+    'access denied',
+    'are you a robot',
+    'unusual traffic',
+    'too many requests',
+    'pardon our interruption',
+    '로봇이 아닙니다',
+    '자동입력 방지',
+    '비정상적인 접근',
+    '접근이 차단',
+    '일시적으로 제한',
+)
+# 차단 여부 확인용 페이지 앞부분 (제목 + 본문 앞 3000자)
+PAGE_HEAD_SCRIPT = "return document.title + '\\n' + (document.body ? document.body.innerText.slice(0, 3000) : '');"
+
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+
+# 셀렉터 후보마다 첫 번째 요소의 보이는 텍스트 (없으면 null) - 한 번 호출로 전부 확인
+PRICE_TEXTS_SCRIPT = """
+return arguments[0].map((selector) => {
+  let element = null;
+  try { element = document.querySelector(selector); } catch (e) { return null; }
+  return element ? (element.innerText || element.textContent || '').trim() : null;
+});
+"""
+
+
+class BotDetected(Exception):
+    """쇼핑몰이 봇 차단 / 접근 제한 페이지를 보여 줌"""
+
+
+class SelectorResolver:
+    """쇼핑몰 하나의 가격 셀렉터 후보와 적중 횟수 - 많이 맞은 셀렉터부터 (같으면 등록 순서대로) 시도"""
+
+    def __init__(self, selectors):
+        self.selectors = list(selectors)
+        self._hits = {selector: 0 for selector in self.selectors}
+        self._lock = threading.Lock()
+
+    def ordered(self):
+        with self._lock:
+            return sorted(self.selectors, key=lambda selector: -self._hits[selector])
+
+    def record_hit(self, selector):
+        with self._lock:
+            self._hits[selector] += 1
+
+    def first_price(self, selectors, texts, parse_price):
+        """(셀렉터, 가격) - selectors 순서대로 텍스트에서 가격을 읽을 수 있는 첫 번째, 없으면 None"""
+        for selector, price_text in zip(selectors, texts):
+            if price_text:
+                price = parse_price(price_text)
+                if price:
+                    return selector, price
+        return None
+
+    def stats(self):
+        """[(셀렉터, 적중 횟수)] 시도 순서대로"""
+        with self._lock:
+            hits = dict(self._hits)
+        return [(selector, hits[selector]) for selector in self.ordered()]
+
+
+class MarketplaceAdapter:
+    def __init__(self, name, url_template, price_selectors, price_pattern=r'(\d{3,})',
+                 rate=1 / 3, burst=1, needs_js=True, page_wait=3, selector_timeout=5,
+                 block_markers=BLOCK_MARKERS):
+        """
+        url_template: 검색 URL ({query} 자리에 URL 인코딩된 검색어)
+        price_selectors: 가격 요소 CSS 셀렉터 후보 (처음에는 앞에서부터, 이후엔 많이 맞은 순서로 시도)
+        price_pattern: 가격 텍스트(쉼표 제거 후)에서 가격을 뽑는 정규식 (첫 번째 그룹)
+        rate, burst: 쇼핑몰 요청 속도 제한 (초당 요청 수, 연속 요청 허용량) - price_engine.TokenBucket
+        needs_js: True 면 셀레니움으로만 검색 (JS 로 그리는 페이지)
+        page_wait: 가격을 늦게 그리는 페이지를 위해 가격 대기 시간에 더하는 여유 (초, 고정으로 쉬지는 않음)
+        selector_timeout: 가격 요소를 기다리는 최대 시간 (초, 셀렉터 후보 전체 합쳐서, page_wait 별도)
+        block_markers: 가격을 못 찾은 페이지에 이 문구가 있으면 봇 차단으로 판단
+        """
+        self.name = name
+        self.url_template = url_template
+        self.price_selectors = list(price_selectors)
+        self.resolver = SelectorResolver(price_selectors)
+        self.price_pattern = re.compile(price_pattern)
+        self.rate = rate
+        self.burst = burst
+        self.needs_js = needs_js
+        self.page_wait = page_wait
+        self.selector_timeout = selector_timeout
+        self.block_markers = tuple(marker.lower() for marker in block_markers)
+
+    def search_url(self, query):
+        return self.url_template.format(query=urllib.parse.quote(query))
+
+    def parse_price(self, price_text):
+        """가격 텍스트에서 숫자 가격 추출, 없으면 None"""
+        price_match = self.price_pattern.search(price_text.replace(',', ''))
+        if price_match:
+            return int(price_match.group(1))
+        return None
+
+    def looks_blocked(self, page_text):
+        """페이지 텍스트가 봇 차단 / 접근 제한 페이지인지"""
+        page_text = (page_text or '').lower()
+        return any(marker in page_text for marker in self.block_markers)
+
+    def search_html(self, session, query, timeout=10):
+        """requests 로 받은 HTML 에서 가격 검색 (JS 실행 없음)"""
+        with metrics.timer('html_fetch', site=self.name):
+            response = session.get(self.search_url(query), timeout=timeout)
+        if response.status_code in (403, 429):
+            raise BotDetected(f'HTTP {response.status_code}')
+        response.raise_for_status()
+        soup = BeautifulSoup(response.text, 'html.parser')
+        selectors = self.resolver.ordered()
+        texts = []
+        for selector in selectors:
+            element = soup.select_one(selector)
+            texts.append(element.get_text(strip=True) if element else None)
+        price = self._resolved_price(selectors, texts)
+        if price is None and self.looks_blocked(soup.get_text(' ', strip=True)[:3000]):
+            raise BotDetected('차단 페이지')
+        return price
+
+    def _resolved_price(self, selectors, texts):
+        """셀렉터별 텍스트에서 가격을 고르고 적중 기록"""
+        hit = self.resolver.first_price(selectors, texts, self.parse_price)
+        if hit is None:
+            metrics.inc('selector_miss', site=self.name)
+            return None
+        selector, price = hit
+        self.resolver.record_hit(selector)
+        metrics.inc('selector_hit', site=self.name, selector=selector)
+        return price
+
+    def wait_for_price(self, driver, timeout):
+        """
+        모든 셀렉터 후보를 한 번에 확인하면서, 가격이 읽히는 요소가 나올 때까지 최대 timeout 초 대기
+        (후보가 여러 개여도 못 찾으면 timeout 한 번만 기다림)
+        찾으면 (셀렉터 후보, 후보별 텍스트), 못 찾으면 None
+        """
+        selectors = self.resolver.ordered()
+        found = {}
+
+        def price_texts_ready(d):
+            texts = d.execute_script(PRICE_TEXTS_SCRIPT, selectors)
+            if self.resolver.first_price(selectors, texts, self.parse_price):
+                found['texts'] = texts
+                return True
+            return False
+
+        try:
+            WebDriverWait(driver, timeout, poll_frequency=0.2).until(price_texts_ready)
+        except TimeoutException:
+            return None
+        return selectors, found['texts']
+
+    def search_browser(self, driver, query, health=None):
+        """
+        셀레니움 드라이버로 가격 검색
+        health: site_health.SiteHealth - 주면 페이지 로드 / 셀렉터 대기 시간을 측정값 p95 로 조정하고 기록
+        """
+        page_load_timeout = PAGE_LOAD_TIMEOUT
+        # 페이지를 연 뒤 따로 쉬지 않고, 가격이 보일 때까지 기다리는 시간에 page_wait 를 포함
+        selector_timeout = self.selector_timeout + self.page_wait
+        if health:
+            page_load_timeout = health.adaptive_timeout('page_load', PAGE_LOAD_TIMEOUT, floor=5)
+            selector_timeout = health.adaptive_timeout('selector', selector_timeout, floor=1)
+        # 드라이버는 쇼핑몰끼리 같이 쓰므로 매번 설정
+        driver.set_page_load_timeout(page_load_timeout)
+
+        start = time.perf_counter()
+        with metrics.timer('page_load', site=self.name):
+            driver.get(self.search_url(query))
+        load_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        with metrics.timer('selector_resolve', site=self.name):
+            ready = self.wait_for_price(driver, selector_timeout)
+        if ready is None:
+            metrics.inc('selector_miss', site=self.name)
+            if self.looks_blocked(driver.execute_script(PAGE_HEAD_SCRIPT)):
+                raise BotDetected('차단 페이지')
+            return None
+        if health:
+            # 가격을 찾은 경우만 기록 (실패한 대기 시간이 섞이면 타임아웃이 줄지 않음)
+            health.record_timing('page_load', load_seconds)
+            health.record_timing('selector', time.perf_counter() - start)
+        return self._resolved_price(*ready)
+
+
+def create_http_session(pool_size=10):
+    """연결을 재사용하는 HTTP 세션 (requests 가 없으면 None)"""
+    if requests is None:
+        return None
+    session = requests.Session()
+    http_adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount('http://', http_adapter)
+    session.mount('https://', http_adapter)
+    session.headers.update({'User-Agent': USER_AGENT, 'Accept-Language': 'ko-KR,ko;q=0.9'})
+    return session
+
+
+# 등록된 쇼핑몰 (등록 순서 = 결과 출력 순서)
+MARKETPLACES = {}
+
+
+def register_marketplace(adapter):
+    MARKETPLACES[adapter.name] = adapter
+    return adapter
+
+
+register_marketplace(MarketplaceAdapter(
+    '네이버 쇼핑',
+    'https://shopping.naver.com/search/all?query={query}',
+    [
+        ".price_num__S2p_v",
+        ".price",
+        ".price_area .price",
+        "[class*='price']",
+        ".product_price",
+        ".basicList_price__k_wSV",
+    ],
+    needs_js=True,
+    page_wait=3,
+))
+
+register_marketplace(MarketplaceAdapter(
+    '쿠팡',
+    'https://www.coupang.com/np/search?q={query}',
+    [
+        ".price-value",
+        ".sale-price",
+        ".discount-price",
+        "[class*='price']",
+        ".prod-price .price-value",
+    ],
+    needs_js=True,
+    page_wait=3,
+))
+
+register_marketplace(MarketplaceAdapter(
+    'G마켓',
+    'http://browse.gmarket.co.kr/search?keyword={query}',
+    [".s-price strong"],
+    price_pattern=r'(\d+)',
+    needs_js=False,
+    page_wait=2,
+    selector_timeout=10,
+))
+
+register_marketplace(MarketplaceAdapter(
+    '11번가',
+    'https://search.11st.co.kr/Search.tmall?method=getTotalSearchSeller&isGnb=Y&kwd={query}',
+    [".sale_price"],
+    price_pattern=r'(\d+)',
+    needs_js=False,
+    page_wait=2,
+    selector_timeout=10,
+))
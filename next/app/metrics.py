@@ -0,0 +1,194 @@
+# 크롤러 단계별 시간 / 횟수 측정
+# - timer(이름, 라벨...) : with 문 또는 @timed(이름) 데코레이터로 걸린 시간을 히스토그램에 기록
+# - inc(이름, 라벨...) : 횟수 카운터
+# - ProgressTracker : 처리 속도로 남은 시간(ETA) 계산
+# 환경 변수(.env.local 에서도 설정 가능)
+#   CRAWL_METRICS_JSON=metrics.jsonl   -> 측정값을 한 줄에 하나씩 JSON 로그로 기록
+#   CRAWL_METRICS_PROM=metrics.prom    -> 끝날 때 Prometheus 텍스트 형식으로 저장 (dump_metrics)
+
+import functools
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+# 히스토그램 구간 (초)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+METRIC_PREFIX = 'crawler_'
+
+
+def _label_key(labels):
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def _format_labels(label_key, extra=()):
+    pairs = list(label_key) + list(extra)
+    if not pairs:
+        return ''
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"') for _, value in pairs)
+    return '{' + ','.join(f'{key}="{value}"' for (key, _), value in zip(pairs, escaped)) + '}'
+
+
+class Metrics:
+    def __init__(self, buckets=DEFAULT_BUCKETS, json_log_path=None):
+        """json_log_path 를 주지 않으면 CRAWL_METRICS_JSON 환경 변수를 사용 (load_dotenv 이후 값)"""
+        self.buckets = buckets
+        self.json_log_path = json_log_path
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._histograms = {}
+
+    def _log(self, record):
+        path = self.json_log_path or os.getenv('CRAWL_METRICS_JSON')
+        if not path:
+            return
+        record['ts'] = round(time.time(), 3)
+        line = json.dumps(record, ensure_ascii=False)
+        with self._lock:
+            with open(path, 'a', encoding='utf-8') as f:
+                f.write(line + '\n')
+
+    def inc(self, name, value=1, **labels):
+        """카운터 증가"""
+        key = (name, _label_key(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+        self._log({'type': 'counter', 'name': name, 'labels': labels, 'value': value})
+
+    def observe(self, name, seconds, **labels):
+        """걸린 시간 한 건을 히스토그램에 기록"""
+        key = (name, _label_key(labels))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = {'buckets': [0] * len(self.buckets), 'count': 0, 'sum': 0.0, 'max': 0.0}
+                self._histograms[key] = histogram
+            for i, bound in enumerate(self.buckets):
+                if seconds <= bound:
+                    histogram['buckets'][i] += 1
+            histogram['count'] += 1
+            histogram['sum'] += seconds
+            histogram['max'] = max(histogram['max'], seconds)
+        self._log({'type': 'timer', 'name': name, 'labels': labels, 'seconds': round(seconds, 4)})
+
+    @contextmanager
+    def timer(self, name, **labels):
+        """with metrics.timer('page_load', site='쿠팡'): ... - 예외가 나도 걸린 시간은 기록"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def timed(self, name, **labels):
+        """함수 실행 시간을 기록하는 데코레이터"""
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.timer(name, **labels):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def event(self, name, **fields):
+        """진행 상황 등 구조화된 로그 한 줄 (JSON 로그를 켰을 때만 기록)"""
+        self._log({'type': 'event', 'name': name, **fields})
+
+    def snapshot(self):
+        """현재까지의 카운터 / 히스토그램 요약 (JSON 으로 저장 가능한 dict)"""
+        with self._lock:
+            counters = [
+                {'name': name, 'labels': dict(label_key), 'value': value}
+                for (name, label_key), value in sorted(self._counters.items())
+            ]
+            histograms = [
+                {'name': name, 'labels': dict(label_key), 'count': h['count'],
+                 'sum': round(h['sum'], 4), 'avg': round(h['sum'] / h['count'], 4) if h['count'] else 0.0,
+                 'max': round(h['max'], 4)}
+                for (name, label_key), h in sorted(self._histograms.items())
+            ]
+        return {'counters': counters, 'histograms': histograms}
+
+    def prometheus_text(self):
+        """Prometheus 텍스트 형식 (counter: crawler_<이름>_total, 시간: crawler_<이름>_seconds 히스토그램)"""
+        lines = []
+        with self._lock:
+            typed = set()
+            for (name, label_key), value in sorted(self._counters.items()):
+                metric = f'{METRIC_PREFIX}{name}_total'
+                if metric not in typed:
+                    lines.append(f'# TYPE {metric} counter')
+                    typed.add(metric)
+                lines.append(f'{metric}{_format_labels(label_key)} {value}')
+            for (name, label_key), h in sorted(self._histograms.items()):
+                metric = f'{METRIC_PREFIX}{name}_seconds'
+                if metric not in typed:
+                    lines.append(f'# TYPE {metric} histogram')
+                    typed.add(metric)
+                for bound, count in zip(self.buckets, h['buckets']):
+                    lines.append(f'{metric}_bucket{_format_labels(label_key, [("le", bound)])} {count}')
+                lines.append(f'{metric}_bucket{_format_labels(label_key, [("le", "+Inf")])} {h["count"]}')
+                lines.append(f'{metric}_sum{_format_labels(label_key)} {h["sum"]:.6f}')
+                lines.append(f'{metric}_count{_format_labels(label_key)} {h["count"]}')
+        return '\n'.join(lines) + '\n'
+
+    def print_summary(self, label=''):
+        """단계별 총 시간이 큰 순서로 출력 - 어디서 시간이 가장 많이 드는지 확인용"""
+        histograms = sorted(self.snapshot()['histograms'], key=lambda h: h['sum'], reverse=True)
+        for h in histograms:
+            labels = ', '.join(f'{key}={value}' for key, value in h['labels'].items())
+            print(f"{label}[측정] {h['name']}{f' ({labels})' if labels else ''}: "
+                  f"{h['count']}회, 총 {h['sum']:.2f}초, 평균 {h['avg'] * 1000:.0f}ms, 최대 {h['max'] * 1000:.0f}ms")
+
+
+class ProgressTracker:
+    def __init__(self, total, name='progress', metrics=None):
+        """total 개 중 몇 개 처리했는지와, 지금까지의 처리 속도로 계산한 남은 시간"""
+        self.total = total
+        self.name = name
+        self.metrics = metrics
+        self.done = 0
+        self._start = time.monotonic()
+
+    def update(self, done=None):
+        """처리 개수 갱신 (done 을 주지 않으면 1 증가) 후 상태 dict 반환"""
+        self.done = self.done + 1 if done is None else done
+        elapsed = time.monotonic() - self._start
+        rate = self.done / elapsed if elapsed > 0 else 0.0
+        remaining = self.total - self.done
+        status = {
+            'done': self.done,
+            'total': self.total,
+            'percent': round(self.done / self.total * 100, 1) if self.total else 100.0,
+            'rate_per_min': round(rate * 60, 2),
+            'eta_seconds': round(remaining / rate) if rate > 0 else None,
+        }
+        if self.metrics:
+            self.metrics.event(self.name, **status)
+        return status
+
+    def format(self, status):
+        eta = status['eta_seconds']
+        eta_text = f"{eta // 3600}:{eta % 3600 // 60:02d}:{eta % 60:02d}" if eta is not None else '계산 중'
+        return (f"진행률: {status['percent']:.1f}% ({status['done']}/{status['total']}), "
+                f"분당 {status['rate_per_min']:.1f}개, 남은 시간 {eta_text}")
+
+
+# 크롤러 전체에서 같이 쓰는 기본 측정기
+METRICS = Metrics()
+timer = METRICS.timer
+timed = METRICS.timed
+inc = METRICS.inc
+observe = METRICS.observe
+
+
+def dump_metrics(suffix=''):
+    """CRAWL_METRICS_PROM 이 설정돼 있으면 Prometheus 텍스트 파일로 저장 (여러 프로세스면 suffix 로 구분)"""
+    path = os.getenv('CRAWL_METRICS_PROM')
+    if not path:
+        return None
+    path += suffix
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(METRICS.prometheus_text())
+    return path
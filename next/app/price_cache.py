@@ -0,0 +1,121 @@
+# 쇼핑몰 가격 검색 결과 캐시 (SQLite 파일)
+# optimize_search_query 결과가 같은 가구들은 같은 검색어가 되므로,
+# (검색어, 쇼핑몰) -> 가격 을 저장해 두고 ttl 동안은 다시 크롤링하지 않습니다.
+# - 가격을 못 찾은 결과도 negative_ttl 동안 저장합니다
+# - max_entries 를 넘으면 가장 오래 사용하지 않은 항목부터 지웁니다 (LRU)
+# - 여러 프로세스가 같은 파일을 함께 써도 됩니다
+
+import sqlite3
+import threading
+import time
+
+from crawl_data import data_path
+
+DEFAULT_CACHE_PATH = data_path('price_cache.sqlite3')
+
+
+class PriceCache:
+    def __init__(self, path=DEFAULT_CACHE_PATH, ttl=7 * 24 * 3600, negative_ttl=6 * 3600, max_entries=100000):
+        """ttl, negative_ttl 단위는 초"""
+        self.path = path
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_entries = max_entries
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._writes_since_evict = 0
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS price_cache (
+                query TEXT NOT NULL,
+                site TEXT NOT NULL,
+                price INTEGER,
+                fetched_at REAL NOT NULL,
+                last_access REAL NOT NULL,
+                PRIMARY KEY (query, site)
+            )
+        """)
+        self._conn.execute('CREATE INDEX IF NOT EXISTS idx_price_cache_last_access ON price_cache (last_access)')
+        self._conn.commit()
+
+    def get(self, query, site):
+        """(캐시 적중 여부, 가격) 반환. 가격을 못 찾았던 기록이면 (True, None)"""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT price, fetched_at FROM price_cache WHERE query = ? AND site = ?',
+                (query, site)
+            ).fetchone()
+
+            if row is not None:
+                price, fetched_at = row
+                ttl = self.ttl if price is not None else self.negative_ttl
+                if now - fetched_at < ttl:
+                    self._conn.execute(
+                        'UPDATE price_cache SET last_access = ? WHERE query = ? AND site = ?',
+                        (now, query, site)
+                    )
+                    self._conn.commit()
+                    self.hits += 1
+                    return True, price
+
+            self.misses += 1
+            return False, None
+
+    def set(self, query, site, price):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO price_cache (query, site, price, fetched_at, last_access) VALUES (?, ?, ?, ?, ?)',
+                (query, site, price, now, now)
+            )
+            # 매번 COUNT 하지 않도록 일정 횟수마다 정리
+            self._writes_since_evict += 1
+            if self._writes_since_evict >= 100:
+                self._evict()
+                self._writes_since_evict = 0
+            self._conn.commit()
+
+    def _evict(self):
+        """max_entries 초과분을 오래 사용하지 않은 순서로 삭제"""
+        count = self._conn.execute('SELECT COUNT(*) FROM price_cache').fetchone()[0]
+        overflow = count - self.max_entries
+        if overflow > 0:
+            self._conn.execute(
+                'DELETE FROM price_cache WHERE rowid IN '
+                '(SELECT rowid FROM price_cache ORDER BY last_access LIMIT ?)',
+                (overflow,)
+            )
+            self.evictions += overflow
+
+    def clear_expired(self):
+        """ttl 이 지난 항목 삭제"""
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                'DELETE FROM price_cache WHERE (price IS NOT NULL AND fetched_at < ?) OR (price IS NULL AND fetched_at < ?)',
+                (now - self.ttl, now - self.negative_ttl)
+            )
+            self._evict()
+            self._conn.commit()
+
+    def stats(self):
+        total = self.hits + self.misses
+        hit_rate = self.hits / total * 100 if total else 0.0
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': hit_rate,
+        }
+
+    def close(self):
+        with self._lock:
+            self._evict()
+            self._conn.commit()
+            self._conn.close()
@@ -0,0 +1,188 @@
+# asyncio 기반 가격 검색 엔진
+# 쇼핑몰(호스트)마다 토큰 버킷으로 초당 요청 수(rate)와 연속 요청 허용량(burst)을 지키면서,
+# 여러 가구의 검색을 동시에 진행합니다. 고정 sleep 대신 버킷이 허용하는 시점에 바로 요청합니다.
+# 셀레니움 / requests 검색 함수는 블로킹이므로 스레드 풀에서 실행합니다.
+# site_health 를 주면 서킷이 열린 쇼핑몰은 토큰을 기다리지도 않고 건너뜁니다.
+# 캐시에는 검색이 정상적으로 끝난 결과(가격 찾음 / 가격 없음)만 저장합니다. 오류나 차단으로 못 찾은 것은
+# 다음에 다시 검색해야 하므로 저장하지 않습니다.
+
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+
+import metrics
+
+# 캐시해도 되는 검색 결과 (error, blocked 는 쇼핑몰 상태 문제이므로 캐시하지 않음)
+CACHEABLE_OUTCOMES = ('ok', 'miss')
+
+
+class TokenBucket:
+    def __init__(self, rate, burst=1):
+        """
+        rate: 초당 요청 수 (예: 1/3 이면 3초에 한 번)
+        burst: 쉬고 있다가 연달아 보낼 수 있는 최대 요청 수
+        """
+        self.rate = rate
+        self.burst = burst
+        self._tokens = burst
+        self._updated = time.monotonic()
+
+    async def acquire(self):
+        """토큰 하나를 예약하고, 토큰이 찰 때까지 대기"""
+        # 이벤트 루프 안에서 await 없이 계산 -> 예약이 겹치지 않으므로 락이 필요 없음
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+        self._tokens -= 1
+        if self._tokens < 0:
+            await asyncio.sleep(-self._tokens / self.rate)
+
+
+class RateLimitError(Exception):
+    """검색 스레드에서 토큰을 받지 못함 (이벤트 루프가 끝났거나 대기 시간 초과)"""
+
+
+class PriceCrawlEngine:
+    def __init__(self, marketplaces, rate_limits, price_cache=None, max_in_flight=1,
+                 parallel_sites=False, item_deadline=60, site_health=None, acquire_timeout=60):
+        """
+        marketplaces: [(쇼핑몰 이름, 검색 함수)] - 검색 함수는 검색어를 받아 (가격 또는 None, 결과) 반환
+                      결과: 'ok', 'miss', 'error', 'blocked' (CACHEABLE_OUTCOMES 인 것만 캐시)
+        rate_limits: {쇼핑몰 이름: (rate, burst)}
+        max_in_flight: 동시에 검색하는 가구 수
+        parallel_sites: True 면 가구 하나의 쇼핑몰들을 동시에 검색 (item_deadline 초까지만 대기)
+        site_health: {쇼핑몰 이름: site_health.SiteHealth} - 결과 기록은 검색 함수가 합니다
+        acquire_timeout: acquire_from_thread 가 토큰을 기다리는 최대 시간(초)
+        프로세스마다 버킷이 따로 있으므로, 여러 프로세스로 나눠 돌릴 때는 rate, burst 를 프로세스 수로 나눠서 주세요.
+        """
+        self.marketplaces = marketplaces
+        self.buckets = {site: TokenBucket(*rate_limits[site]) for site, _ in marketplaces}
+        self.price_cache = price_cache
+        self.max_in_flight = max_in_flight
+        self.parallel_sites = parallel_sites
+        self.item_deadline = item_deadline
+        self.site_health = site_health or {}
+        self.acquire_timeout = acquire_timeout
+        # 검색 스레드마다 자신을 실행한 이벤트 루프 (엔진 밖에서 부른 검색 함수는 없음)
+        self._thread_state = threading.local()
+        self._executor = ThreadPoolExecutor(max_workers=max_in_flight * len(marketplaces))
+
+    def close(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def acquire_from_thread(self, site):
+        """
+        검색 함수(스레드) 안에서 같은 쇼핑몰에 요청을 한 번 더 보내기 전에 토큰 받기 (HTML 실패 후 브라우저 등)
+        엔진 밖에서 검색 함수를 바로 부른 경우에는 기다리지 않음
+        루프가 그 사이 끝났거나 acquire_timeout 초 안에 토큰을 못 받으면 RateLimitError (요청을 보내지 않도록)
+        """
+        loop = getattr(self._thread_state, 'loop', None)
+        if loop is None:
+            return
+        with metrics.timer('rate_limit_wait', site=site):
+            try:
+                future = asyncio.run_coroutine_threadsafe(self.buckets[site].acquire(), loop)
+            except RuntimeError as e:
+                # 시간 초과로 버려진 검색이 asyncio.run 이 끝난 뒤에도 계속 실행 중인 경우
+                raise RateLimitError(f"{site} 토큰을 받을 수 없습니다: {e}") from e
+            try:
+                future.result(timeout=self.acquire_timeout)
+            except FutureTimeoutError as e:
+                # 루프가 멈춰 예약이 실행되지 않은 경우에도 스레드가 영원히 기다리지 않도록
+                future.cancel()
+                metrics.inc('rate_limit_timeout', site=site)
+                raise RateLimitError(f"{site} 토큰 대기 {self.acquire_timeout}초 초과") from e
+
+    def _run_search(self, loop, search_func, query):
+        """스레드 풀에서 검색 함수 실행 (acquire_from_thread 가 쓸 루프를 스레드에 기록)"""
+        self._thread_state.loop = loop
+        try:
+            return search_func(query)
+        finally:
+            self._thread_state.loop = None
+
+    async def _search_site(self, site, search_func, query):
+        """
+        캐시에 있으면 캐시 값을, 없으면 쇼핑몰 토큰을 받은 뒤 검색하고 캐시에 저장 - (가격 또는 None, 결과) 반환
+        서킷이 열려 있으면 결과 'skipped', 검색 중 예외가 나면 'error' (둘 다 캐시하지 않음)
+        """
+        if self.price_cache:
+            hit, price = self.price_cache.get(query, site)
+            metrics.inc('price_cache', site=site, result='hit' if hit else 'miss')
+            if hit:
+                return price, 'ok' if price else 'miss'
+
+        # 건너뛴 결과는 캐시하지 않음 (쇼핑몰이 살아나면 다시 검색)
+        health = self.site_health.get(site)
+        if health and not health.allow():
+            metrics.inc('circuit_skip', site=site)
+            return None, 'skipped'
+
+        with metrics.timer('rate_limit_wait', site=site):
+            await self.buckets[site].acquire()
+        loop = asyncio.get_running_loop()
+        try:
+            price, outcome = await loop.run_in_executor(self._executor, self._run_search, loop, search_func, query)
+        except Exception as e:
+            print(f"  - {site}: 검색 오류 {e}")
+            return None, 'error'
+
+        if self.price_cache and outcome in CACHEABLE_OUTCOMES:
+            self.price_cache.set(query, site, price)
+        return price, outcome
+
+    async def lookup(self, query):
+        """
+        모든 쇼핑몰에서 검색해 [(쇼핑몰 이름, 가격 또는 None, 결과)] 반환 (등록 순서 유지)
+        결과: 'ok', 'miss', 'error', 'blocked', 'skipped'(서킷 열림), 'timeout'(item_deadline 초과)
+        """
+        if not self.parallel_sites:
+            results = []
+            for site, search_func in self.marketplaces:
+                results.append((site, *await self._search_site(site, search_func, query)))
+            return results
+
+        tasks = {
+            site: asyncio.ensure_future(self._search_site(site, search_func, query))
+            for site, search_func in self.marketplaces
+        }
+        _, pending = await asyncio.wait(tasks.values(), timeout=self.item_deadline)
+        results = []
+        for site, task in tasks.items():
+            if task in pending:
+                # 실행 중인 셀레니움 작업은 취소할 수 없으므로 결과만 버립니다
+                task.cancel()
+                print(f"  - {site}: {self.item_deadline}초 내 응답 없음")
+                results.append((site, None, 'timeout'))
+            elif task.exception() is not None:
+                print(f"  - {site}: 검색 오류 {task.exception()}")
+                results.append((site, None, 'error'))
+            else:
+                results.append((site, *task.result()))
+        return results
+
+    async def run(self, queries, on_result):
+        """
+        queries: (키, 검색어) 들 - 최대 max_in_flight 개씩 동시에 검색
+        on_result(키, 검색어, 결과 목록) 은 검색이 끝나는 순서대로 호출됩니다.
+        """
+        semaphore = asyncio.Semaphore(self.max_in_flight)
+        tasks = set()
+
+        async def search_one(key, query):
+            try:
+                on_result(key, query, await self.lookup(query))
+            except Exception as e:
+                print(f"'{query}' 가격 검색 처리 중 오류: {e}")
+            finally:
+                semaphore.release()
+
+        for key, query in queries:
+            await semaphore.acquire()
+            task = asyncio.ensure_future(search_one(key, query))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+
+        if tasks:
+            await asyncio.gather(*tasks)
@@ -0,0 +1,203 @@
+# 가격 갱신 스케줄러
+# price IS NULL 인 가구를 furniture_id 순서로 한 번 채우는 대신, 검색할 가치가 큰 가구부터 골라 줍니다.
+# 점수 = 오래된 정도(0~1) * (1 + popularity_weight * 인기도(0~1))
+# - 오래된 정도: 가격을 저장한 뒤(price_updated_at) 지난 일수 / max_age_days, 가격이 없으면 1
+#   (updated_at 은 가구 정보만 갱신해도 바뀌므로 쓰지 않음)
+# - 인기도: room.room_objects 에 배치된 횟수 (log 스케일, 가장 많이 배치된 가구가 1)
+# min_age_days 보다 최근에 갱신된 가격은 후보에서 뺍니다.
+# 검색했지만 가격을 못 찾은 가구는 furniture.price_refresh_attempts 에 기록하고(RefreshAttemptLog),
+# 연속으로 못 찾은 횟수만큼 min_age_days 를 두 배씩 늘린 기간(최대 max_age_days) 동안 후보에서 뺍니다.
+# (기록하지 않으면 오래된 정도가 그대로라 매번 같은 가구가 상위 N 개를 차지함)
+# 가구 테이블은 묶음씩 읽고 점수 상위 N 개만 힙에 남기므로, 메모리는 가구 수가 아니라 N 에 비례합니다.
+
+import heapq
+import time
+
+import numpy as np
+from sqlalchemy import text
+
+from furniture_db import iter_furniture_chunks
+import metrics
+
+# room_objects 에는 furniture_id 인덱스가 없으므로 가구마다 세지 않고 한 번에 집계
+PLACEMENT_COUNT_SQL = """
+SELECT furniture_id::text AS furniture_id, count(*) AS placements
+FROM room.room_objects
+GROUP BY furniture_id
+"""
+ATTEMPTS_TABLE = 'furniture.price_refresh_attempts'
+ATTEMPTS_MIGRATION = 'prisma/sql/002_price_refresh_attempts.sql'
+PRICE_UPDATED_AT_MIGRATION = 'prisma/sql/003_furnitures_price_updated_at.sql'
+# 갱신 후보 - 가격이 없거나 min_age_days 보다 오래된 가격 중, 최근에 검색해서 못 찾은 가구는 제외
+CANDIDATE_WHERE = f"""
+(price IS NULL OR price_updated_at IS NULL OR price_updated_at < now() - make_interval(days => :min_age_days))
+AND NOT EXISTS (
+    SELECT 1 FROM {ATTEMPTS_TABLE} AS a
+    WHERE a.furniture_id = furnitures.furniture_id
+      AND a.misses > 0
+      AND a.attempted_at > now() - interval '1 day'
+          * least(:max_age_days, :min_age_days * power(2, least(a.misses, 10) - 1))
+)
+"""
+CANDIDATE_COLUMNS = [
+    'name',
+    'price IS NULL AS unpriced',
+    'extract(epoch FROM now() - price_updated_at) / 86400 AS age_days',
+]
+
+
+def load_placement_counts(engine):
+    """{furniture_id: 방에 배치된 횟수}"""
+    with engine.connect() as connection:
+        rows = connection.execute(text(PLACEMENT_COUNT_SQL)).fetchall()
+    return {furniture_id: placements for furniture_id, placements in rows}
+
+
+def refresh_scores(chunk, placements, max_placements, max_age_days, popularity_weight):
+    """가구 묶음(unpriced, age_days 컬럼)의 갱신 점수 배열"""
+    age_days = chunk['age_days'].astype(float).fillna(max_age_days).to_numpy()
+    staleness = np.where(chunk['unpriced'].to_numpy(dtype=bool), 1.0, np.clip(age_days / max_age_days, 0, 1))
+    counts = chunk['furniture_id'].astype(str).map(placements).fillna(0).to_numpy(dtype=float)
+    popularity = np.log1p(counts) / np.log1p(max_placements) if max_placements else np.zeros(len(chunk))
+    return staleness * (1 + popularity_weight * popularity)
+
+
+class MissingRefreshSchemaError(RuntimeError):
+    """가격 갱신에 필요한 테이블 / 컬럼이 없음"""
+
+
+def require_refresh_schema(engine):
+    """시도 기록 테이블이나 price_updated_at 컬럼이 없으면 MissingRefreshSchemaError (마이그레이션 안내)"""
+    with engine.connect() as connection:
+        table = connection.execute(text("SELECT to_regclass(:table_name)"), {'table_name': ATTEMPTS_TABLE}).scalar()
+        column = connection.execute(text("""
+            SELECT 1 FROM information_schema.columns
+            WHERE table_schema = 'furniture' AND table_name = 'furnitures' AND column_name = 'price_updated_at'
+        """)).scalar()
+    if table is None:
+        raise MissingRefreshSchemaError(
+            f"가격 갱신 시도 기록 테이블({ATTEMPTS_TABLE})이 없습니다. {ATTEMPTS_MIGRATION} 을 먼저 실행하세요."
+        )
+    if column is None:
+        raise MissingRefreshSchemaError(
+            f"furniture.furnitures.price_updated_at 컬럼이 없습니다. {PRICE_UPDATED_AT_MIGRATION} 을 먼저 실행하세요."
+        )
+
+
+class RefreshAttemptLog:
+    """
+    갱신 검색 결과(가격을 찾았는지)를 모았다가 batch_size 개 또는 flush_interval 초마다 한 번에 기록
+    못 찾으면 misses + 1, 찾으면 misses = 0
+
+    with RefreshAttemptLog(engine) as attempts:
+        attempts.add(furniture_id, found)
+    """
+
+    def __init__(self, engine, batch_size=50, flush_interval=30.0):
+        self.engine = engine
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+
+        self._buffer = []
+        self._last_flush = time.monotonic()
+
+        self.recorded_count = 0
+        self.failed_count = 0
+
+    def add(self, furniture_id, found):
+        self._buffer.append((str(furniture_id), bool(found)))
+        if len(self._buffer) >= self.batch_size or time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        """INSERT ... ON CONFLICT 한 문장으로 기록"""
+        self._last_flush = time.monotonic()
+        if not self._buffer:
+            return 0
+
+        # 같은 가구가 두 번 들어 있으면 ON CONFLICT 가 실패하므로 마지막 결과만
+        batch, self._buffer = list(dict(self._buffer).items()), []
+        values = []
+        params = {}
+        for i, (furniture_id, found) in enumerate(batch):
+            values.append(f"(CAST(:id{i} AS uuid), CAST(:found{i} AS boolean))")
+            params[f'id{i}'] = furniture_id
+            params[f'found{i}'] = found
+
+        upsert_query = f"""
+        INSERT INTO {ATTEMPTS_TABLE} AS a (furniture_id, attempted_at, misses)
+        SELECT v.furniture_id, now(), CASE WHEN v.found THEN 0 ELSE 1 END
+        FROM (VALUES {', '.join(values)}) AS v(furniture_id, found)
+        ON CONFLICT (furniture_id) DO UPDATE
+        SET attempted_at = EXCLUDED.attempted_at,
+            misses = CASE WHEN EXCLUDED.misses = 0 THEN 0 ELSE a.misses + 1 END
+        """
+        try:
+            with metrics.timer('db_flush', table='price_refresh_attempts', method='values'):
+                with self.engine.begin() as connection:
+                    connection.execute(text(upsert_query), params)
+            metrics.inc('db_rows_written', len(batch), table='price_refresh_attempts')
+            self.recorded_count += len(batch)
+            return len(batch)
+        except Exception as e:
+            # 기록하지 못하면 다음 실행에서 다시 후보가 될 뿐이므로 크롤링은 계속
+            self.failed_count += len(batch)
+            metrics.inc('db_rows_failed', len(batch), table='price_refresh_attempts')
+            print(f"  ✗ {len(batch)}개 갱신 시도 기록 실패: {e}")
+            return 0
+
+    def close(self):
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class RefreshScheduler:
+    def __init__(self, engine, max_age_days=30, min_age_days=7, popularity_weight=2.0, chunk_size=5000):
+        """
+        max_age_days: 이만큼 지난 가격은 가격이 없는 가구와 같은 정도로 오래된 것으로 봄
+        min_age_days: 이보다 최근에 갱신된 가격은 다시 검색하지 않음
+        popularity_weight: 인기도가 점수에 주는 영향 (0 이면 오래된 순서만)
+        """
+        self.engine = engine
+        self.max_age_days = max_age_days
+        self.min_age_days = min_age_days
+        self.popularity_weight = popularity_weight
+        self.chunk_size = chunk_size
+
+    def plan(self, limit):
+        """점수가 높은 순서로 최대 limit 개의 (furniture_id, 이름, 점수) 목록"""
+        require_refresh_schema(self.engine)
+        with metrics.timer('refresh_plan'):
+            placements = load_placement_counts(self.engine)
+            max_placements = max(placements.values(), default=0)
+
+            # (점수, furniture_id, 이름) 최소 힙 - 맨 앞이 지금까지의 상위 limit 개 중 가장 낮은 점수
+            heap = []
+            scanned = 0
+            chunks = iter_furniture_chunks(
+                self.engine, CANDIDATE_COLUMNS, CANDIDATE_WHERE,
+                {'min_age_days': self.min_age_days, 'max_age_days': self.max_age_days},
+                chunk_size=self.chunk_size
+            )
+            for chunk in chunks:
+                scanned += len(chunk)
+                chunk['score'] = refresh_scores(
+                    chunk, placements, max_placements, self.max_age_days, self.popularity_weight
+                )
+                # 묶음 안에서 먼저 상위 limit 개만 추려서 힙에 넣음
+                for row in chunk.nlargest(limit, 'score').itertuples(index=False):
+                    entry = (float(row.score), str(row.furniture_id), row.name)
+                    if len(heap) < limit:
+                        heapq.heappush(heap, entry)
+                    elif entry > heap[0]:
+                        heapq.heapreplace(heap, entry)
+
+        metrics.inc('refresh_candidates', scanned)
+        print(f"갱신 후보 {scanned}개 중 점수 상위 {len(heap)}개를 선택했습니다. "
+              f"(방에 배치된 가구 {len(placements)}종)")
+        return [(furniture_id, name, score) for score, furniture_id, name in sorted(heap, reverse=True)]
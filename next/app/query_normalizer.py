@@ -0,0 +1,80 @@
+# 가구 이름 -> 쇼핑몰 검색어 변환
+# 괄호 내용, 색상, 상태, 크기 정보를 정규식 한 번으로 지우고 앞의 두 단어만 남깁니다.
+# 같은 이름은 항상 같은 검색어가 나오므로 가격 캐시 / 중복 제거 키로 그대로 사용할 수 있습니다.
+# 출력 고정: python query_normalizer.py 로 NORMALIZER_CORPUS 결과를 확인합니다.
+
+import re
+import unicodedata
+from functools import lru_cache
+
+import pandas as pd
+
+# 제거할 부분 (하나의 패턴으로 합쳐서 한 번만 검사)
+REMOVE_PATTERN = re.compile('|'.join([
+    r'\([^)]*\)',  # 괄호와 괄호 내용
+    r'그레이|화이트|블랙|브라운|베이지',  # 색상
+    r'펼친상태|접힌상태|완성품',  # 상태
+    # 크기 정보: 1200x600(x750), 120cm, 12.5 mm, 단독 cm/mm
+    # (영문 단어 안의 cm/mm 는 지우지 않음 - Commode, Hammock 등)
+    r'\d+(?:\.\d+)?(?:\s*[x×]\s*\d+(?:\.\d+)?)+(?:\s*(?i:cm|mm)(?![A-Za-z]))?',
+    r'\d+(?:\.\d+)?\s*(?i:cm|mm)(?![A-Za-z])',
+    r'(?<![A-Za-z])(?i:cm|mm)(?![A-Za-z])',
+]))
+
+# 검색어에 남길 최대 단어 수
+MAX_QUERY_WORDS = 2
+
+# (가구 이름, 기대 검색어) - 변환 규칙을 바꾸면 여기 결과도 함께 확인
+NORMALIZER_CORPUS = [
+    ('모던 화이트 소파 3인용 (패브릭)', '모던 소파'),
+    ('리클라이너 (펼친상태) 그레이', '리클라이너'),
+    ('원목 식탁 4인용 완성품', '원목 식탁'),
+    ('슬림 책상 1200x600', '슬림 책상'),
+    ('책장 800 x 300 x 1800 mm', '책장'),
+    ('서랍장 120cm', '서랍장'),
+    ('수납장 45.5cm 3단', '수납장 3단'),
+    ('Commode 서랍장 120cm', 'Commode 서랍장'),
+    ('Hammock 의자', 'Hammock 의자'),
+    ('CMYK 스탠드 조명', 'CMYK 스탠드'),
+    ('접이식 테이블 (폭 80cm) 블랙', '접이식 테이블'),
+    ('４인용　식탁 세트', '4인용 식탁'),
+    ('침대 프레임 Q 150×200', '침대 프레임'),
+    ('  브라운  ', ''),
+    ('', ''),
+]
+
+
+@lru_cache(maxsize=50000)
+def normalize_query(furniture_name):
+    """가구 이름을 검색어로 변환 - 불필요한 단어 제거 및 핵심 키워드(앞 두 단어) 추출"""
+    # 전각 문자 / ㎝ 같은 기호를 일반 문자로 통일
+    text = unicodedata.normalize('NFKC', furniture_name)
+    text = REMOVE_PATTERN.sub('', text)
+    # split() 으로 연속 공백 / 앞뒤 공백도 함께 정리
+    return ' '.join(text.split()[:MAX_QUERY_WORDS])
+
+
+def normalize_queries(names):
+    """가구 이름 Series(또는 목록) 전체를 검색어 Series 로 변환 (중복 이름은 한 번만 계산, 빈 값은 그대로)"""
+    names = pd.Series(names)
+    queries = {name: normalize_query(name) for name in names.dropna().unique()}
+    return names.map(queries)
+
+
+def check_corpus():
+    """NORMALIZER_CORPUS 결과가 기대값과 다른 항목 목록 반환"""
+    mismatches = []
+    for furniture_name, expected in NORMALIZER_CORPUS:
+        actual = normalize_query(furniture_name)
+        if actual != expected:
+            mismatches.append((furniture_name, expected, actual))
+    return mismatches
+
+
+if __name__ == "__main__":
+    mismatches = check_corpus()
+    for furniture_name, expected, actual in mismatches:
+        print(f"'{furniture_name}': 기대값 '{expected}', 결과 '{actual}'")
+    print(f"검색어 변환 확인: {len(NORMALIZER_CORPUS) - len(mismatches)}/{len(NORMALIZER_CORPUS)}개 일치")
+    if mismatches:
+        raise SystemExit(1)
@@ -0,0 +1,130 @@
+# 쇼핑몰별 상태 추적 (서킷 브레이커 + 적응형 타임아웃)
+# 쇼핑몰이 우리를 막았거나 페이지 구조가 바뀌면 남은 가구마다 페이지 로드 + 셀렉터 대기 시간을 그대로 버리게 됩니다.
+# - 최근 결과(window 개)의 실패율이 높거나 연속으로 실패하면, 또는 봇 차단 페이지가 나오면 "열림" -> 검색 건너뜀
+# - cooldown 초가 지나면 한 번만 시험 검색(probe) -> 성공하면 다시 "닫힘", 실패하면 cooldown 을 두 배로 늘려 다시 열림
+# - 페이지 로드 / 가격 표시까지 걸린 시간의 p95 로 타임아웃을 조정 (느린 사이트는 여유 있게, 빠른 사이트는 짧게)
+
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+import metrics
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class SiteHealth:
+    def __init__(self, site, window=20, failure_threshold=0.85, min_samples=10, max_consecutive=8,
+                 cooldown=600, max_cooldown=3600, timing_window=50):
+        """
+        window: 실패율을 계산할 최근 결과 수
+        failure_threshold: 이 비율 이상 실패하면 열림 (min_samples 개 이상 쌓였을 때)
+        max_consecutive: 연속 실패가 이만큼이면 실패율과 관계없이 열림
+        cooldown: 열린 뒤 시험 검색까지 기다릴 시간(초) - 시험 검색이 실패할 때마다 두 배 (최대 max_cooldown)
+        timing_window: p95 계산에 쓰는 최근 측정값 수
+        """
+        self.site = site
+        self.failure_threshold = failure_threshold
+        self.min_samples = min_samples
+        self.max_consecutive = max_consecutive
+        self.base_cooldown = cooldown
+        self.max_cooldown = max_cooldown
+
+        self._lock = threading.Lock()
+        self._outcomes = deque(maxlen=window)
+        self._timings = {}
+        self._timing_window = timing_window
+        self._consecutive_failures = 0
+        self._cooldown = cooldown
+        self._open_until = 0.0
+        self._probing = False
+        self.state = CLOSED
+        self.skipped_count = 0
+        self.open_count = 0
+
+    def allow(self):
+        """지금 이 쇼핑몰을 검색해도 되는지 (열려 있으면 False, cooldown 이 지났으면 시험 검색 한 번 허용)"""
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN and time.monotonic() >= self._open_until:
+                self.state = HALF_OPEN
+                self._probing = True
+                print(f"[{self.site}] 대기 시간이 지나 시험 검색을 한 번 보냅니다.")
+                return True
+            self.skipped_count += 1
+            return False
+
+    def record(self, outcome):
+        """
+        검색 결과 기록
+        outcome: 'ok'(가격 찾음), 'miss'(가격 없음), 'error'(오류/시간 초과), 'blocked'(봇 차단 페이지)
+        """
+        failed = outcome != 'ok'
+        with self._lock:
+            self._outcomes.append(failed)
+            self._consecutive_failures = self._consecutive_failures + 1 if failed else 0
+
+            if self.state == HALF_OPEN and self._probing:
+                self._probing = False
+                if failed:
+                    self._cooldown = min(self._cooldown * 2, self.max_cooldown)
+                    self._open(f'시험 검색 실패 ({outcome})')
+                else:
+                    self.state = CLOSED
+                    self._cooldown = self.base_cooldown
+                    self._outcomes.clear()
+                    print(f"[{self.site}] 시험 검색 성공 - 다시 검색합니다.")
+                return
+
+            if self.state != CLOSED:
+                return
+            if outcome == 'blocked':
+                self._open('봇 차단 페이지 감지')
+            elif self._consecutive_failures >= self.max_consecutive:
+                self._open(f'{self._consecutive_failures}회 연속 실패')
+            elif len(self._outcomes) >= self.min_samples and self._failure_rate() >= self.failure_threshold:
+                self._open(f'최근 실패율 {self._failure_rate() * 100:.0f}%')
+
+    def _open(self, reason):
+        self.state = OPEN
+        self._open_until = time.monotonic() + self._cooldown
+        self.open_count += 1
+        metrics.inc('circuit_open', site=self.site)
+        print(f"[{self.site}] {reason} - {self._cooldown / 60:.0f}분 동안 이 쇼핑몰 검색을 건너뜁니다.")
+
+    def _failure_rate(self):
+        return sum(self._outcomes) / len(self._outcomes) if self._outcomes else 0.0
+
+    def failure_rate(self):
+        with self._lock:
+            return self._failure_rate()
+
+    def record_timing(self, kind, seconds):
+        """kind: 'page_load' 또는 'selector' (가격이 보일 때까지) - 성공한 경우만 기록"""
+        with self._lock:
+            self._timings.setdefault(kind, deque(maxlen=self._timing_window)).append(seconds)
+
+    def adaptive_timeout(self, kind, default, floor, factor=2.0, min_samples=10):
+        """
+        최근 측정값 p95 * factor 를 floor ~ default 사이로 제한해서 반환
+        측정값이 min_samples 개보다 적으면 default
+        """
+        with self._lock:
+            samples = list(self._timings.get(kind, ()))
+        if len(samples) < min_samples:
+            return default
+        return float(min(default, max(floor, np.percentile(samples, 95) * factor)))
+
+    def summary(self):
+        with self._lock:
+            return {
+                'state': self.state,
+                'failure_rate': self._failure_rate(),
+                'skipped': self.skipped_count,
+                'opened': self.open_count,
+            }
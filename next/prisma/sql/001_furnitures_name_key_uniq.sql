@@ -0,0 +1,89 @@
+-- furniture.furnitures 이름 유니크 인덱스 (크롤러 FurnitureSink 의 INSERT ... ON CONFLICT 중복 판단 기준)
+-- prisma 스키마는 식(expression) 인덱스를 표현할 수 없어서 SQL 로 따로 관리합니다.
+--
+-- 실행: psql "$DATABASE_URL" -f prisma/sql/001_furnitures_name_key_uniq.sql
+--   1) 같은 이름(앞뒤 공백/연속 공백/대소문자 무시)의 가구를 하나만 남김
+--      남길 가구: 3D 모델(model_url) 있는 것 > 캐시 모델(cached_model_url) 있는 것 > 가격 있는 것 > 먼저 만든 것
+--      남는 가구의 비어 있는 가격/이미지/설명/브랜드는 지워지는 가구 값으로 채움
+--      지워지는 가구가 남는 가구와 다른 model_url / cached_model_url 을 갖고 있으면 (Trellis 로 만든 모델이 사라지므로)
+--      아무것도 지우지 않고 중단합니다. 출력된 가구를 직접 정리한 뒤 다시 실행하세요.
+--      지워지는 가구를 배치한 room_objects 는 남는 가구로 옮김
+--      (room_objects 는 ON DELETE CASCADE 라서 옮기지 않으면 방에서 가구가 사라짐)
+--   2) CREATE INDEX CONCURRENTLY 로 쓰기를 막지 않고 인덱스 생성 (트랜잭션 밖에서 실행해야 함)
+-- 2) 가 도중에 실패하면(그 사이 중복이 다시 들어온 경우 등) INVALID 인덱스가 남습니다.
+--   DROP INDEX CONCURRENTLY furniture.furnitures_name_key_uniq; 후 이 파일을 다시 실행하세요.
+-- 식은 furniture_db.py 의 NAME_KEY_SQL 과 같아야 합니다.
+
+\set ON_ERROR_STOP on
+
+BEGIN;
+
+CREATE TEMP TABLE furniture_name_dupes ON COMMIT DROP AS
+SELECT furniture_id, keep_id
+FROM (
+    SELECT
+        furniture_id,
+        first_value(furniture_id) OVER (
+            PARTITION BY lower(regexp_replace(btrim(name), '\s+', ' ', 'g'))
+            ORDER BY (model_url IS NULL), (cached_model_url IS NULL), (price IS NULL),
+                     created_at NULLS LAST, furniture_id
+        ) AS keep_id
+    FROM furniture.furnitures
+) ranked
+WHERE furniture_id <> keep_id;
+
+-- 남는 가구에 없는 3D 모델을 가진 중복이 있으면 중단 (트랜잭션 전체 취소)
+DO $$
+DECLARE
+    conflict record;
+    conflicts integer := 0;
+BEGIN
+    FOR conflict IN
+        SELECT kept.furniture_id AS keep_id, dup.furniture_id AS dup_id, dup.name
+        FROM furniture_name_dupes AS d
+        JOIN furniture.furnitures AS dup ON dup.furniture_id = d.furniture_id
+        JOIN furniture.furnitures AS kept ON kept.furniture_id = d.keep_id
+        WHERE (dup.model_url IS NOT NULL AND dup.model_url IS DISTINCT FROM kept.model_url)
+           OR (dup.cached_model_url IS NOT NULL AND dup.cached_model_url IS DISTINCT FROM kept.cached_model_url)
+    LOOP
+        conflicts := conflicts + 1;
+        RAISE WARNING '모델이 다른 중복 가구: % (남길 가구 %, 지울 가구 %)', conflict.name, conflict.keep_id, conflict.dup_id;
+    END LOOP;
+    IF conflicts > 0 THEN
+        RAISE EXCEPTION '서로 다른 3D 모델을 가진 중복 가구 %개 - 위 가구를 직접 정리한 뒤 다시 실행하세요', conflicts;
+    END IF;
+END
+$$;
+
+-- 남는 가구의 빈 값을 중복 가구 값으로 채움 (가격 있는 것, 먼저 만든 것 순서)
+UPDATE furniture.furnitures AS kept
+SET price = coalesce(kept.price, filled.price),
+    image_url = coalesce(kept.image_url, filled.image_url),
+    description = coalesce(kept.description, filled.description),
+    brand = coalesce(kept.brand, filled.brand)
+FROM (
+    SELECT
+        d.keep_id,
+        (array_agg(f.price ORDER BY f.created_at NULLS LAST) FILTER (WHERE f.price IS NOT NULL))[1] AS price,
+        (array_agg(f.image_url ORDER BY f.created_at NULLS LAST) FILTER (WHERE f.image_url IS NOT NULL))[1] AS image_url,
+        (array_agg(f.description ORDER BY f.created_at NULLS LAST) FILTER (WHERE f.description IS NOT NULL))[1] AS description,
+        (array_agg(f.brand ORDER BY f.created_at NULLS LAST) FILTER (WHERE f.brand IS NOT NULL))[1] AS brand
+    FROM furniture_name_dupes AS d
+    JOIN furniture.furnitures AS f ON f.furniture_id = d.furniture_id
+    GROUP BY d.keep_id
+) AS filled
+WHERE kept.furniture_id = filled.keep_id;
+
+UPDATE room.room_objects AS o
+SET furniture_id = d.keep_id
+FROM furniture_name_dupes AS d
+WHERE o.furniture_id = d.furniture_id;
+
+DELETE FROM furniture.furnitures AS f
+USING furniture_name_dupes AS d
+WHERE f.furniture_id = d.furniture_id;
+
+COMMIT;
+
+CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS furnitures_name_key_uniq
+ON furniture.furnitures (lower(regexp_replace(btrim(name), '\s+', ' ', 'g')));
@@ -0,0 +1,12 @@
+-- 가격 갱신 시도 기록 (크롤러 price_refresh.RefreshScheduler / RefreshAttemptLog)
+-- 모든 쇼핑몰에서 가격을 못 찾은 가구는 misses 를 늘리고, 다음 갱신 후보에서
+-- min_age_days * 2^(misses-1) 일(최대 max_age_days) 동안 뺍니다. 가격을 찾으면 misses 는 0 으로 돌아갑니다.
+-- 가구가 지워지면 기록도 같이 지워집니다.
+--
+-- 실행: psql "$DATABASE_URL" -f prisma/sql/002_price_refresh_attempts.sql
+
+CREATE TABLE IF NOT EXISTS furniture.price_refresh_attempts (
+    furniture_id uuid PRIMARY KEY REFERENCES furniture.furnitures (furniture_id) ON DELETE CASCADE,
+    attempted_at timestamp(6) NOT NULL DEFAULT now(),
+    misses integer NOT NULL DEFAULT 0
+);
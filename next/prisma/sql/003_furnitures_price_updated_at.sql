@@ -0,0 +1,19 @@
+-- furniture.furnitures.price_updated_at - 가격을 마지막으로 저장한 시각
+-- 크롤러의 가구 정보 갱신(--update-existing)은 updated_at 을 바꾸므로, 가격이 오래됐는지는 이 컬럼으로 판단합니다.
+-- (price_refresh.RefreshScheduler 가 사용, furniture_db.BatchPriceWriter 만 갱신)
+-- schema.prisma 의 furnitures.price_updated_at 과 같은 컬럼입니다.
+--
+-- 실행: psql "$DATABASE_URL" -f prisma/sql/003_furnitures_price_updated_at.sql
+--   기존 가격은 정확한 저장 시각을 알 수 없으므로 updated_at 으로 채웁니다.
+
+\set ON_ERROR_STOP on
+
+BEGIN;
+
+ALTER TABLE furniture.furnitures ADD COLUMN IF NOT EXISTS price_updated_at timestamp(6);
+
+UPDATE furniture.furnitures
+SET price_updated_at = updated_at
+WHERE price IS NOT NULL AND price_updated_at IS NULL;
+
+COMMIT;